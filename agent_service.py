@@ -0,0 +1,221 @@
+"""
+Long-lived HTTP service around demo_agent.chat_once.
+
+The LLM client, tool registry, tool result cache and worker threads are
+created once and stay warm; requests are answered concurrently by a bounded
+worker pool instead of one question per process:
+
+    python agent_service.py --port 8080 --workers 16
+    curl -s localhost:8080/chat -d '{"question": "...", "timeout": 120}'
+
+Endpoints:
+    POST /chat    {"question", "model"?, "timeout"?, "stream"?} -> {"id", "answer", "trace"}
+    POST /cancel  {"id"}   cancel an in-flight request
+    GET  /health  liveness + queue depth
+    GET  /stats   tool cache hit rates and the span summary (tracing.py)
+
+A request that does not end in 200 (timeout 504, cancelled 499, error 500)
+has its cancel event set: queued tool calls are dropped, and the chat loop
+stops at its next checkpoint (before the next LLM call, between stream
+chunks, while waiting on tools). When the queue is full, new requests get 503 immediately;
+a "timeout" that is not a positive number gets 400.
+
+Tool calls of all requests share demo_agent's tool pools. The shared pool is
+sized from --tool-workers (default: max(TOOL_MAX_WORKERS, --workers)); the
+per-tool limits in demo_agent.TOOL_CONCURRENCY protect the upstream APIs and
+stay fixed per process however many workers are configured.
+
+For load tests against a local stub LLM instead of Azure, pass
+--llm-base-url http://127.0.0.1:9000/v1 (any OpenAI-compatible server).
+"""
+import os
+import json
+import math
+import uuid
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import demo_agent
+import tracing
+
+DEFAULT_TIMEOUT = float(os.getenv("AGENT_REQUEST_TIMEOUT", "300"))
+
+
+class AgentService:
+    def __init__(self, workers=8, queue=32, timeout=DEFAULT_TIMEOUT, tool_workers=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.tool_workers = tool_workers or max(demo_agent.TOOL_MAX_WORKERS, workers)
+        if self.tool_workers != demo_agent.TOOL_MAX_WORKERS:
+            demo_agent.configure_tool_pools(max_workers=self.tool_workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat")
+        self._admission = threading.BoundedSemaphore(workers + queue)  # running + waiting
+        self._inflight = {}        # request id -> cancel Event
+        self._lock = threading.Lock()
+
+    def _run(self, question, model, stream, cancel, trace):
+        try:
+            return demo_agent.chat_once(question, model, trace=trace, stream=stream, cancel=cancel)
+        finally:
+            self._admission.release()
+
+    def chat(self, question, model=None, timeout=None, stream=False):
+        """
+        Answer one question on the worker pool.
+
+        Returns:
+            (status, body): 200 with the answer and trace, 400 for an invalid
+            timeout, 503 when the queue is full, 504 on timeout, 499 when
+            cancelled, 500 on other errors.
+        """
+        if timeout is not None and not _positive_number(timeout):
+            return 400, {"error": "'timeout' must be a positive number of seconds"}
+        if not self._admission.acquire(blocking=False):
+            return 503, {"error": "server busy, retry later"}
+        request_id = uuid.uuid4().hex
+        cancel = threading.Event()
+        trace = demo_agent.ChatTrace(trace_id=request_id)
+        with self._lock:
+            self._inflight[request_id] = cancel
+        try:
+            future = self._executor.submit(self._run, question, model, stream, cancel, trace)
+        except RuntimeError:
+            self._admission.release()
+            with self._lock:
+                self._inflight.pop(request_id, None)
+            return 503, {"error": "server shutting down"}
+        timeout = timeout or self.timeout
+        answered = False
+        try:
+            answer = future.result(timeout=timeout)
+            answered = True
+            return 200, {"id": request_id, "answer": answer, "trace": trace.to_dict()}
+        except FutureTimeout:
+            return 504, {"id": request_id, "error": f"timed out after {timeout}s", "trace": trace.to_dict()}
+        except demo_agent.ChatCancelled:
+            return 499, {"id": request_id, "error": "cancelled", "trace": trace.to_dict()}
+        except Exception as e:
+            logging.exception("chat request %s failed", request_id)
+            return 500, {"id": request_id, "error": f"{type(e).__name__}: {e}"}
+        finally:
+            if not answered:
+                cancel.set()       # stop the chat loop and its queued tool calls whatever went wrong
+            with self._lock:
+                self._inflight.pop(request_id, None)
+
+    def cancel(self, request_id):
+        with self._lock:
+            cancel = self._inflight.get(request_id)
+        if cancel is None:
+            return False
+        cancel.set()
+        return True
+
+    def health(self):
+        with self._lock:
+            inflight = len(self._inflight)
+        return {"status": "ok", "workers": self.workers, "tool_workers": self.tool_workers, "inflight": inflight}
+
+    def stats(self):
+        return {"tool_cache": demo_agent.tool_cache_stats(), "spans": tracing.summarize()}
+
+    def shutdown(self):
+        """ Stop accepting work, cancel everything in flight and wait for the workers."""
+        with self._lock:
+            events = list(self._inflight.values())
+        for cancel in events:
+            cancel.set()
+        self._executor.shutdown(wait=True)
+
+
+def _positive_number(value):
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and value > 0)
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive for load generators
+
+        def _send(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, service.health())
+            elif self.path == "/stats":
+                self._send(200, service.stats())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            try:
+                body = self._body()
+            except ValueError:
+                self._send(400, {"error": "body must be JSON"})
+                return
+            if self.path == "/chat":
+                if not body.get("question"):
+                    self._send(400, {"error": "missing 'question'"})
+                    return
+                status, result = service.chat(body["question"], body.get("model"),
+                                              body.get("timeout"), bool(body.get("stream")))
+                self._send(status, result)
+            elif self.path == "/cancel":
+                found = service.cancel(body.get("id", ""))
+                self._send(200 if found else 404, {"cancelled": found})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def log_message(self, fmt, *args):
+            logging.info("%s - %s", self.address_string(), fmt % args)
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8080, workers=8, queue=32, timeout=DEFAULT_TIMEOUT, tool_workers=None):
+    service = AgentService(workers=workers, queue=queue, timeout=timeout, tool_workers=tool_workers)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    logging.info(f"Agent service on http://{host}:{port} ({workers} workers, queue {queue}, "
+                 f"{service.tool_workers} shared tool threads)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Serve demo_agent.chat_once over local HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=8, help="concurrent chat requests")
+    parser.add_argument("--tool-workers", type=int,
+                        help="threads for tools without their own limit (default: max(TOOL_MAX_WORKERS, --workers))")
+    parser.add_argument("--queue", type=int, default=32, help="requests allowed to wait for a worker")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="default per-request timeout (s)")
+    parser.add_argument("--llm-base-url", help="OpenAI-compatible endpoint to use instead of Azure (e.g. a stub)")
+    parser.add_argument("--model", help="default model / deployment name")
+    args = parser.parse_args()
+    if args.llm_base_url:
+        from openai import OpenAI
+        demo_agent.client = OpenAI(base_url=args.llm_base_url, api_key=os.getenv("OPENAI_API_KEY", "stub"))
+    if args.model:
+        os.environ["YOUR_DEPLOYMENT"] = args.model
+    serve(args.host, args.port, args.workers, args.queue, args.timeout, args.tool_workers)
@@ -0,0 +1,203 @@
+"""
+Benchmark the relation queries in kg.py against the pre-migration SQL.
+
+Each getter's old query (two joins on MRCONSO by CUI alone, `CUI1 = x OR
+CUI2 = x`) and its current template are run on the same CUIs through kg's
+connection pool. The script checks that both return the same rows and then
+reports median and p95 latency. Queries that GROUP BY (get_treatments) pick an
+arbitrary term per group, so only their key columns are compared.
+
+Needs a database with MRCONSO_ENG_PT (migrations/001_relation_query_indexes.sql
+on MySQL, `umls_local.py --derived-only` on SQLite):
+
+    python bench_relations.py --cuis C0011849 C0020538 C0027051
+    UMLS_BACKEND=sqlite UMLS_SQLITE_PATH=umls.sqlite python bench_relations.py --sample 200
+"""
+import time
+import random
+import logging
+import argparse
+import statistics
+
+import kg
+
+LEGACY_NAMES = """
+                FROM
+                    MRREL R
+                LEFT JOIN
+                    MRCONSO M1 ON R.CUI1 = M1.CUI
+                LEFT JOIN
+                    MRCONSO M2 ON R.CUI2 = M2.CUI
+"""
+
+LEGACY_RELATIONS_SQL = """
+                SELECT DISTINCT
+                    R.CUI1 AS SourceCUI, M1.STR AS SourceTerm, R.REL AS Relationship,
+                    R.RELA AS RelationshipType, R.CUI2 AS TargetCUI, M2.STR AS TargetTerm, R.SAB AS Source
+""" + LEGACY_NAMES + """
+                WHERE
+                    (R.CUI1 = %s OR R.CUI2 = %s)
+                    {rela_filter}
+                    AND M1.TTY = 'PT' AND M1.TS = 'P' AND M2.TTY = 'PT' AND M2.TS = 'P'
+                    AND M1.LAT = 'ENG' AND M2.LAT = 'ENG'
+"""
+
+# (legacy sql, legacy params, new sql, new params, key columns or None for whole rows)
+def _queries(cui, relationship_type):
+    one = lambda template: template.format(cuis="%s")
+    relations_sql, relations_params = kg._relations_sql(cui)
+    specific_sql, specific_params = kg._relations_sql(cui, relationship_type)
+    return {
+        "get_relations": (
+            LEGACY_RELATIONS_SQL.format(rela_filter=""), [cui, cui],
+            relations_sql, relations_params, None),
+        "get_specific_relation": (
+            LEGACY_RELATIONS_SQL.format(rela_filter="AND R.RELA = %s"), [cui, cui, relationship_type],
+            specific_sql, specific_params, None),
+        "get_ro_relations": ("""
+                SELECT DISTINCT
+                    R.CUI1 AS SourceCUI, M1.STR AS SourceTerm, R.CUI2 AS TargetCUI, M2.STR AS TargetTerm,
+                    R.REL AS Relationship, R.RELA AS RelationshipType, R.SAB AS Source
+""" + LEGACY_NAMES + """
+                WHERE
+                    R.CUI1 = %s AND R.REL = 'RO' AND R.SAB != 'NCI'
+                    AND M1.LAT = 'ENG' AND M1.TTY = 'PT' AND M2.LAT = 'ENG' AND M2.TTY = 'PT'
+            """, [cui], one(kg.RO_RELATIONS_SQL), [cui], None),
+        "get_parent_from_snomedct": ("""
+                SELECT DISTINCT
+                    R.CUI1 AS ChildID, M1.STR AS ChildTerm, R.RELA AS RelationshipType,
+                    R.CUI2 AS ParentID, M2.STR AS ParentTerm
+                FROM
+                    MRREL R
+                JOIN MRCONSO M1 ON R.CUI1 = M1.CUI
+                JOIN MRCONSO M2 ON R.CUI2 = M2.CUI
+                WHERE
+                    R.CUI1 = %s AND R.RELA = 'inverse_isa' AND R.REL = 'PAR' AND R.SAB = 'SNOMEDCT_US'
+                    AND M1.SAB = 'SNOMEDCT_US' AND M1.TTY = 'PT'
+                    AND M2.SAB = 'SNOMEDCT_US' AND M2.TTY = 'PT' AND M2.TS = 'P'
+                    AND M1.LAT = 'ENG' AND M2.LAT = 'ENG'
+            """, [cui], one(kg.SNOMED_PARENTS_SQL), [cui], None),
+        "get_children_from_snomedct": ("""
+                SELECT DISTINCT
+                    R.CUI1 AS ChildID, M1.STR AS ChildTerm, R.RELA AS RelationshipType,
+                    R.CUI2 AS ParentID, M2.STR AS ParentTerm
+                FROM
+                    MRREL R
+                JOIN MRCONSO M1 ON R.CUI1 = M1.CUI
+                JOIN MRCONSO M2 ON R.CUI2 = M2.CUI
+                WHERE
+                    R.CUI2 = %s AND R.RELA = 'inverse_isa' AND R.REL = 'PAR' AND R.SAB = 'SNOMEDCT_US'
+                    AND M1.SAB = 'SNOMEDCT_US' AND M1.TTY = 'PT'
+                    AND M2.SAB = 'SNOMEDCT_US' AND M2.TTY = 'PT'
+            """, [cui], one(kg.SNOMED_CHILDREN_SQL), [cui], None),
+        "get_treatments": ("""
+                SELECT DISTINCT
+                    R.CUI1 AS DiseaseCUI, M1.STR AS DiseaseTerm, R.REL AS Relationship,
+                    R.RELA AS RelationshipType, R.CUI2 AS TreatmentCUI, M2.STR AS TreatmentTerm
+""" + LEGACY_NAMES + """
+                WHERE
+                    R.CUI1 = %s AND R.RELA IN ('may_treat')
+                    AND M1.TTY = 'PT' AND M2.TTY = 'PT' AND M2.TS = 'P'
+                    AND M1.LAT = 'ENG' AND M2.LAT = 'ENG'
+                GROUP BY
+                    R.CUI1, R.CUI2
+            """, [cui], one(kg.TREATMENTS_SQL), [cui], ["DiseaseCUI", "TreatmentCUI"]),
+        "has_manifestation": ("""
+                SELECT DISTINCT
+                    R.CUI1 AS DiseaseCUI, M1.STR AS DiseaseTerm, R.REL AS Relationship,
+                    R.RELA AS RelationshipType, R.CUI2 AS TreatmentCUI, M2.STR AS TreatmentTerm
+""" + LEGACY_NAMES + """
+                WHERE
+                    R.CUI1 = %s AND R.RELA IN ('has_manifestation', 'manifestation_of')
+                    AND M1.SAB = 'SNOMEDCT_US' AND M1.TS = 'P' AND M1.TTY = 'PT'
+                    AND M2.SAB = 'SNOMEDCT_US' AND M2.TS = 'P' AND M2.TTY = 'PT'
+                    AND M1.LAT = 'ENG' AND M2.LAT = 'ENG'
+            """, [cui], one(kg.MANIFESTATIONS_SQL), [cui], None),
+        "has_associated_finding": ("""
+                SELECT DISTINCT
+                    R.CUI1 AS SourceCUI, M1.STR AS SourceTerm, R.REL AS Relationship,
+                    R.RELA AS RelationshipType, R.CUI2 AS TargetCUI, M2.STR AS TargetTerm
+""" + LEGACY_NAMES + """
+                WHERE
+                    R.CUI1 = %s
+                    AND R.RELA IN ('has_associated_finding', 'associated_finding_of', 'see_from', 'see', 'interprets', 'is_interpreted_by')
+                    AND M1.SAB = 'SNOMEDCT_US' AND M1.TS = 'P' AND M1.TTY = 'PT'
+                    AND M2.SAB = 'SNOMEDCT_US' AND M2.TS = 'P' AND M2.TTY = 'PT'
+                    AND M1.LAT = 'ENG' AND M2.LAT = 'ENG'
+            """, [cui], one(kg.ASSOCIATED_FINDINGS_SQL), [cui], None),
+    }
+
+
+def _run(cursor, sql, params):
+    start = time.perf_counter()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    return time.perf_counter() - start, rows
+
+
+def _as_set(rows, columns):
+    if columns is None:
+        return {tuple(sorted(row.items())) for row in rows}
+    return {tuple(row[column] for column in columns) for row in rows}
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def sample_cuis(n, seed=0):
+    """ `n` random CUIs that appear as CUI1 in MRREL."""
+    with kg.pool.connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT DISTINCT CUI1 FROM MRREL")
+            cuis = [row["CUI1"] for row in cursor.fetchall()]
+    random.Random(seed).shuffle(cuis)
+    return cuis[:n]
+
+
+def benchmark(cuis, relationship_type="may_treat", repeat=3):
+    """
+    Time old vs new SQL for every relation getter.
+
+    Returns:
+        dict: {getter: {"legacy": [seconds], "new": [seconds], "mismatches": [cui, ...]}}
+    """
+    results = {}
+    with kg.pool.connection() as connection:
+        with connection.cursor() as cursor:
+            for cui in cuis:
+                for name, (old_sql, old_params, new_sql, new_params, columns) in _queries(cui, relationship_type).items():
+                    entry = results.setdefault(name, {"legacy": [], "new": [], "mismatches": []})
+                    for _ in range(repeat):
+                        old_time, old_rows = _run(cursor, old_sql, old_params)
+                        new_time, new_rows = _run(cursor, new_sql, new_params)
+                        entry["legacy"].append(old_time)
+                        entry["new"].append(new_time)
+                    if _as_set(old_rows, columns) != _as_set(new_rows, columns):
+                        entry["mismatches"].append(cui)
+    return results
+
+
+def report(results):
+    print(f"{'getter':<28}{'legacy p50':>12}{'legacy p95':>12}{'new p50':>12}{'new p95':>12}{'speedup':>9}  result")
+    for name, entry in results.items():
+        old50, new50 = statistics.median(entry["legacy"]), statistics.median(entry["new"])
+        status = "identical" if not entry["mismatches"] else f"DIFFERS for {entry['mismatches'][:5]}"
+        print(f"{name:<28}{old50 * 1e3:>10.2f}ms{_percentile(entry['legacy'], 0.95) * 1e3:>10.2f}ms"
+              f"{new50 * 1e3:>10.2f}ms{_percentile(entry['new'], 0.95) * 1e3:>10.2f}ms"
+              f"{old50 / new50 if new50 else float('inf'):>8.1f}x  {status}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Compare the relation queries before and after the MRCONSO_ENG_PT migration.")
+    parser.add_argument("--cuis", nargs="*", help="CUIs to query (default: a random sample from MRREL)")
+    parser.add_argument("--sample", type=int, default=50, help="number of random CUIs when --cuis is not given")
+    parser.add_argument("--relationship-type", default="may_treat", help="RELA used for get_specific_relation")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per query and CUI")
+    args = parser.parse_args()
+    results = benchmark(args.cuis or sample_cuis(args.sample), args.relationship_type, args.repeat)
+    report(results)
+    if any(entry["mismatches"] for entry in results.values()):
+        raise SystemExit(1)
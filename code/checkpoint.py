@@ -0,0 +1,123 @@
+"""
+Append-only JSONL checkpoints for long generation runs (umls.py, enrich.py).
+
+Each finished item is appended as one line {"id": ..., "result": ...}, so
+the bytes written over a run are O(n), not O(n^2) as they are when the
+whole output list is re-dumped every few items. On restart, completed() gives the ids to
+skip. A line torn by a crash is dropped when the file is reopened. Once the
+run is done, compact() writes the usual JSON file in input order:
+
+    ckpt = Checkpoint("umls_qa_pairs.jsonl")
+    done = ckpt.completed()
+    for item_id, item in items:
+        if item_id not in done:
+            ckpt.append(item_id, work(item))
+    ckpt.compact("umls_qa_pairs.json", order=[i for i, _ in items])
+
+fsync policy (CHECKPOINT_FSYNC): "always" fsyncs every record, "interval"
+(default) at most every `fsync_interval` seconds, "never" leaves it to the
+OS. Every record is flushed to the OS as soon as it is written, so a
+crashed process loses nothing; fsync only guards against power loss.
+"""
+import os
+import json
+import time
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+class Checkpoint:
+    def __init__(self, path, fsync: Optional[str] = None, fsync_interval: float = 1.0):
+        self.path = str(path)
+        self.fsync = fsync or os.getenv("CHECKPOINT_FSYNC", "interval")
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {self.fsync!r}")
+        self.fsync_interval = fsync_interval
+        self._records: Dict[str, object] = self._recover()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _recover(self) -> Dict[str, object]:
+        """ Read existing records and cut off a torn last line so appends start clean."""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        good = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                records[record["id"]] = record["result"]
+                good += len(line)
+        if good != os.path.getsize(self.path):
+            with open(self.path, "rb+") as f:
+                f.truncate(good)
+        return records
+
+    def completed(self) -> set:
+        return set(self._records)
+
+    def records(self) -> Dict[str, object]:
+        return dict(self._records)
+
+    def append(self, item_id: str, result) -> None:
+        line = json.dumps({"id": item_id, "result": result}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            now = time.monotonic()
+            if self.fsync == "always" or (self.fsync == "interval" and now - self._last_sync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_sync = now
+            self._records[item_id] = result
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                if self.fsync != "never":
+                    os.fsync(self._file.fileno())
+                self._file.close()
+
+    def compact(self, out_path, order: Optional[Iterable[str]] = None,
+                wrap: Callable[[list], object] = lambda items: items,
+                fallback: Optional[Dict[str, object]] = None) -> int:
+        """
+        Write the results as one JSON document (indent=2), atomically.
+
+        Args:
+            order: Item ids in output order; ids without a record are skipped
+                (or taken from `fallback`). Default: checkpoint order.
+            wrap: Builds the document from the result list, e.g.
+                lambda items: {"dataset": items}.
+
+        Returns:
+            Number of results written.
+        """
+        self.close()
+        fallback = fallback or {}
+        ids = list(self._records) if order is None else order
+        items = [self._records[i] if i in self._records else fallback[i]
+                 for i in ids if i in self._records or i in fallback]
+        tmp = f"{out_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(wrap(items), f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, out_path)
+        return len(items)
+
+
+def occurrence_ids(ids: Iterable[str]):
+    """ Make ids unique in order: the second "x" becomes "x#2", the third "x#3", ..."""
+    seen: Dict[str, int] = {}
+    for item_id in ids:
+        seen[item_id] = seen.get(item_id, 0) + 1
+        yield item_id if seen[item_id] == 1 else f"{item_id}#{seen[item_id]}"
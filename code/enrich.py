@@ -84,21 +84,32 @@ def rewrite_entry(entry: dict,
 # 假设 data 原始结构是 {"dataset": [ {...}, {...} ]}
 IN_FILE  = "umls_qa.json"
 OUT_FILE = "umls_qa_rewritten.json"
+CHECKPOINT_FILE = "umls_qa_rewritten.jsonl"   # 每完成一条追加一行；中断后重跑会跳过已完成的 id
 
 from tqdm import tqdm
 import json
+from checkpoint import Checkpoint, occurrence_ids
 
 with open(IN_FILE, "r", encoding="utf-8") as f:
     data = json.load(f)
 
-rewritten_items = []
-
-# 使用 tqdm 包装 enumerate，显示进度条
-for i, item in enumerate(tqdm(data["dataset"], desc="Rewriting items"), 1):
-    # 可选：在 tqdm 进度条上显示额外信息（如 ID）
-    rewritten_items.append(rewrite_entry(item))
-
-with open(OUT_FILE, "w", encoding="utf-8") as f:
-    json.dump({"dataset": rewritten_items}, f, ensure_ascii=False, indent=2)
+# id 有重复时第二次出现记为 "id#2"，保证断点 key 唯一
+keys = list(occurrence_ids(str(item.get("id", i)) for i, item in enumerate(data["dataset"])))
+checkpoint = Checkpoint(CHECKPOINT_FILE)
+done = checkpoint.completed()
+failed = {}        # 重试仍失败的条目不写断点（下次重跑会再试），只用于本次输出
+
+# 使用 tqdm 显示进度条；断点里已有的条目直接跳过
+for key, item in tqdm(list(zip(keys, data["dataset"])), desc="Rewriting items"):
+    if key in done:
+        continue
+    result = rewrite_entry(item)
+    if result.get("rewrite_error"):
+        failed[key] = result
+    else:
+        checkpoint.append(key, result)
+
+# 按原顺序合并为原来的 {"dataset": [...]} 格式
+checkpoint.compact(OUT_FILE, order=keys, wrap=lambda items: {"dataset": items}, fallback=failed)
 
 print("✅  完成！结果保存在:", OUT_FILE)
@@ -1,10 +1,40 @@
 import pymysql
+import os
+import functools
+import inspect
+import itertools
 import time
 import logging
+import threading
+from contextlib import contextmanager
+
+import umls_cache
+
+# Optional span tracing (tracing.py at the repository root). Without it the
+# getters are not wrapped at all.
+try:
+    import tracing
+except ImportError:
+    tracing = None
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# The relation getters log errors and return None, which looks exactly like
+# "no results". The last swallowed error is kept per thread so wrappers (e.g.
+# the result cache here, or demo_agent's tool cache around a whole tool) can
+# tell the two apart. Wrappers that check it put it back afterwards, so an
+# outer wrapper still sees an error raised inside an inner one.
+_errors = threading.local()
+
+def _record_error(e):
+    _errors.last = e
+
+def _pop_error():
+    e = getattr(_errors, "last", None)
+    _errors.last = None
+    return e
+
 def get_connection(retries = 5, delay = 3):
     attempt = 0
     while attempt < retries:
@@ -16,7 +46,8 @@ def get_connection(retries = 5, delay = 3):
                 database="umls",
                 port=3306,
                 cursorclass=pymysql.cursors.DictCursor,
-                connect_timeout=10
+                connect_timeout=10,
+                autocommit=True  # pooled connections must not pin an old read snapshot
             )
             print("Connected to the database.")
             return connection
@@ -29,10 +60,294 @@ def get_connection(retries = 5, delay = 3):
             else:
                 logging.error("All connection attempts failed. Please check the MySQL server and network settings.")
                 raise e
-            
+
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of database connections.
+
+    At most `size` connections are checked out at once; `acquire` blocks (up to
+    `timeout` seconds, forever if None) while the pool is exhausted. Idle
+    connections are pinged on checkout and replaced if the socket went stale.
+    New connections come from `connect` (default: get_connection), so its
+    retry/backoff only applies when the pool has to refill, not to every query.
+
+    Usage:
+        with pool.connection() as connection:
+            with connection.cursor() as cursor:
+                ...
+    """
+
+    def __init__(self, size=4, connect=None, timeout=None):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.size = size
+        self.timeout = timeout
+        self._connect = connect or get_connection
+        self._idle = []  # LIFO, so the warmest connection is reused first
+        self._closed = False
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self, timeout=None):
+        """ Check out a healthy connection, opening a new one if none is idle."""
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No database connection available within {timeout} seconds.")
+        try:
+            while True:
+                with self._lock:
+                    connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    return self._connect()
+                if self._is_alive(connection):
+                    return connection
+                logging.info("Discarding stale pooled connection.")
+                self._discard(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        """ Return a connection to the pool; broken or discarded ones are closed instead."""
+        try:
+            if discard or self._closed or not connection.open:
+                self._discard(connection)
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.acquire(timeout)
+        broken = False
+        try:
+            yield connection
+        except (pymysql.OperationalError, pymysql.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(connection, discard=broken)
+
+    def close(self):
+        """ Close all idle connections. Checked-out connections are closed when released."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+
+    @staticmethod
+    def _is_alive(connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def _backend_connect(backend, sqlite_path=None):
+    """ Connection factory for a backend: "mysql" (remote server) or "sqlite" (offline file, see umls_local.py)."""
+    if backend == "mysql":
+        return get_connection
+    if backend == "sqlite":
+        import umls_local
+        return functools.partial(umls_local.connect, sqlite_path)
+    raise ValueError(f"Unknown UMLS backend: {backend!r} (expected 'mysql' or 'sqlite')")
+
+pool = ConnectionPool(
+    size=int(os.getenv("UMLS_POOL_SIZE", "4")),
+    connect=_backend_connect(os.getenv("UMLS_BACKEND", "mysql"), os.getenv("UMLS_SQLITE_PATH")),
+)
+
+def configure_pool(size=None, timeout=None, connect=None):
+    """ Replace the module-level pool, e.g. to resize it for a batch job."""
+    global pool, _name_table_present
+    _name_table_present = None  # the new pool may point at another database
+    old = pool
+    pool = ConnectionPool(
+        size=size or old.size,
+        connect=connect or old._connect,
+        timeout=timeout if timeout is not None else old.timeout,
+    )
+    old.close()
+    return pool
+
+def configure_backend(backend, sqlite_path=None, size=None):
+    """
+    Point every getter at another backend without changing any call sites.
+
+    Args:
+        backend (str): "mysql" for the remote server, "sqlite" for a database built by umls_local.py.
+        sqlite_path (str): Path of the SQLite file; defaults to $UMLS_SQLITE_PATH.
+        size (int): Optional new pool size.
+    """
+    return configure_pool(size=size, connect=_backend_connect(backend, sqlite_path))
+
+# Result cache (see umls_cache.py): on by default, keyed by getter, arguments
+# and $UMLS_RELEASE. UMLS_CACHE=0 disables it, UMLS_CACHE_PATH adds the
+# on-disk tier. Results of calls that hit a (swallowed) error are not cached.
+result_cache = None
+
+def enable_cache(release=None, max_entries=100_000, disk_path=None):
+    global result_cache
+    result_cache = umls_cache.ResultCache(release or os.getenv("UMLS_RELEASE", "unversioned"), max_entries, disk_path)
+    return result_cache
+
+def disable_cache():
+    global result_cache
+    result_cache = None
+
+def cache_stats():
+    """ Hit/miss counters of the result cache, or None when caching is off."""
+    return result_cache.stats() if result_cache is not None else None
+
+def cached(fn):
+    """ Serve a single-key getter from the result cache."""
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        cache = result_cache
+        if cache is None:
+            return fn(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = cache.key(fn.__name__, bound.arguments.values())
+        value = cache.get(key)
+        if value is not umls_cache.MISS:
+            return value
+        earlier = _pop_error()
+        value = fn(*args, **kwargs)
+        error = _pop_error()
+        if error is None:
+            cache.put(key, value)
+        _record_error(error or earlier)
+        return value
+    return wrapper
+
+def cached_many(single_name):
+    """
+    Serve a *_many getter from the cache entries of its single-key getter.
+
+    Only the keys without a cached result are fetched, and each fetched result
+    is stored under the same key `single_name` would use.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = result_cache
+            if cache is None:
+                return fn(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            (keys_name, items), *rest = bound.arguments.items()
+            extra = [value for name, value in rest if name != "chunk_size"]
+            items = list(dict.fromkeys(items))
+            results, missing = {}, []
+            for item in items:
+                value = cache.get(cache.key(single_name, [item, *extra]))
+                if value is umls_cache.MISS:
+                    missing.append(item)
+                else:
+                    results[item] = value
+            if missing:
+                bound.arguments[keys_name] = missing
+                earlier = _pop_error()
+                fetched = fn(*bound.args, **bound.kwargs)
+                error = _pop_error()
+                if error is None:
+                    cache.put_many((cache.key(single_name, [item, *extra]), fetched[item]) for item in missing)
+                _record_error(error or earlier)
+                results.update(fetched)
+            return {item: results[item] for item in items}
+        return wrapper
+    return decorator
+
+def traced_query(fn):
+    """
+    Record a "db" span per call that reaches the database (cache hits are not
+    traced). Errors the getter logs and turns into None are reported by class.
+    """
+    if tracing is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _errors.last = None
+        with tracing.span("db", fn.__name__) as span:
+            result = fn(*args, **kwargs)
+            if isinstance(result, dict) and fn.__name__.endswith("_many"):
+                span.set_result(result, count=sum(len(v) if isinstance(v, list) else v is not None
+                                                  for v in result.values()))
+            else:
+                span.set_result(result)
+            error = getattr(_errors, "last", None)
+            if error is not None:
+                span.set_error(error)
+        return result
+    return wrapper
+
+if os.getenv("UMLS_CACHE", "1") != "0":
+    enable_cache(disk_path=os.getenv("UMLS_CACHE_PATH"))
+
+# Optional in-process index for look_up_cui, see umls_index.py. Enabled with
+# enable_term_index() or UMLS_TERM_INDEX=<snapshot path | "db">.
+term_index = None
+
+def iter_preferred_terms(batch_size=10000):
+    """ Stream (STR, CUI) for every English preferred term, for building the term index."""
+    with pool.connection() as connection:
+        with connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
+            cursor.execute("SELECT STR, CUI FROM MRCONSO WHERE TTY = 'PT' AND LAT = 'ENG'")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row["STR"], row["CUI"]
+
+def enable_term_index(snapshot=None, max_entries=5_000_000):
+    """
+    Serve look_up_cui from an in-memory index of English PT strings.
+
+    The index is loaded lazily on the first lookup, from `snapshot` (written by
+    umls_index.py) or else straight from the database. Lookups are normalized
+    for case and whitespace; terms with LIKE wildcards still go to SQL, as do
+    all lookups if the index holds more than `max_entries` strings.
+    """
+    global term_index
+    import umls_index
+    term_index = umls_index.LazyTermIndex(iter_preferred_terms, snapshot, max_entries)
+    return term_index
+
+def disable_term_index():
+    global term_index
+    term_index = None
+
+if os.getenv("UMLS_TERM_INDEX"):
+    enable_term_index(None if os.getenv("UMLS_TERM_INDEX") == "db" else os.getenv("UMLS_TERM_INDEX"))
+
+@cached
+@traced_query
 def look_up_cui(term):
     """ Retrieve the Concept Unique Identifier (CUI) for a given term from the MRCONSO table in the UMLS database."""
-    connection = get_connection()
+    if term_index is not None:
+        result = term_index.lookup(term)
+        if result is not NotImplemented:
+            return result
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             sql = """
@@ -52,11 +367,13 @@ def look_up_cui(term):
             if not result:
                 return None
     finally:
-        connection.close()
+        pool.release(connection)
             
+@cached
+@traced_query
 def get_term(cui):
     """ Retrieve the preferred term for a given CUI from the MRCONSO table in the UMLS database."""
-    connection = get_connection()
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             sql = """
@@ -76,11 +393,13 @@ def get_term(cui):
             if not result:
                 return [{"STR": "Unknown Term"}]
     finally:
-        connection.close()
+        pool.release(connection)
         
+@cached
+@traced_query
 def get_synonyms(cui):
     """ Retrieve synonyms for a given CUI from the MRCONSO table in the UMLS database. """
-    connection = get_connection()
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             sql = "SELECT STR FROM MRCONSO WHERE CUI = %s AND TS = 'P' AND STT = 'PF'"
@@ -91,11 +410,13 @@ def get_synonyms(cui):
             if not result:
                 return None
     finally:
-        connection.close()
+        pool.release(connection)
             
+@cached
+@traced_query
 def get_definition(cui):
     """ Retrieve the definition for a given CUI from the MRDEF table in the UMLS database."""
-    connection = get_connection()
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             sql = "SELECT DEF FROM MRDEF WHERE CUI = %s"
@@ -106,11 +427,13 @@ def get_definition(cui):
             if not result:
                 return None
     finally:
-        connection.close()
+        pool.release(connection)
         
+@cached
+@traced_query
 def get_semantic_type(cui):
     """ Retrieve the semantic type for a given CUI from the UMLS database. """
-    connection = get_connection()
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             sql = """
@@ -128,8 +451,218 @@ def get_semantic_type(cui):
             if not result:
                 return None
     finally:
-        connection.close()
+        pool.release(connection)
         
+# ---------------------------------------------------------------------------
+# Relation queries. Names come from MRCONSO_ENG_PT, a pre-filtered copy of the
+# English preferred-term atoms (LAT = 'ENG' AND TTY = 'PT'), instead of two
+# joins on MRCONSO by CUI alone that fan out over every atom of both concepts.
+# Queries that match a CUI on either side are split into one UNION ALL branch
+# per direction so each branch is a range scan on a covering MRREL index.
+# The table and indexes come from migrations/001_relation_query_indexes.sql
+# (MySQL) or umls_local.py (SQLite). On a database that has not been migrated
+# yet the queries fall back to an inline subquery over MRCONSO (checked once per
+# pool, on the first relation query); UMLS_NAME_TABLE=inline forces that form.
+# Each template has `{cuis}` IN-list placeholders: "%s" for one CUI, or a
+# chunk of placeholders in the *_many variants.
+# ---------------------------------------------------------------------------
+
+NAME_TABLE_INLINE = "(SELECT CUI, STR, SAB, TS FROM MRCONSO WHERE LAT = 'ENG' AND TTY = 'PT')"
+NAME_TABLE = os.getenv("UMLS_NAME_TABLE", "MRCONSO_ENG_PT")
+if NAME_TABLE == "inline":
+    NAME_TABLE = NAME_TABLE_INLINE
+_name_table_present = None  # does the current database have NAME_TABLE? None = not checked yet
+
+def _with_names(sql):
+    return sql.replace("{names}", NAME_TABLE)
+
+def _execute(cursor, sql, params=None):
+    """ cursor.execute for the relation templates, using the inline name subquery when NAME_TABLE is missing."""
+    global _name_table_present
+    if NAME_TABLE != NAME_TABLE_INLINE:
+        if _name_table_present is None:
+            try:
+                cursor.execute(f"SELECT 1 FROM {NAME_TABLE} LIMIT 1")
+                cursor.fetchall()
+                _name_table_present = True
+            except Exception as e:
+                logging.warning(f"{NAME_TABLE} is not available ({e}); relation queries use the inline "
+                                "MRCONSO subquery. Run migrations/001_relation_query_indexes.sql to speed them up.")
+                _name_table_present = False
+        if not _name_table_present:
+            sql = sql.replace(NAME_TABLE, NAME_TABLE_INLINE)
+    cursor.execute(sql, params)
+
+# The second branch skips rows whose CUI1 is also requested; the first already returned them.
+RELATIONS_SQL = _with_names("""
+                SELECT DISTINCT 
+                    R.CUI1 AS SourceCUI,  
+                    N1.STR AS SourceTerm,  
+                    R.REL AS Relationship, 
+                    R.RELA AS RelationshipType, 
+                    R.CUI2 AS TargetCUI, 
+                    N2.STR AS TargetTerm, 
+                    R.SAB AS Source
+                FROM 
+                    MRREL R
+                JOIN 
+                    {names} N1 ON N1.CUI = R.CUI1 AND N1.TS = 'P'
+                JOIN 
+                    {names} N2 ON N2.CUI = R.CUI2 AND N2.TS = 'P'
+                WHERE 
+                    R.CUI1 IN ({cuis})
+                    {rela_filter}
+                UNION ALL
+                SELECT DISTINCT 
+                    R.CUI1 AS SourceCUI,  
+                    N1.STR AS SourceTerm,  
+                    R.REL AS Relationship, 
+                    R.RELA AS RelationshipType, 
+                    R.CUI2 AS TargetCUI, 
+                    N2.STR AS TargetTerm, 
+                    R.SAB AS Source
+                FROM 
+                    MRREL R
+                JOIN 
+                    {names} N1 ON N1.CUI = R.CUI1 AND N1.TS = 'P'
+                JOIN 
+                    {names} N2 ON N2.CUI = R.CUI2 AND N2.TS = 'P'
+                WHERE 
+                    R.CUI2 IN ({cuis})
+                    AND R.CUI1 NOT IN ({cuis})
+                    {rela_filter}
+            """)
+
+RO_RELATIONS_SQL = _with_names("""
+                SELECT DISTINCT 
+                    R.CUI1 AS SourceCUI, 
+                    N1.STR AS SourceTerm,
+                    R.CUI2 AS TargetCUI, 
+                    N2.STR AS TargetTerm,
+                    R.REL AS Relationship, 
+                    R.RELA AS RelationshipType, 
+                    R.SAB AS Source
+                FROM 
+                    MRREL R
+                JOIN 
+                    {names} N1 ON N1.CUI = R.CUI1
+                JOIN 
+                    {names} N2 ON N2.CUI = R.CUI2
+                WHERE 
+                    R.CUI1 IN ({cuis})
+                    AND R.REL = 'RO'
+                    AND R.SAB != 'NCI'
+            """)
+
+SNOMED_PARENTS_SQL = _with_names("""
+                SELECT DISTINCT 
+                    R.CUI1 AS ChildID,  
+                    N1.STR AS ChildTerm,  
+                    R.RELA AS RelationshipType, 
+                    R.CUI2 AS ParentID, 
+                    N2.STR AS ParentTerm
+                FROM 
+                    MRREL R
+                JOIN 
+                    {names} N1 ON N1.CUI = R.CUI1 AND N1.SAB = 'SNOMEDCT_US'
+                JOIN 
+                    {names} N2 ON N2.CUI = R.CUI2 AND N2.SAB = 'SNOMEDCT_US' AND N2.TS = 'P'
+                WHERE 
+                    R.CUI1 IN ({cuis})
+                    AND R.RELA = 'inverse_isa'
+                    AND R.SAB = 'SNOMEDCT_US'
+                    AND R.REL = 'PAR'
+            """)
+
+SNOMED_CHILDREN_SQL = _with_names("""
+                SELECT DISTINCT 
+                    R.CUI1 AS ChildID,  
+                    N1.STR AS ChildTerm,  
+                    R.RELA AS RelationshipType, 
+                    R.CUI2 AS ParentID, 
+                    N2.STR AS ParentTerm
+                FROM 
+                    MRREL R
+                JOIN 
+                    {names} N1 ON N1.CUI = R.CUI1 AND N1.SAB = 'SNOMEDCT_US'
+                JOIN 
+                    {names} N2 ON N2.CUI = R.CUI2 AND N2.SAB = 'SNOMEDCT_US'
+                WHERE 
+                    R.CUI2 IN ({cuis})
+                    AND R.RELA = 'inverse_isa'
+                    AND R.SAB = 'SNOMEDCT_US'
+                    AND R.REL = 'PAR'
+            """)
+
+# GROUP BY keeps one row per (disease, treatment) pair, as before.
+TREATMENTS_SQL = _with_names("""
+                SELECT DISTINCT 
+                    R.CUI1 AS DiseaseCUI,  
+                    N1.STR AS DiseaseTerm,  
+                    R.REL AS Relationship, 
+                    R.RELA AS RelationshipType, 
+                    R.CUI2 AS TreatmentCUI, 
+                    N2.STR AS TreatmentTerm
+                FROM 
+                    MRREL R
+                JOIN 
+                    {names} N1 ON N1.CUI = R.CUI1
+                JOIN 
+                    {names} N2 ON N2.CUI = R.CUI2 AND N2.TS = 'P'
+                WHERE 
+                    R.CUI1 IN ({cuis})
+                    AND R.RELA = 'may_treat'
+                GROUP BY 
+                    R.CUI1, R.CUI2
+            """)
+
+MANIFESTATIONS_SQL = _with_names("""
+                SELECT DISTINCT 
+                    R.CUI1 AS DiseaseCUI,  
+                    N1.STR AS DiseaseTerm,  
+                    R.REL AS Relationship, 
+                    R.RELA AS RelationshipType, 
+                    R.CUI2 AS TreatmentCUI, 
+                    N2.STR AS TreatmentTerm
+                FROM 
+                    MRREL R
+                JOIN 
+                    {names} N1 ON N1.CUI = R.CUI1 AND N1.SAB = 'SNOMEDCT_US' AND N1.TS = 'P'
+                JOIN 
+                    {names} N2 ON N2.CUI = R.CUI2 AND N2.SAB = 'SNOMEDCT_US' AND N2.TS = 'P'
+                WHERE 
+                    R.CUI1 IN ({cuis})
+                    AND R.RELA IN ('has_manifestation', 'manifestation_of')
+            """)
+
+ASSOCIATED_FINDINGS_SQL = _with_names("""
+                SELECT DISTINCT 
+                    R.CUI1 AS SourceCUI,  
+                    N1.STR AS SourceTerm,  
+                    R.REL AS Relationship, 
+                    R.RELA AS RelationshipType, 
+                    R.CUI2 AS TargetCUI, 
+                    N2.STR AS TargetTerm
+                FROM 
+                    MRREL R
+                JOIN 
+                    {names} N1 ON N1.CUI = R.CUI1 AND N1.SAB = 'SNOMEDCT_US' AND N1.TS = 'P'
+                JOIN 
+                    {names} N2 ON N2.CUI = R.CUI2 AND N2.SAB = 'SNOMEDCT_US' AND N2.TS = 'P'
+                WHERE 
+                    R.CUI1 IN ({cuis})
+                    AND R.RELA IN ('has_associated_finding', 'associated_finding_of', 'see_from', 'see', 'interprets', 'is_interpreted_by')
+            """)
+
+def _relations_sql(cui, relationship_type=None):
+    """ The get_relations / get_specific_relation query for one CUI and its parameters."""
+    if relationship_type is None:
+        return RELATIONS_SQL.format(cuis="%s", rela_filter=""), [cui, cui, cui]
+    sql = RELATIONS_SQL.format(cuis="%s", rela_filter="AND R.RELA = %s")
+    return sql, [cui, relationship_type, cui, cui, relationship_type]
+
+@cached
+@traced_query
 def get_relations(cui):
     """
     Retrieve all relationships for a given CUI from the UMLS database.
@@ -141,36 +674,13 @@ def get_relations(cui):
         list[dict]: A list of dictionaries containing all relationships, 
                     or None if no relationships are found.
     """
-    connection = get_connection()
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             # SQL query to find all relationships
-            sql = """
-                SELECT DISTINCT 
-                    R.CUI1 AS SourceCUI,  
-                    M1.STR AS SourceTerm,  
-                    R.REL AS Relationship, 
-                    R.RELA AS RelationshipType, 
-                    R.CUI2 AS TargetCUI, 
-                    M2.STR AS TargetTerm, 
-                    R.SAB AS Source
-                FROM 
-                    MRREL R
-                LEFT JOIN 
-                    MRCONSO M1 ON R.CUI1 = M1.CUI  
-                LEFT JOIN 
-                    MRCONSO M2 ON R.CUI2 = M2.CUI  
-                WHERE 
-                    (R.CUI1 = %s OR R.CUI2 = %s) -- Match the input CUI as Source or Target
-                    AND M1.TTY = 'PT'
-                    AND M1.TS = 'P'
-                    AND M2.TTY = 'PT'
-                    AND M2.TS = 'P'
-                    AND M1.LAT = 'ENG'
-                    AND M2.LAT = 'ENG';
-            """
+            sql, params = _relations_sql(cui)
             # Execute the query with the provided CUI
-            cursor.execute(sql, (cui, cui))
+            _execute(cursor, sql, params)
             result = cursor.fetchall()
             if result:
                 # Return in a clear and structured format
@@ -191,10 +701,13 @@ def get_relations(cui):
                 return None
     except Exception as e:
         logging.error(f"An error occurred while fetching all relationships: {e}")
+        _record_error(e)
         return None
     finally:
-        connection.close()
+        pool.release(connection)
         
+@cached
+@traced_query
 def get_specific_relation(cui, relationship_type):
     """
     Retrieve specific relationships for a given CUI from the UMLS database.
@@ -207,37 +720,13 @@ def get_specific_relation(cui, relationship_type):
         list[dict]: A list of dictionaries containing the specific relationships, 
                     or None if no relationships are found.
     """
-    connection = get_connection()
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             # SQL query to find specific relationships
-            sql = """
-                SELECT DISTINCT 
-                    R.CUI1 AS SourceCUI,  
-                    M1.STR AS SourceTerm,  
-                    R.REL AS Relationship, 
-                    R.RELA AS RelationshipType, 
-                    R.CUI2 AS TargetCUI, 
-                    M2.STR AS TargetTerm, 
-                    R.SAB AS Source
-                FROM 
-                    MRREL R
-                LEFT JOIN 
-                    MRCONSO M1 ON R.CUI1 = M1.CUI  
-                LEFT JOIN 
-                    MRCONSO M2 ON R.CUI2 = M2.CUI  
-                WHERE 
-                    (R.CUI1 = %s OR R.CUI2 = %s) -- Match the input CUI as Source or Target
-                    AND R.RELA = %s
-                    AND M1.TTY = 'PT'
-                    AND M1.TS = 'P'
-                    AND M2.TTY = 'PT'
-                    AND M2.TS = 'P'
-                    AND M1.LAT = 'ENG'
-                    AND M2.LAT = 'ENG';
-            """
+            sql, params = _relations_sql(cui, relationship_type)
             # Execute the query with the provided CUI and relationship type
-            cursor.execute(sql, (cui, cui, relationship_type))
+            _execute(cursor, sql, params)
             result = cursor.fetchall()
             if result:
                 # Return in a clear and structured format
@@ -258,10 +747,181 @@ def get_specific_relation(cui, relationship_type):
                 return None
     except Exception as e:
         logging.error(f"An error occurred while fetching specific relationships: {e}")
+        _record_error(e)
         return None
     finally:
-        connection.close()
+        pool.release(connection)
+
+# Streaming / paginated access to the get_relations result set, for hub
+# concepts whose neighbourhoods are too large to fetchall() and copy.
+#
+# Keyset pagination runs each direction of RELATIONS_SQL on its own, in the
+# order of that direction's covering MRREL index: (CUI1, RELA, SAB, CUI2, REL)
+# for rows leaving the CUI, (CUI2, RELA, SAB, CUI1, REL) for rows reaching it.
+# The cursor predicate and ORDER BY ... LIMIT sit inside the inner MRREL query,
+# so a page is one index range scan of page_size + 1 relations, and names are
+# joined to those rows only. Pages list the outgoing direction first.
+# RELA is NULL on many rows (the UMLS MySQL load scripts use NULLIF), and NULL
+# sorts first in ORDER BY; the cursor conditions follow that order.
+RELATION_PAGE_SQL = _with_names("""
+                SELECT DISTINCT 
+                    K.SourceCUI, 
+                    N1.STR AS SourceTerm, 
+                    K.Relationship, 
+                    K.RelationshipType, 
+                    K.TargetCUI, 
+                    N2.STR AS TargetTerm, 
+                    K.Source
+                FROM (
+                    SELECT DISTINCT 
+                        R.CUI1 AS SourceCUI, 
+                        R.REL AS Relationship, 
+                        R.RELA AS RelationshipType, 
+                        R.CUI2 AS TargetCUI, 
+                        R.SAB AS Source
+                    FROM 
+                        MRREL R
+                    WHERE 
+                        {where}
+                    ORDER BY 
+                        R.RELA, R.SAB, {other}, R.REL
+                    LIMIT %s
+                ) K
+                LEFT JOIN 
+                    {names} N1 ON N1.CUI = K.SourceCUI AND N1.TS = 'P'
+                LEFT JOIN 
+                    {names} N2 ON N2.CUI = K.TargetCUI AND N2.TS = 'P'
+                ORDER BY 
+                    K.RelationshipType, K.Source, K.{other_column}, K.Relationship
+            """)
+
+# Per direction: the CUI filter and the column holding the other concept.
+RELATION_DIRECTIONS = (
+    ("R.CUI1 = %s", "R.CUI2", "TargetCUI"),
+    ("R.CUI2 = %s AND R.CUI1 != %s", "R.CUI1", "SourceCUI"),
+)
+
+def relation_key(row, cui):
+    """
+    Keyset-pagination cursor of a relation row of `cui`, as used by
+    get_relations_page(after=...): (direction, RELA, SAB, other CUI, REL).
+    """
+    if row["SourceCUI"] == cui:
+        return (0, row["RelationshipType"], row["Source"], row["TargetCUI"], row["Relationship"])
+    return (1, row["RelationshipType"], row["Source"], row["SourceCUI"], row["Relationship"])
+
+def _after(columns, values):
+    """
+    `(c1, c2, ...) > (v1, v2, ...)` in index order, NULL sorting first as in
+    ORDER BY, spelled out as ORs that MySQL turns into index ranges.
+
+    Returns:
+        tuple[str, list]: The condition and its parameters.
+    """
+    (column, *rest), (value, *later) = columns, values
+    greater, equal, params = (f"{column} IS NOT NULL", f"{column} IS NULL", []) if value is None else \
+        (f"{column} > %s", f"{column} = %s", [value, value])
+    if not rest:
+        return greater, params[:1]
+    inner, inner_params = _after(rest, later)
+    return f"({greater} OR ({equal} AND {inner}))", params + inner_params
 
+def _relation_page_rows(cursor, cui, relationship_type, direction, after, limit):
+    """ Rows of the first `limit` relations of one direction after the cursor `after` (a relation_key()[1:])."""
+    where, other, other_column = RELATION_DIRECTIONS[direction]
+    params = [cui] * where.count("%s")
+    if relationship_type is not None:
+        where += " AND R.RELA = %s"
+        params.append(relationship_type)
+    if after is not None:
+        condition, after_params = _after(["R.RELA", "R.SAB", other, "R.REL"], list(after))
+        where += " AND " + condition
+        params += after_params
+    sql = RELATION_PAGE_SQL.format(where=where, other=other, other_column=other_column)
+    _execute(cursor, sql, params + [limit])
+    return cursor.fetchall()
+
+def get_relations_page(cui, relationship_type=None, after=None, page_size=100):
+    """
+    Keyset-paginated get_relations / get_specific_relation.
+
+    Args:
+        cui (str): The Concept Unique Identifier (CUI).
+        relationship_type (str): Optional RELA filter, as in get_specific_relation.
+        after (tuple): The `next_after` of the previous page; None for the first page.
+        page_size (int): Maximum number of relations (MRREL rows) per page.
+
+    Returns:
+        tuple[list[dict], tuple | None]: The rows of this page and the cursor for
+            the next one (None when this is the last page). Across all pages the
+            rows are exactly those of get_relations, ordered by relation_key().
+            A relation yields one row per pair of preferred names, as in
+            get_relations, and none when a concept has no English preferred
+            name, so a page can hold more or fewer rows than page_size.
+            Each page reads at most page_size + 1 relations per direction
+            from the MRREL indexes, however large the neighbourhood is.
+    """
+    direction, position = (after[0], tuple(after[1:])) if after is not None else (0, None)
+    rows, seen, last = [], 0, None
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            while direction < len(RELATION_DIRECTIONS):
+                # One relation more than still fits: reaching it means there is a next page.
+                wanted = page_size + 1 - seen
+                for row in _relation_page_rows(cursor, cui, relationship_type, direction, position, wanted):
+                    key = relation_key(row, cui)
+                    if key != last:
+                        if seen == page_size:
+                            return rows, last
+                        seen, last = seen + 1, key
+                    if row["SourceTerm"] is not None and row["TargetTerm"] is not None:
+                        rows.append(row)
+                direction, position = direction + 1, None      # fewer than `wanted`: direction exhausted
+    return rows, None
+
+def iter_relations(cui, relationship_type=None, limit=None, offset=0, batch_size=1000):
+    """
+    Stream the rows of get_relations(cui) (or get_specific_relation(cui, relationship_type)).
+
+    Rows are read through a server-side cursor in batches of `batch_size` and
+    yielded as the cursor's own dicts, without the copy the list getters make.
+    With `limit`/`offset` the rows come in relation_key() order from
+    get_relations_page, batch_size relations at a time, so the server only
+    produces the relations up to offset + limit, never the rest of a hub's
+    neighbourhood. Stopping early (break / close()) discards the connection
+    rather than draining the remaining rows. Database errors propagate
+    instead of ending the stream.
+    """
+    if limit is not None or offset:
+        yield from itertools.islice(_iter_relation_pages(cui, relationship_type, batch_size), offset,
+                                    None if limit is None else offset + limit)
+        return
+    sql, params = _relations_sql(cui, relationship_type)
+    connection = pool.acquire()
+    finished = False
+    try:
+        cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+        _execute(cursor, sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+        cursor.close()
+        finished = True
+    finally:
+        pool.release(connection, discard=not finished)
+
+def _iter_relation_pages(cui, relationship_type, page_size):
+    after = None
+    while True:
+        rows, after = get_relations_page(cui, relationship_type, after, page_size)
+        yield from rows
+        if after is None:
+            return
+
+@cached
+@traced_query
 def get_ro_relations(cui):
     """
     Retrieve 'RO' (Related To) relationships for a given CUI from the UMLS database.
@@ -272,35 +932,12 @@ def get_ro_relations(cui):
     Returns:
         list[dict]: A list of dictionaries containing 'RO' relationships, or None if no relationships are found.
     """
-    connection = get_connection()  # Assumes `get_connection` returns a valid database connection.
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             # SQL query to fetch RO relationships
-            sql = """
-                SELECT DISTINCT 
-                    R.CUI1 AS SourceCUI, 
-                    M1.STR AS SourceTerm,
-                    R.CUI2 AS TargetCUI, 
-                    M2.STR AS TargetTerm,
-                    R.REL AS Relationship, 
-                    R.RELA AS RelationshipType, 
-                    R.SAB AS Source
-                FROM 
-                    MRREL R
-                LEFT JOIN 
-                    MRCONSO M1 ON R.CUI1 = M1.CUI
-                LEFT JOIN 
-                    MRCONSO M2 ON R.CUI2 = M2.CUI
-                WHERE 
-                    R.CUI1 = %s
-                    AND R.REL = 'RO'
-                    AND R.SAB != 'NCI'
-                    AND M1.LAT = 'ENG'
-                    AND M1.TTY = 'PT' 
-                    AND M2.LAT = 'ENG'
-                    AND M2.TTY = 'PT';
-            """
-            cursor.execute(sql, (cui,))
+            sql = RO_RELATIONS_SQL.format(cuis="%s")
+            _execute(cursor, sql, (cui,))
             result = cursor.fetchall()
             if result:
                 return [
@@ -320,11 +957,14 @@ def get_ro_relations(cui):
                 return None
     except Exception as e:
         logging.error(f"An error occurred while fetching RO relationships: {e}")
+        _record_error(e)
         return None
     finally:
-        connection.close()
+        pool.release(connection)
         
             
+@cached
+@traced_query
 def get_parent_from_snomedct(cui):
     """
     Retrieve 'isa' parent relationships for a given CUI from the SNOMEDCT_US database.
@@ -336,38 +976,13 @@ def get_parent_from_snomedct(cui):
         list[dict]: A list of dictionaries containing the parent relationships, 
                     or None if no parents are found.
     """
-    connection = get_connection()  # Assumes `get_connection` is a valid function returning a database connection.
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             # SQL query to find 'isa' parent relationships
-            sql = """
-                SELECT DISTINCT 
-                    R.CUI1 AS ChildID,  
-                    M1.STR AS ChildTerm,  
-                    R.RELA AS RelationshipType, 
-                    R.CUI2 AS ParentID, 
-                    M2.STR AS ParentTerm
-                FROM 
-                    MRREL R
-                JOIN 
-                    MRCONSO M1 ON R.CUI1 = M1.CUI  
-                JOIN 
-                    MRCONSO M2 ON R.CUI2 = M2.CUI  
-                WHERE 
-                    R.CUI1 = %s
-                    AND R.RELA = 'inverse_isa'
-                    AND R.REL = 'PAR'
-                    AND R.SAB = 'SNOMEDCT_US'
-                    AND M1.SAB = 'SNOMEDCT_US'
-                    AND M1.TTY = 'PT'   
-                    AND M2.SAB = 'SNOMEDCT_US'
-                    AND M2.TTY = 'PT' 
-                    AND M2.TS = 'P'   
-                    AND M1.LAT = 'ENG'
-                    AND M2.LAT = 'ENG';
-            """
+            sql = SNOMED_PARENTS_SQL.format(cuis="%s")
             # Execute the query with the provided CUI
-            cursor.execute(sql, (cui,))
+            _execute(cursor, sql, (cui,))
             result = cursor.fetchall()
             if result:
                 # Return in a clear and structured format
@@ -386,10 +1001,13 @@ def get_parent_from_snomedct(cui):
                 return None
     except Exception as e:
         logging.error(f"An error occurred while fetching isa parents: {e}")
+        _record_error(e)
         return None
     finally:
-        connection.close()
+        pool.release(connection)
         
+@cached
+@traced_query
 def get_children_from_snomedct(cui):
     """
     Retrieve 'inverse_isa' child relationships for a given CUI from the SNOMEDCT_US database.
@@ -401,35 +1019,13 @@ def get_children_from_snomedct(cui):
         list[dict]: A list of dictionaries containing child and parent relationships, 
                     or None if no children are found.
     """
-    connection = get_connection()  # Assumes `get_connection` is a valid function returning a database connection.
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             # SQL query to find 'inverse_isa' child relationships
-            sql = """
-                SELECT DISTINCT 
-                    R.CUI1 AS ChildID,  
-                    M1.STR AS ChildTerm,  
-                    R.RELA AS RelationshipType, 
-                    R.CUI2 AS ParentID, 
-                    M2.STR AS ParentTerm
-                FROM 
-                    MRREL R
-                JOIN 
-                    MRCONSO M1 ON R.CUI1 = M1.CUI  
-                JOIN 
-                    MRCONSO M2 ON R.CUI2 = M2.CUI  
-                WHERE 
-                    R.CUI2 = %s  -- Replace the placeholder with the provided CUI
-                    AND R.RELA = 'inverse_isa'
-                    AND R.REL = 'PAR'
-                    AND R.SAB = 'SNOMEDCT_US'      
-                    AND M1.SAB = 'SNOMEDCT_US'   
-                    AND M1.TTY = 'PT'
-                    AND M2.SAB = 'SNOMEDCT_US'    
-                    AND M2.TTY = 'PT';
-            """
+            sql = SNOMED_CHILDREN_SQL.format(cuis="%s")
             # Execute the query with the provided CUI
-            cursor.execute(sql, (cui,))
+            _execute(cursor, sql, (cui,))
             result = cursor.fetchall()
             if result:
                 # Return in a clear and structured format
@@ -447,10 +1043,13 @@ def get_children_from_snomedct(cui):
                 return None
     except Exception as e:
         logging.error(f"An error occurred while fetching inverse_isa children: {e}")
+        _record_error(e)
         return None
     finally:
-        connection.close()
+        pool.release(connection)
         
+@cached
+@traced_query
 def get_treatments(cui):
     """
     Retrieve treatments for a given disease CUI from the UMLS database.
@@ -462,37 +1061,13 @@ def get_treatments(cui):
         list[dict]: A list of dictionaries containing treatments for the disease, 
                     or None if no treatments are found.
     """
-    connection = get_connection()  # Assumes `get_connection` is a valid function returning a database connection.
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             # SQL query to find treatments
-            sql = """
-                SELECT DISTINCT 
-                    R.CUI1 AS DiseaseCUI,  
-                    M1.STR AS DiseaseTerm,  
-                    R.REL AS Relationship, 
-                    R.RELA AS RelationshipType, 
-                    R.CUI2 AS TreatmentCUI, 
-                    M2.STR AS TreatmentTerm
-                FROM 
-                    MRREL R
-                LEFT JOIN 
-                    MRCONSO M1 ON R.CUI1 = M1.CUI  
-                LEFT JOIN 
-                    MRCONSO M2 ON R.CUI2 = M2.CUI  
-                WHERE 
-                    R.CUI1 = %s
-                    AND R.RELA IN ('may_treat') -- Treatment relationships
-                    AND M1.TTY = 'PT'
-                    AND M2.TTY = 'PT'
-                    AND M2.TS = 'P'
-                    AND M1.LAT = 'ENG'
-                    AND M2.LAT = 'ENG'
-                GROUP BY 
-                    R.CUI1, R.CUI2;
-            """
+            sql = TREATMENTS_SQL.format(cuis="%s")
             # Execute the query with the provided CUI
-            cursor.execute(sql, (cui,))
+            _execute(cursor, sql, (cui,))
             result = cursor.fetchall()
             if result:
                 # Return in a clear and structured format
@@ -512,10 +1087,13 @@ def get_treatments(cui):
                 return None
     except Exception as e:
         logging.error(f"An error occurred while fetching treatments: {e}")
+        _record_error(e)
         return None
     finally:
-        connection.close()
+        pool.release(connection)
         
+@cached
+@traced_query
 def has_manifestation(cui):
     """
     Check if a given CUI has a manifestation relationship in the UMLS database.
@@ -526,38 +1104,13 @@ def has_manifestation(cui):
     Returns:
         bool: True if the CUI has a manifestation relationship, False otherwise.
     """
-    connection = get_connection()  # Assumes `get_connection` is a valid function returning a database connection.
+    connection = pool.acquire()
     try:
          with connection.cursor() as cursor:
             # SQL query to find treatments
-            sql = """
-                SELECT DISTINCT 
-                    R.CUI1 AS DiseaseCUI,  
-                    M1.STR AS DiseaseTerm,  
-                    R.REL AS Relationship, 
-                    R.RELA AS RelationshipType, 
-                    R.CUI2 AS TreatmentCUI, 
-                    M2.STR AS TreatmentTerm
-                FROM 
-                    MRREL R
-                LEFT JOIN 
-                    MRCONSO M1 ON R.CUI1 = M1.CUI  
-                LEFT JOIN 
-                    MRCONSO M2 ON R.CUI2 = M2.CUI  
-                WHERE 
-                    R.CUI1 = %s
-                    AND R.RELA IN ('has_manifestation', 'manifestation_of') -- Treatment relationships
-                    AND M1.SAB = 'SNOMEDCT_US'
-                    AND M1.TS = 'P'
-                    AND M1.TTY = 'PT'
-                    AND M2.SAB = 'SNOMEDCT_US'
-                    AND M2.TS = 'P'
-                    AND M2.TTY = 'PT'
-                    AND M1.LAT = 'ENG'
-                    AND M2.LAT = 'ENG';
-            """
+            sql = MANIFESTATIONS_SQL.format(cuis="%s")
             # Execute the query with the provided CUI
-            cursor.execute(sql, (cui,))
+            _execute(cursor, sql, (cui,))
             result = cursor.fetchall()
             if result:
                 # Return in a clear and structured format
@@ -576,10 +1129,13 @@ def has_manifestation(cui):
                 return None
     except Exception as e:
         logging.error(f"An error occurred while checking for manifestation relationships: {e}")
+        _record_error(e)
         return None
     finally:
-        connection.close()
+        pool.release(connection)
         
+@cached
+@traced_query
 def has_associated_finding(cui):
     """
     Retrieve 'has_associated_finding' relationships for a given CUI from the UMLS database.
@@ -591,38 +1147,13 @@ def has_associated_finding(cui):
         list[dict]: A list of dictionaries containing associated findings, 
                     or None if no associated findings are found.
     """
-    connection = get_connection()  # Assumes `get_connection` is a valid function returning a database connection.
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             # SQL query to find associated findings
-            sql = """
-                SELECT DISTINCT 
-                    R.CUI1 AS SourceCUI,  
-                    M1.STR AS SourceTerm,  
-                    R.REL AS Relationship, 
-                    R.RELA AS RelationshipType, 
-                    R.CUI2 AS TargetCUI, 
-                    M2.STR AS TargetTerm
-                FROM 
-                    MRREL R
-                LEFT JOIN 
-                    MRCONSO M1 ON R.CUI1 = M1.CUI  
-                LEFT JOIN 
-                    MRCONSO M2 ON R.CUI2 = M2.CUI  
-                WHERE 
-                    R.CUI1 = %s
-                    AND R.RELA IN ('has_associated_finding', 'associated_finding_of', 'see_from', 'see', 'interprets', 'is_interpreted_by')
-                    AND M1.SAB = 'SNOMEDCT_US'
-                    AND M1.TS = 'P'
-                    AND M1.TTY = 'PT'
-                    AND M2.SAB = 'SNOMEDCT_US'
-                    AND M2.TS = 'P'
-                    AND M2.TTY = 'PT'
-                    AND M1.LAT = 'ENG'
-                    AND M2.LAT = 'ENG';
-            """
+            sql = ASSOCIATED_FINDINGS_SQL.format(cuis="%s")
             # Execute the query with the provided CUI
-            cursor.execute(sql, (cui,))
+            _execute(cursor, sql, (cui,))
             result = cursor.fetchall()
             if result:
                 # Return in a clear and structured format
@@ -642,11 +1173,14 @@ def has_associated_finding(cui):
                 return None
     except Exception as e:
         logging.error(f"An error occurred while fetching associated findings: {e}")
+        _record_error(e)
         return None
     finally:
-        connection.close()
+        pool.release(connection)
         
         
+@cached
+@traced_query
 def get_tradename(cui):
     """
     Retrieve tradenames for a given substance CUI from the UMLS database.
@@ -657,7 +1191,7 @@ def get_tradename(cui):
     Returns:
         list[dict]: A list of dictionaries containing tradenames, or None if no tradenames are found.
     """
-    connection = get_connection()
+    connection = pool.acquire()
     try:
         with connection.cursor() as cursor:
             sql = """
@@ -701,9 +1235,334 @@ def get_tradename(cui):
                 return None
     except Exception as e:
         logging.error(f"An error occurred while fetching tradenames: {e}")
+        _record_error(e)
         return None
     finally:
-        connection.close()
+        pool.release(connection)
+        
+        
+# ---------------------------------------------------------------------------
+# Batched variants: one chunked `IN (...)` query per BATCH_CHUNK_SIZE CUIs
+# instead of one round trip per CUI. Each returns a dict keyed by the input
+# CUIs (or terms) with exactly what the single-CUI getter would return.
+# ---------------------------------------------------------------------------
+
+BATCH_CHUNK_SIZE = 500
+TERM_CHUNK_SIZE = 50  # look_up_cui_many sends one UNION branch per term
+CUIS = object()  # marks where the chunk's IN list goes in _fetch_many params
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _fetch_many(sql, cuis, key_columns, params=None, chunk_size=BATCH_CHUNK_SIZE, shape=None):
+    """
+    Run `sql` over `cuis` in chunks and group the rows by CUI.
+
+    `sql` contains one or more `{cuis}` IN-list placeholders. `params` lists
+    the query parameters in order, with the CUIS marker wherever an IN list
+    goes; it defaults to one CUIS per `{cuis}`. Each row is filed under every
+    requested CUI found in `key_columns`; `shape` optionally rebuilds a row
+    into the structure the single-CUI getter returns.
+    """
+    unique = list(dict.fromkeys(cuis))
+    grouped = {cui: [] for cui in unique}
+    if params is None:
+        params = [CUIS] * sql.count("{cuis}")
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            for chunk in _chunks(unique, chunk_size):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                args = [arg for param in params for arg in (chunk if param is CUIS else [param])]
+                _execute(cursor, sql.format(cuis=placeholders), args)
+                # Only file rows under this chunk's CUIs: a relation between CUIs in
+                # different chunks comes back once per chunk.
+                members = set(chunk)
+                for row in cursor.fetchall():
+                    keys = {row[column] for column in key_columns}
+                    shaped = shape(row) if shape else row
+                    for key in keys:
+                        if key in members:
+                            grouped[key].append(shaped)
+    return grouped
+
+def _drop_key(column):
+    def shape(row):
+        row = dict(row)
+        row.pop(column)
+        return row
+    return shape
+
+def _fetch_relations_many(sql, cuis, key_columns, description, params=None, chunk_size=BATCH_CHUNK_SIZE, shape=None):
+    """ Like _fetch_many, but with the relation getters' error handling: log and map every CUI to None."""
+    try:
+        grouped = _fetch_many(sql, cuis, key_columns, params, chunk_size, shape)
+    except Exception as e:
+        logging.error(f"An error occurred while fetching {description}: {e}")
+        _record_error(e)
+        return {cui: None for cui in cuis}
+    return {cui: rows or None for cui, rows in grouped.items()}
+
+@cached_many("look_up_cui")
+@traced_query
+def look_up_cui_many(terms, chunk_size=TERM_CHUNK_SIZE):
+    """ Batched look_up_cui: {term: [{"CUI": ...}, ...] or None}."""
+    unique = list(dict.fromkeys(terms))
+    found = {}
+    if term_index is not None:
+        # Same fast path as look_up_cui; only the terms the index cannot answer go to SQL.
+        for term in unique:
+            result = term_index.lookup(term)
+            if result is not NotImplemented:
+                found[term] = result
+        unique = [term for term in unique if term not in found]
+        if not unique:
+            return found
+    grouped = {term: [] for term in unique}
+    branch = """
+                SELECT DISTINCT 
+                    %s AS Term, CUI
+                FROM 
+                    MRCONSO
+                WHERE 
+                    (STR = %s OR STR LIKE %s)
+                    AND TTY = 'PT'
+                    AND LAT = 'ENG'
+            """
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            for chunk in _chunks(unique, chunk_size):
+                sql = " UNION ALL ".join([branch] * len(chunk))
+                params = []
+                for term in chunk:
+                    params += [term, term, f"{term}%"]
+                cursor.execute(sql, params)
+                for row in cursor.fetchall():
+                    grouped[row["Term"]].append({"CUI": row["CUI"]})
+    found.update((term, rows or None) for term, rows in grouped.items())
+    return found
+
+@cached_many("get_term")
+@traced_query
+def get_term_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_term: {cui: [{"STR": ...}, ...]}, with [{"STR": "Unknown Term"}] for misses."""
+    sql = """
+                SELECT DISTINCT 
+                    CUI, STR
+                FROM 
+                    MRCONSO
+                WHERE 
+                    CUI IN ({cuis})
+                    AND TTY = 'PT'
+                    AND LAT = 'ENG';
+            """
+    grouped = _fetch_many(sql, cuis, ["CUI"], chunk_size=chunk_size, shape=_drop_key("CUI"))
+    return {cui: rows or [{"STR": "Unknown Term"}] for cui, rows in grouped.items()}
+
+@cached_many("get_synonyms")
+@traced_query
+def get_synonyms_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_synonyms: {cui: [{"STR": ...}, ...] or None}."""
+    sql = "SELECT CUI, STR FROM MRCONSO WHERE CUI IN ({cuis}) AND TS = 'P' AND STT = 'PF'"
+    grouped = _fetch_many(sql, cuis, ["CUI"], chunk_size=chunk_size, shape=_drop_key("CUI"))
+    return {cui: rows or None for cui, rows in grouped.items()}
+
+@cached_many("get_definition")
+@traced_query
+def get_definition_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_definition: {cui: [{"DEF": ...}, ...] or None}."""
+    sql = "SELECT CUI, DEF FROM MRDEF WHERE CUI IN ({cuis})"
+    grouped = _fetch_many(sql, cuis, ["CUI"], chunk_size=chunk_size, shape=_drop_key("CUI"))
+    return {cui: rows or None for cui, rows in grouped.items()}
+
+@cached_many("get_semantic_type")
+@traced_query
+def get_semantic_type_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_semantic_type: {cui: [{"TUI": ..., "STY": ...}, ...] or None}."""
+    sql = """
+                SELECT DISTINCT 
+                    CUI, TUI, STY
+                FROM 
+                    MRSTY
+                WHERE 
+                    CUI IN ({cuis});
+            """
+    grouped = _fetch_many(sql, cuis, ["CUI"], chunk_size=chunk_size, shape=_drop_key("CUI"))
+    return {cui: rows or None for cui, rows in grouped.items()}
+
+@cached_many("get_relations")
+@traced_query
+def get_relations_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    Batched get_relations.
+
+    A relationship between two requested CUIs is listed under both of them.
+
+    Returns:
+        dict[str, list[dict] | None]: get_relations(cui) for every input CUI.
+    """
+    sql = RELATIONS_SQL.format(cuis="{cuis}", rela_filter="")
+    return _fetch_relations_many(sql, cuis, ["SourceCUI", "TargetCUI"], "all relationships",
+                                 chunk_size=chunk_size)
+
+@cached_many("get_specific_relation")
+@traced_query
+def get_specific_relation_many(cuis, relationship_type, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_specific_relation: {cui: [relationship dicts] or None}."""
+    sql = RELATIONS_SQL.format(cuis="{cuis}", rela_filter="AND R.RELA = %s")
+    return _fetch_relations_many(sql, cuis, ["SourceCUI", "TargetCUI"], "specific relationships",
+                                 params=[CUIS, relationship_type, CUIS, CUIS, relationship_type],
+                                 chunk_size=chunk_size)
+
+@cached_many("get_ro_relations")
+@traced_query
+def get_ro_relations_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_ro_relations: {cui: [RO relationship dicts] or None}."""
+    return _fetch_relations_many(RO_RELATIONS_SQL, cuis, ["SourceCUI"], "RO relationships", chunk_size=chunk_size)
+
+@cached_many("get_parent_from_snomedct")
+@traced_query
+def get_parent_from_snomedct_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_parent_from_snomedct: {cui: [parent dicts] or None}."""
+    shape = lambda row: {
+        "ChildID": row["ChildID"],
+        "ChildTerm": row["ChildTerm"],
+        "RelationshipType": 'isa',
+        "ParentID": row["ParentID"],
+        "ParentTerm": row["ParentTerm"]
+    }
+    return _fetch_relations_many(SNOMED_PARENTS_SQL, cuis, ["ChildID"], "isa parents", chunk_size=chunk_size, shape=shape)
+
+@cached_many("get_children_from_snomedct")
+@traced_query
+def get_children_from_snomedct_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_children_from_snomedct: {cui: [child dicts] or None}."""
+    shape = lambda row: {
+        "ParentID": row["ParentID"],
+        "ParentTerm": row["ParentTerm"],
+        "RelationshipType": 'isa',
+        "ChildID": row["ChildID"],
+        "ChildTerm": row["ChildTerm"],
+    }
+    return _fetch_relations_many(SNOMED_CHILDREN_SQL, cuis, ["ParentID"], "inverse_isa children", chunk_size=chunk_size, shape=shape)
+
+@cached_many("get_treatments")
+@traced_query
+def get_treatments_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_treatments: {disease cui: [treatment dicts] or None}."""
+    return _fetch_relations_many(TREATMENTS_SQL, cuis, ["DiseaseCUI"], "treatments", chunk_size=chunk_size)
+
+@cached_many("has_manifestation")
+@traced_query
+def has_manifestation_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched has_manifestation: {cui: [manifestation dicts] or None}."""
+    return _fetch_relations_many(MANIFESTATIONS_SQL, cuis, ["DiseaseCUI"], "manifestation relationships", chunk_size=chunk_size)
+
+@cached_many("has_associated_finding")
+@traced_query
+def has_associated_finding_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched has_associated_finding: {cui: [associated finding dicts] or None}."""
+    return _fetch_relations_many(ASSOCIATED_FINDINGS_SQL, cuis, ["SourceCUI"], "associated findings", chunk_size=chunk_size)
+
+@cached_many("get_tradename")
+@traced_query
+def get_tradename_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_tradename: {substance cui: [tradename dicts] or None}."""
+    sql = """
+                SELECT DISTINCT 
+                    R.CUI1 AS SubstanceCUI, 
+                    M1.STR AS SubstanceTerm, 
+                    R.REL AS Relationship, 
+                    R.RELA AS SpecificRelationship, 
+                    R.CUI2 AS TradenameCUI, 
+                    M2.STR AS Tradename
+                FROM 
+                    MRREL R
+                LEFT JOIN 
+                    MRCONSO M1 ON R.CUI1 = M1.CUI
+                LEFT JOIN 
+                    MRCONSO M2 ON R.CUI2 = M2.CUI
+                WHERE 
+                    R.CUI1 IN ({cuis})
+                    AND R.RELA = 'tradename_of'
+                    AND M1.LAT = 'ENG'
+                    AND M2.LAT = 'ENG'
+                GROUP BY 
+                    R.CUI1, R.CUI2;
+            """
+    return _fetch_relations_many(sql, cuis, ["SubstanceCUI"], "tradenames", chunk_size=chunk_size)
+
+
+# ---------------------------------------------------------------------------
+# Concept cards: term, synonyms, definitions and semantic types in one round
+# trip (a UNION ALL over the four source queries) instead of four.
+# ---------------------------------------------------------------------------
+
+CONCEPT_CARD_SQL = """
+                SELECT DISTINCT 
+                    'term' AS Kind, CUI, STR AS Value, NULL AS Extra
+                FROM 
+                    MRCONSO
+                WHERE 
+                    CUI IN ({cuis})
+                    AND TTY = 'PT'
+                    AND LAT = 'ENG'
+                UNION ALL
+                SELECT 
+                    'synonym' AS Kind, CUI, STR AS Value, NULL AS Extra
+                FROM 
+                    MRCONSO
+                WHERE 
+                    CUI IN ({cuis})
+                    AND TS = 'P'
+                    AND STT = 'PF'
+                UNION ALL
+                SELECT 
+                    'definition' AS Kind, CUI, DEF AS Value, NULL AS Extra
+                FROM 
+                    MRDEF
+                WHERE 
+                    CUI IN ({cuis})
+                UNION ALL
+                SELECT DISTINCT 
+                    'semantic_type' AS Kind, CUI, TUI AS Value, STY AS Extra
+                FROM 
+                    MRSTY
+                WHERE 
+                    CUI IN ({cuis});
+            """
+
+def get_concept_card(cui):
+    """
+    Retrieve everything needed to describe a concept in a single query.
+
+    Args:
+        cui (str): The Concept Unique Identifier (CUI).
+
+    Returns:
+        dict: {"cui", "term", "synonyms", "definition", "semantic_type"}, where each
+              field equals what the getter of the same name returns for `cui`.
+    """
+    return get_concept_card_many([cui])[cui]
+
+@cached_many("get_concept_card")
+@traced_query
+def get_concept_card_many(cuis, chunk_size=BATCH_CHUNK_SIZE):
+    """ Batched get_concept_card: {cui: concept card}; four CUI lists per chunk, one round trip."""
+    grouped = _fetch_many(CONCEPT_CARD_SQL, cuis, ["CUI"], chunk_size=chunk_size)
+    cards = {}
+    for cui, rows in grouped.items():
+        fields = {"term": [], "synonym": [], "definition": [], "semantic_type": []}
+        for row in rows:
+            fields[row["Kind"]].append(row)
+        cards[cui] = {
+            "cui": cui,
+            "term": [{"STR": row["Value"]} for row in fields["term"]] or [{"STR": "Unknown Term"}],
+            "synonyms": [{"STR": row["Value"]} for row in fields["synonym"]] or None,
+            "definition": [{"DEF": row["Value"]} for row in fields["definition"]] or None,
+            "semantic_type": [{"TUI": row["Value"], "STY": row["Extra"]} for row in fields["semantic_type"]] or None,
+        }
+    return cards
         
         
 # test
@@ -0,0 +1,104 @@
+"""
+Asyncio front-end for the UMLS getters in kg.py.
+
+Every getter (look_up_cui ... get_tradename, get_concept_card, plus the *_many
+batch variants) has an awaitable twin with the same signature and return
+value. Calls run on a dedicated thread pool over kg's connection pool, and a
+concurrency limiter keeps at most `concurrency` queries in flight, so
+independent lookups overlap instead of queueing behind each other:
+
+    import kg_async
+    terms, rels = await asyncio.gather(
+        kg_async.map_calls(kg_async.look_up_cui, ["Aspirin", "Headache"]),
+        kg_async.get_relations("C0000737"),
+    )
+"""
+import os
+import asyncio
+import weakref
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import kg
+
+_concurrency = int(os.getenv("UMLS_ASYNC_CONCURRENCY", str(kg.pool.size)))
+_executor = ThreadPoolExecutor(max_workers=_concurrency, thread_name_prefix="umls")
+_semaphores = weakref.WeakKeyDictionary()  # one limiter per event loop
+
+
+def set_concurrency(limit):
+    """ Change the number of UMLS queries allowed in flight (also resizes kg's pool if it is smaller)."""
+    global _concurrency, _executor
+    old = _executor
+    _concurrency = limit
+    _executor = ThreadPoolExecutor(max_workers=limit, thread_name_prefix="umls")
+    _semaphores.clear()
+    old.shutdown(wait=False)
+    if kg.pool.size < limit:
+        kg.configure_pool(size=limit)
+
+
+def _limiter():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(_concurrency)
+    return semaphore
+
+
+def _offload(name):
+    # Resolve the getter at call time so anything rebinding kg's functions is picked up.
+    @functools.wraps(getattr(kg, name))
+    async def wrapper(*args, **kwargs):
+        async with _limiter():
+            loop = asyncio.get_running_loop()
+            fn = functools.partial(getattr(kg, name), *args, **kwargs)
+            return await loop.run_in_executor(_executor, fn)
+    return wrapper
+
+
+async def map_calls(fn, args_list, return_exceptions=False):
+    """
+    Await `fn` over many inputs concurrently; results come back in input order.
+
+    Args:
+        fn: One of this module's coroutines, e.g. kg_async.get_term.
+        args_list: Iterable of single arguments or argument tuples.
+        return_exceptions (bool): Passed to asyncio.gather.
+    """
+    calls = [fn(*args) if isinstance(args, tuple) else fn(args) for args in args_list]
+    return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+
+
+look_up_cui = _offload("look_up_cui")
+get_term = _offload("get_term")
+get_synonyms = _offload("get_synonyms")
+get_definition = _offload("get_definition")
+get_semantic_type = _offload("get_semantic_type")
+get_relations = _offload("get_relations")
+get_specific_relation = _offload("get_specific_relation")
+get_ro_relations = _offload("get_ro_relations")
+get_parent_from_snomedct = _offload("get_parent_from_snomedct")
+get_children_from_snomedct = _offload("get_children_from_snomedct")
+get_treatments = _offload("get_treatments")
+has_manifestation = _offload("has_manifestation")
+has_associated_finding = _offload("has_associated_finding")
+get_tradename = _offload("get_tradename")
+get_concept_card = _offload("get_concept_card")
+get_relations_page = _offload("get_relations_page")
+
+look_up_cui_many = _offload("look_up_cui_many")
+get_term_many = _offload("get_term_many")
+get_synonyms_many = _offload("get_synonyms_many")
+get_definition_many = _offload("get_definition_many")
+get_semantic_type_many = _offload("get_semantic_type_many")
+get_relations_many = _offload("get_relations_many")
+get_specific_relation_many = _offload("get_specific_relation_many")
+get_ro_relations_many = _offload("get_ro_relations_many")
+get_parent_from_snomedct_many = _offload("get_parent_from_snomedct_many")
+get_children_from_snomedct_many = _offload("get_children_from_snomedct_many")
+get_treatments_many = _offload("get_treatments_many")
+has_manifestation_many = _offload("has_manifestation_many")
+has_associated_finding_many = _offload("has_associated_finding_many")
+get_tradename_many = _offload("get_tradename_many")
+get_concept_card_many = _offload("get_concept_card_many")
@@ -0,0 +1,39 @@
+-- Indexes and derived table for the relation queries in kg.py (MySQL).
+--
+-- The relation getters used to join MRREL to MRCONSO twice on CUI alone and
+-- filter LAT/TTY/TS/SAB afterwards, so every concept pair fanned out over all
+-- atoms of both concepts before DISTINCT collapsed them again. The queries now
+-- join MRCONSO_ENG_PT, a pre-filtered copy of the English preferred-term
+-- atoms, and look up MRREL through covering indexes per direction.
+--
+-- Run once per UMLS release, after loading the RRF files:
+--     mysql umls < migrations/001_relation_query_indexes.sql
+-- The getters keep working before it has run: on the first relation query,
+-- kg._execute checks for MRCONSO_ENG_PT and, if the table is missing, logs a
+-- warning and falls back to an inline subquery over MRCONSO (slower, same
+-- rows). The check runs once per pool, so a running process picks up the new
+-- table after a restart or kg.configure_pool(). UMLS_NAME_TABLE=inline forces
+-- the fallback.
+
+-- MRREL: one covering index per direction. Each UNION ALL branch of the
+-- relation queries is a range scan on (CUI, RELA, SAB) that also reads the
+-- other CUI and REL from the index.
+CREATE INDEX X_MRREL_CUI1_RELA ON MRREL (CUI1, RELA, SAB, CUI2, REL);
+CREATE INDEX X_MRREL_CUI2_RELA ON MRREL (CUI2, RELA, SAB, CUI1, REL);
+
+-- English preferred terms only. Rows are copied as-is (no DISTINCT) so the
+-- joins produce exactly the rows the MRCONSO joins did.
+DROP TABLE IF EXISTS MRCONSO_ENG_PT;
+CREATE TABLE MRCONSO_ENG_PT (
+    CUI char(8) NOT NULL,
+    STR text NOT NULL,
+    SAB varchar(40) NOT NULL,
+    TS char(1) NOT NULL
+) CHARACTER SET utf8mb4;
+
+INSERT INTO MRCONSO_ENG_PT (CUI, STR, SAB, TS)
+    SELECT CUI, STR, SAB, TS FROM MRCONSO WHERE LAT = 'ENG' AND TTY = 'PT';
+
+CREATE INDEX X_MRCONSO_ENG_PT_CUI ON MRCONSO_ENG_PT (CUI, TS, SAB);
+
+ANALYZE TABLE MRREL, MRCONSO_ENG_PT;
@@ -0,0 +1,95 @@
+"""
+Incremental reader for merged_paths.json-style files:
+
+    {"<template_id>": [{"cuis": [...], "relas": [...], "path_strs": [...]}, ...], ...}
+
+iter_paths() yields (template_id, path) pairs while reading the file in
+fixed-size chunks, so memory holds one chunk plus the path being decoded,
+however large the file grows. Each path object is decoded with the stdlib
+JSON decoder, so values come out exactly as json.load would give them:
+
+    for template_id, path in iter_paths("merged_paths.json"):
+        ...
+"""
+import json
+from typing import Iterator, Tuple
+
+WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self, size=None):
+        """ Append the next chunk, dropping what was already consumed; False at EOF."""
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """ Next non-whitespace character ('' at EOF), without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        ch = self.peek()
+        if ch == "" or ch not in chars:
+            raise ValueError(f"Expected one of {chars!r}, got {ch or 'end of file'!r}")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """ Decode one complete JSON value, reading more input while it is cut off."""
+        if self.peek() == "":
+            raise ValueError("Unexpected end of file")
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number at the very end of the buffer may continue in the next chunk.
+                if end < len(self.buf) or self.buf[self.pos] not in "-0123456789":
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                pass
+            if not self._fill(size):
+                value, self.pos = _decoder.raw_decode(self.buf, self.pos)   # raises on bad input
+                return value
+            size *= 2            # values larger than a chunk: grow reads geometrically
+
+
+def iter_paths(file_path, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, dict]]:
+    """ Yield (template_id, path) for every path in file order."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        reader = _Reader(f, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            template_id = reader.value()
+            if not isinstance(template_id, str):
+                raise ValueError(f"Expected a template id, got {template_id!r}")
+            reader.expect(":")
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield template_id, reader.value()
+                    if reader.expect(",]") == "]":
+                        break
+            if reader.expect(",}") == "}":
+                return
@@ -0,0 +1,217 @@
+"""
+Shared request/token rate limiting for concurrent LLM calls.
+
+Azure OpenAI deployments have a requests-per-minute and a tokens-per-minute
+quota. Instead of sleeping a fixed interval after every call, N workers share
+one RateLimiter: each call reserves one request and its estimated tokens
+from two token buckets, and sleeps only as long as the buckets are in debt.
+A 429 pauses every worker until its Retry-After has passed and backs the
+effective rate off (once per pause: the 429s of calls already in flight
+only extend it); successes slowly restore it. 5xx responses and connection
+errors are retried with backoff by the failing worker alone.
+
+    limiter = RateLimiter(rpm=300, tpm=150_000)
+    resp = limiter.call(lambda: client.chat.completions.create(...),
+                        tokens=estimate_tokens(prompt) + 400,
+                        usage=lambda r: r.usage.total_tokens)
+
+    for result in map_ordered(work, items, workers=8):   # input order, bounded in flight
+        ...
+"""
+import time
+import random
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:           # tiktoken missing or its encoding files unavailable offline
+    _encoding = None
+
+_CONNECTION_ERRORS = (ConnectionError, TimeoutError)
+try:
+    import openai
+    _CONNECTION_ERRORS += (openai.APIConnectionError,)     # includes APITimeoutError
+except ImportError:
+    pass
+try:
+    import requests
+    _CONNECTION_ERRORS += (requests.ConnectionError, requests.Timeout)
+except ImportError:
+    pass
+
+
+def estimate_tokens(text):
+    """ Prompt tokens of `text` (tiktoken when available, else ~4 characters per token)."""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Refills at `rate_per_min`, holds at most `burst_seconds` worth. reserve()
+    takes the amount immediately (the level may go negative) and returns how
+    long the caller must wait, so concurrent callers queue fairly without polling.
+    """
+
+    def __init__(self, rate_per_min, burst_seconds=10):
+        self.rate = rate_per_min / 60.0
+        self.capacity = self.rate * burst_seconds
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now, scale):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate * scale)
+        self.updated = now
+
+    def reserve(self, amount, now, scale=1.0):
+        self._refill(now, scale)
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / (self.rate * scale)
+
+    def refund(self, amount, now, scale=1.0):
+        self._refill(now, scale)
+        self.level = min(self.capacity, self.level + amount)
+
+
+def _status(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_rate_limited(error):
+    """ True for HTTP 429 errors (openai.RateLimitError, requests.HTTPError, ...)."""
+    return _status(error) == 429
+
+
+def is_transient(error):
+    """ True for 5xx responses and connection errors / timeouts, which are worth retrying."""
+    status = _status(error)
+    return isinstance(error, _CONNECTION_ERRORS) or (isinstance(status, int) and status >= 500)
+
+
+def retry_after(error):
+    """ Seconds to wait from a 429's retry-after-ms / retry-after header, or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class RateLimiter:
+    def __init__(self, rpm, tpm, burst_seconds=10, min_scale=0.1):
+        self.requests = TokenBucket(rpm, burst_seconds)
+        self.tokens = TokenBucket(tpm, burst_seconds)
+        self.scale = 1.0                 # effective fraction of the quota, lowered by 429s
+        self.min_scale = min_scale
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "rate_limited": 0, "retried": 0, "waited_s": 0.0, "tokens": 0}
+
+    def acquire(self, tokens):
+        """ Block until one request and `tokens` tokens fit in the quota."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self.requests.reserve(1, now, self.scale),
+                       self.tokens.reserve(tokens, now, self.scale),
+                       self.paused_until - now)
+            self.stats["waited_s"] += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def settle(self, estimated, actual):
+        """ Correct the token bucket once the real usage of a call is known."""
+        with self._lock:
+            self.tokens.refund(estimated - actual, time.monotonic(), self.scale)
+            self.stats["tokens"] += actual
+
+    def on_success(self):
+        with self._lock:
+            self.stats["calls"] += 1
+            self.scale = min(1.0, self.scale * 1.02)
+
+    def on_rate_limited(self, wait):
+        """
+        Pause all workers for `wait` seconds and lower the effective rate.
+        429s arriving while a pause is active (calls that were already in
+        flight) extend the pause but do not lower the rate again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.stats["rate_limited"] += 1
+            if now >= self.paused_until:
+                self.scale = max(self.min_scale, self.scale * 0.7)
+            self.paused_until = max(self.paused_until, now + wait)
+
+    def call(self, fn, tokens, usage=None, max_attempts=6):
+        """
+        fn() under the limiter, retrying 429s after Retry-After (or exponential
+        backoff with jitter) and 5xx / connection errors after backoff in this
+        worker only. Other exceptions propagate.
+
+        Args:
+            tokens: Estimated tokens of the call (prompt + expected completion).
+            usage: Optional result -> actual total tokens, used to settle the estimate.
+        """
+        for attempt in range(1, max_attempts + 1):
+            self.acquire(tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                if attempt == max_attempts:
+                    raise
+                backoff = min(60.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+                if is_rate_limited(e):
+                    wait = retry_after(e)
+                    self.on_rate_limited(wait if wait is not None else backoff)
+                elif is_transient(e):
+                    with self._lock:
+                        self.stats["retried"] += 1
+                    time.sleep(backoff)
+                else:
+                    raise
+                continue
+            self.on_success()
+            if usage is not None:
+                try:
+                    self.settle(tokens, usage(result))
+                except (AttributeError, TypeError):
+                    pass
+            return result
+
+
+def map_ordered(fn, items, workers=8, window=None):
+    """
+    Yield fn(item) for every item in input order while up to `workers` calls
+    run concurrently. At most `window` (default 4 * workers) results are held
+    at once, so memory stays bounded on long inputs.
+    """
+    window = window or 4 * workers
+    items = iter(items)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for item in items:
+                pending.append(pool.submit(fn, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
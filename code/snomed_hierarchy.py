@@ -0,0 +1,315 @@
+"""
+Compact in-memory SNOMED CT (SNOMEDCT_US) is-a hierarchy.
+
+get_parent_from_snomedct / get_children_from_snomedct in kg.py run one
+three-way MRREL x MRCONSO x MRCONSO join per hop. This module loads the whole
+inverse_isa graph once (one query for edges, one for names) and answers
+parents, children, transitive ancestors/descendants, depth, lowest common
+ancestors and is-a tests in memory.
+
+CUIs are interned to integer ids in sorted order, and both edge directions are
+stored as CSR adjacency arrays (offsets + targets). Snapshots written with
+save() are memory-mapped by load(), so startup costs a file open rather than a
+database round trip:
+
+    python snomed_hierarchy.py --out snomed_isa.bin      # once
+    h = SnomedHierarchy.load("snomed_isa.bin")
+    h.is_a("C0018681", "C0030193")                        # Headache is-a Pain?
+"""
+import mmap
+import array
+import bisect
+import logging
+import argparse
+from collections import deque
+
+MAGIC = b"SNOMEDISA1\0\0\0\0\0\0"  # 16 bytes, keeps the arrays 8-byte aligned
+CUI_WIDTH = 8                      # "C" + 7 digits
+NO_DEPTH = 0xFFFFFFFF
+
+EDGES_SQL = """
+    SELECT DISTINCT
+        R.CUI1 AS ChildID,
+        R.CUI2 AS ParentID
+    FROM
+        MRREL R
+    WHERE
+        R.RELA = 'inverse_isa'
+        AND R.REL = 'PAR'
+        AND R.SAB = 'SNOMEDCT_US';
+"""
+
+# Same name filter as the kg.py getters; TS = 'P' atoms win when a CUI has several.
+NAMES_SQL = """
+    SELECT
+        CUI, STR, TS
+    FROM
+        MRCONSO
+    WHERE
+        SAB = 'SNOMEDCT_US'
+        AND TTY = 'PT'
+        AND LAT = 'ENG';
+"""
+
+
+class _FixedWidth:
+    """ Sequence view over the fixed-width CUI table, so bisect can search it without decoding."""
+
+    def __init__(self, buffer, width):
+        self._buffer = buffer
+        self._width = width
+
+    def __len__(self):
+        return len(self._buffer) // self._width
+
+    def __getitem__(self, i):
+        return bytes(self._buffer[i * self._width:(i + 1) * self._width])
+
+
+def _csr(n, pairs):
+    """ Build (offsets, targets) arrays from (source_id, target_id) pairs."""
+    counts = [0] * (n + 1)
+    for source, _ in pairs:
+        counts[source + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    offsets = array.array("I", counts)
+    targets = array.array("I", bytes(4 * len(pairs)))
+    cursor = list(counts[:n])
+    for source, target in pairs:
+        targets[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, targets
+
+
+class SnomedHierarchy:
+    def __init__(self, cui_table, parent_offsets, parents, child_offsets, children, depths,
+                 name_offsets, name_blob, _mmap=None):
+        self._cui_table = cui_table
+        self._cuis = _FixedWidth(cui_table, CUI_WIDTH)
+        self._parent_offsets = parent_offsets
+        self._parents = parents
+        self._child_offsets = child_offsets
+        self._children = children
+        self._depths = depths
+        self._name_offsets = name_offsets
+        self._name_blob = name_blob
+        self._mmap = _mmap
+
+    def __len__(self):
+        return len(self._cuis)
+
+    def __contains__(self, cui):
+        return self._id(cui) is not None
+
+    # -- construction ------------------------------------------------------
+
+    @classmethod
+    def from_edges(cls, edges, names):
+        """
+        Build from (child_cui, parent_cui) pairs and a {cui: name} dict.
+
+        Edges whose endpoints have no English SNOMED CT preferred term are
+        dropped, matching the joins in get_parent_from_snomedct.
+        """
+        edges = {(child, parent) for child, parent in edges if child in names and parent in names}
+        cuis = sorted({cui for edge in edges for cui in edge})
+        ids = {cui: i for i, cui in enumerate(cuis)}
+        n = len(cuis)
+        up = sorted((ids[child], ids[parent]) for child, parent in edges)
+        down = sorted((ids[parent], ids[child]) for child, parent in edges)
+        parent_offsets, parents = _csr(n, up)
+        child_offsets, children = _csr(n, down)
+        depths = cls._compute_depths(n, parent_offsets, child_offsets, children)
+        encoded = [names[cui].encode("utf-8") for cui in cuis]
+        name_offsets = array.array("Q", [0])
+        for name in encoded:
+            name_offsets.append(name_offsets[-1] + len(name))
+        cui_table = "".join(cuis).encode("ascii")
+        if len(cui_table) != n * CUI_WIDTH:
+            raise ValueError("Every CUI must be 'C' followed by 7 digits.")
+        return cls(cui_table, parent_offsets, parents, child_offsets, children, depths,
+                   name_offsets, b"".join(encoded))
+
+    @classmethod
+    def from_database(cls):
+        """ Load the graph through kg's connection pool (works with either UMLS backend)."""
+        import kg
+
+        with kg.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(NAMES_SQL)
+                names = {}
+                for row in cursor.fetchall():
+                    if row["CUI"] not in names or row["TS"] == "P":
+                        names[row["CUI"]] = row["STR"]
+                cursor.execute(EDGES_SQL)
+                edges = [(row["ChildID"], row["ParentID"]) for row in cursor.fetchall()]
+        hierarchy = cls.from_edges(edges, names)
+        logging.info(f"Loaded SNOMED CT is-a hierarchy: {len(hierarchy)} concepts, {len(hierarchy._parents)} edges")
+        return hierarchy
+
+    @staticmethod
+    def _compute_depths(n, parent_offsets, child_offsets, children):
+        """ Shortest is-a distance to a root (a concept without parents)."""
+        depths = array.array("I", [NO_DEPTH]) * n
+        queue = deque(i for i in range(n) if parent_offsets[i] == parent_offsets[i + 1])
+        for i in queue:
+            depths[i] = 0
+        while queue:
+            node = queue.popleft()
+            for k in range(child_offsets[node], child_offsets[node + 1]):
+                child = children[k]
+                if depths[child] == NO_DEPTH:
+                    depths[child] = depths[node] + 1
+                    queue.append(child)
+        return depths
+
+    # -- serialization -----------------------------------------------------
+
+    def _sections(self):
+        return [self._parent_offsets, self._parents, self._child_offsets, self._children,
+                self._depths, self._name_offsets]
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            header = array.array("Q", [len(self), len(self._parents), len(self._name_blob)])
+            header.tofile(f)
+            for section in self._sections():
+                f.write(section.tobytes())
+                f.write(bytes(-f.tell() % 8))
+            f.write(self._cui_table)
+            f.write(bytes(-f.tell() % 8))
+            f.write(self._name_blob)
+
+    @classmethod
+    def load(cls, path):
+        """ Memory-map a snapshot written by save(); arrays are zero-copy views into the file."""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a SNOMED CT hierarchy snapshot")
+        position = len(MAGIC)
+        n, m, name_bytes = view[position:position + 24].cast("Q")
+        position += 24
+
+        def take(length, fmt, itemsize):
+            nonlocal position
+            section = view[position:position + length * itemsize].cast(fmt)
+            position += length * itemsize
+            position += -position % 8
+            return section
+
+        parent_offsets = take(n + 1, "I", 4)
+        parents = take(m, "I", 4)
+        child_offsets = take(n + 1, "I", 4)
+        children = take(m, "I", 4)
+        depths = take(n, "I", 4)
+        name_offsets = take(n + 1, "Q", 8)
+        cui_table = take(n * CUI_WIDTH, "B", 1)
+        name_blob = view[position:position + name_bytes]
+        return cls(cui_table, parent_offsets, parents, child_offsets, children, depths,
+                   name_offsets, name_blob, _mmap=mm)
+
+    # -- lookups -----------------------------------------------------------
+
+    def _id(self, cui):
+        key = cui.encode("ascii")
+        i = bisect.bisect_left(self._cuis, key)
+        if i < len(self._cuis) and self._cuis[i] == key:
+            return i
+        return None
+
+    def _cui(self, i):
+        return self._cuis[i].decode("ascii")
+
+    def _neighbours(self, offsets, targets, i):
+        return targets[offsets[i]:offsets[i + 1]]
+
+    def _walk(self, offsets, targets, start):
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for nxt in self._neighbours(offsets, targets, node):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        seen.discard(start)
+        return seen
+
+    def name(self, cui):
+        i = self._id(cui)
+        if i is None:
+            return None
+        return bytes(self._name_blob[self._name_offsets[i]:self._name_offsets[i + 1]]).decode("utf-8")
+
+    def parents(self, cui):
+        i = self._id(cui)
+        return [] if i is None else [self._cui(j) for j in self._neighbours(self._parent_offsets, self._parents, i)]
+
+    def children(self, cui):
+        i = self._id(cui)
+        return [] if i is None else [self._cui(j) for j in self._neighbours(self._child_offsets, self._children, i)]
+
+    def ancestors(self, cui):
+        """ All transitive is-a ancestors of `cui` (excluding itself)."""
+        i = self._id(cui)
+        return set() if i is None else {self._cui(j) for j in self._walk(self._parent_offsets, self._parents, i)}
+
+    def descendants(self, cui):
+        """ All transitive is-a descendants of `cui` (excluding itself)."""
+        i = self._id(cui)
+        return set() if i is None else {self._cui(j) for j in self._walk(self._child_offsets, self._children, i)}
+
+    def depth(self, cui):
+        """ Number of is-a hops on the shortest path from `cui` up to a root; None if unknown."""
+        i = self._id(cui)
+        if i is None or self._depths[i] == NO_DEPTH:
+            return None
+        return self._depths[i]
+
+    def is_a(self, cui, ancestor):
+        """ Subsumption test: True if `cui` equals `ancestor` or is a transitive descendant of it."""
+        if cui == ancestor:
+            return cui in self
+        i, target = self._id(cui), self._id(ancestor)
+        if i is None or target is None:
+            return False
+        seen = {i}
+        queue = deque([i])
+        while queue:
+            node = queue.popleft()
+            for parent in self._neighbours(self._parent_offsets, self._parents, node):
+                if parent == target:
+                    return True
+                if parent not in seen:
+                    seen.add(parent)
+                    queue.append(parent)
+        return False
+
+    def lowest_common_ancestors(self, a, b):
+        """
+        Deepest concepts that subsume both `a` and `b` (each counts as its own
+        ancestor). Several can tie in a DAG, so a list is returned.
+        """
+        i, j = self._id(a), self._id(b)
+        if i is None or j is None:
+            return []
+        common = (self._walk(self._parent_offsets, self._parents, i) | {i}) & \
+                 (self._walk(self._parent_offsets, self._parents, j) | {j})
+        if not common:
+            return []
+        deepest = max(self._depths[k] for k in common)
+        return sorted(self._cui(k) for k in common if self._depths[k] == deepest)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Snapshot the SNOMED CT is-a hierarchy from the configured UMLS backend.")
+    parser.add_argument("--out", default="snomed_isa.bin")
+    args = parser.parse_args()
+    SnomedHierarchy.from_database().save(args.out)
+    print(f"Wrote {args.out}")
@@ -1,12 +1,14 @@
 import os
 import json
-import time
-import random
 import tqdm
 from pathlib import Path
 from openai import AzureOpenAI
 from collections import defaultdict
 import re
+import itertools
+from rate_limit import RateLimiter, estimate_tokens, map_ordered
+from checkpoint import Checkpoint, occurrence_ids
+from path_stream import iter_paths
 
 # Azure OpenAI设置
 os.environ["AZURE_OPENAI_API_KEY"] = "5a1437f6ff2648b9b969507fb5a73276"
@@ -16,66 +18,52 @@ os.environ["AZURE_OPENAI_ENDPOINT"] = "https://ai-mistraleastus2753718354821.ope
 client = AzureOpenAI(
     api_key=os.getenv("AZURE_OPENAI_API_KEY"),
     api_version="2024-12-01-preview",
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+    max_retries=0,          # 429s, 5xx and connection errors are retried by the shared RateLimiter
 )
 
 # Configuration parameters
 MODEL = "gpt-4.1-noah"  # Using advanced model to ensure high-quality questions
 TEMPERATURE = 0.7       # Increased temperature for diversity
-RATE_LIMIT_S = 1.2      # Request interval to avoid API rate limits
-# Load merged_paths.json file
-def load_paths_data(file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
-        paths_data = json.load(f)
-    return paths_data
-
+WORKERS = int(os.getenv("QA_WORKERS", "8"))                  # Concurrent generation requests
+REQUESTS_PER_MIN = int(os.getenv("AZURE_RPM", "300"))         # Deployment quota, shared by all workers
+TOKENS_PER_MIN = int(os.getenv("AZURE_TPM", "150000"))
+EXPECTED_COMPLETION_TOKENS = 400                              # Reserved per call until the real usage is known
+limiter = RateLimiter(rpm=REQUESTS_PER_MIN, tpm=TOKENS_PER_MIN)
+SYSTEM_PROMPT = "You are a medical education expert specializing in creating high-quality medical reasoning questions in English."
 # Path and output files
 paths_file = Path("/home/xinding/dingxin/Agent/MAIA/code/merged_paths.json")
 output_file = Path("/home/xinding/dingxin/Agent/MAIA/code/umls_qa_pairs.json")  # English version
-
-# Load path data
-paths_data = load_paths_data(paths_file)
-print(f"Loaded {sum(len(paths) for paths in paths_data.values())} paths")
-
-# View data structure
-template_ids = list(paths_data.keys())
-print(f"Template types: {template_ids}")
-
-# Randomly select a path to view its structure
-template = random.choice(template_ids)
-if paths_data[template]:
-    sample_path = paths_data[template][0]
-    print(f"\nSample path (Template: {template}):")
-    if 'path_strs' in sample_path:
-        print(f"path_strs: {sample_path['path_strs']}")
-    else:
-        print("Path structure:", sample_path.keys())
-else:
-    print(f"Template {template} has no available paths")
-def filter_valid_paths(paths_data, min_path_length=3):
-    """Filter valid paths - keep only those with complete structure and sufficient length"""
-    valid_paths = {}
-    
-    for template_id, paths in paths_data.items():
-        valid_template_paths = []
-        
-        for path in paths:
-            # 检查路径是否包含必要的字段并且长度足够
-            if ('path_strs' in path and 
-                isinstance(path['path_strs'], list) and 
-                len(path['path_strs']) >= min_path_length):
-                valid_template_paths.append(path)
-        
-        if valid_template_paths:
-            valid_paths[template_id] = valid_template_paths
-    
-    return valid_paths
-
-# 过滤有效路径
-valid_paths = filter_valid_paths(paths_data)
-print(f"过滤后共有 {sum(len(paths) for paths in valid_paths.values())} 条有效路径")
-for template_id, paths in valid_paths.items():
-    print(f"模板 {template_id}: {len(paths)} 条有效路径")
+checkpoint_file = output_file.with_suffix(".jsonl")  # one line per finished path; rerun to resume
+
+# merged_paths.json is streamed (path_stream.iter_paths) rather than loaded whole; per-template
+# counts are collected while the paths go by, so no extra pass over the file is needed for them.
+path_stats = defaultdict(lambda: {"paths": 0, "valid": 0})
+
+
+def filter_valid_paths(paths, min_path_length=3, stats=None):
+    """Filter valid paths - keep only those with complete structure and sufficient length
+
+    Lazy: consumes and yields (template_id, path) pairs; `stats` is updated in the same pass.
+    """
+    for template_id, path in paths:
+        if stats is not None:
+            stats[template_id]["paths"] += 1
+        # 检查路径是否包含必要的字段并且长度足够
+        if ('path_strs' in path and 
+            isinstance(path['path_strs'], list) and 
+            len(path['path_strs']) >= min_path_length):
+            if stats is not None:
+                stats[template_id]["valid"] += 1
+            yield template_id, path
+
+
+def print_path_stats(stats):
+    print(f"Loaded {sum(s['paths'] for s in stats.values())} paths")
+    print(f"Template types: {list(stats)}")
+    print(f"过滤后共有 {sum(s['valid'] for s in stats.values())} 条有效路径")
+    for template_id, s in stats.items():
+        print(f"模板 {template_id}: {s['valid']} 条有效路径")
 def create_qa_prompt(path_info, template_id):
     """Create a high-quality English prompt for generating complex medical Q-A pairs"""
 
@@ -116,13 +104,17 @@ def generate_qa_pair(path_info, template_id):
     prompt = create_qa_prompt(path_info, template_id)
     
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            temperature=TEMPERATURE,
-            messages=[
-                {"role": "system", "content": "You are a medical education expert specializing in creating high-quality medical reasoning questions in English."},
-                {"role": "user", "content": prompt}
-            ]
+        response = limiter.call(
+            lambda: client.chat.completions.create(
+                model=MODEL,
+                temperature=TEMPERATURE,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ]
+            ),
+            tokens=estimate_tokens(SYSTEM_PROMPT + prompt) + EXPECTED_COMPLETION_TOKENS,
+            usage=lambda r: r.usage.total_tokens,
         )
         
         result = response.choices[0].message.content.strip()
@@ -155,30 +147,38 @@ def generate_qa_pair(path_info, template_id):
         return None
 
 
+def path_id(template_id, path):
+    """Stable checkpoint key for a path: template plus its CUIs and relations"""
+    nodes = path.get("cuis") or path["path_strs"]
+    return f"{template_id}:{'|'.join(nodes)}/{'|'.join(path.get('relas', []))}"
+
+
+def iter_jobs(stats=None):
+    """(job_id, (template_id, path)) for every valid path, streamed from paths_file in file order"""
+    for_ids, pairs = itertools.tee(filter_valid_paths(iter_paths(paths_file), stats=stats))
+    return zip(occurrence_ids(path_id(template_id, path) for template_id, path in for_ids), pairs)
+
+
 # Define the number of samples per template (now this is no longer needed, as we generate for all paths)
 # samples_per_template = 50  # This is no longer needed
-output_qa_pairs = []
 
-# Iterate through all the templates and their associated paths
-for template_id, paths in valid_paths.items():
-    print(f"Generating Q&A pairs for template '{template_id}'...")
-    
-    # Iterate through all paths for this template (no random sampling)
-    for path in tqdm.tqdm(paths, desc=f"Template: {template_id}"):
-        qa_pair = generate_qa_pair(path, template_id)
-        
-        if qa_pair:
-            output_qa_pairs.append(qa_pair)
-            # Add a short delay to avoid API rate limits
-            time.sleep(RATE_LIMIT_S)
-            
-            # Save intermediate results every 10 samples
-            if len(output_qa_pairs) % 10 == 0:
-                with open(output_file, "w", encoding="utf-8") as f:
-                    json.dump(output_qa_pairs, f, ensure_ascii=False, indent=2)
-                print(f"Saved {len(output_qa_pairs)} Q&A pairs")
-
-# Save final results
-with open(output_file, "w", encoding="utf-8") as f:
-    json.dump(output_qa_pairs, f, ensure_ascii=False, indent=2)
-print(f"Finished generating and saving {len(output_qa_pairs)} Q&A pairs.")
+# All paths of all templates (no random sampling); WORKERS requests run at once under the shared
+# RPM/TPM limiter, and results come back in this order regardless of which call finishes first.
+# Paths are read, filtered and fed to the workers lazily, so only the in-flight window is in memory.
+# Every generated pair is appended to the checkpoint as it finishes; paths already there
+# (from an interrupted run) are skipped. Failed generations are not recorded and get retried.
+checkpoint = Checkpoint(checkpoint_file)
+done = checkpoint.completed()
+todo = ((job_id, job) for job_id, job in iter_jobs(path_stats) if job_id not in done)
+print(f"Generating Q&A pairs with {WORKERS} workers ({len(done)} paths already done)...")
+results = map_ordered(lambda item: (item[0], generate_qa_pair(item[1][1], item[1][0])), todo, workers=WORKERS)
+
+for job_id, qa_pair in tqdm.tqdm(results, desc="Generating"):
+    if qa_pair:
+        checkpoint.append(job_id, qa_pair)
+print_path_stats(path_stats)
+
+# Save final results (same JSON list as before, in path order; a second streaming pass gives the order)
+saved = checkpoint.compact(output_file, order=(job_id for job_id, _ in iter_jobs()))
+print(f"Finished generating and saving {saved} Q&A pairs.")
+print(f"Rate limiter: {limiter.stats}")
@@ -0,0 +1,107 @@
+"""
+Two-tier result cache for the UMLS getters: an in-memory LRU in front of an
+optional on-disk SQLite tier that survives restarts.
+
+UMLS is a read-only, release-versioned dataset, so entries never expire;
+instead every key includes the release tag, and switching releases simply
+stops matching old entries. "Not found" results (None) are cached like any
+other value. Values are stored as JSON text and decoded on every hit, so
+callers always get a fresh structure equal to what the getter returned.
+"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+MISS = object()
+
+
+class ResultCache:
+    def __init__(self, release, max_entries=100_000, disk_path=None):
+        self.release = release
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode = WAL")
+            self._disk.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._disk.commit()
+        self.hits = 0
+        self.disk_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def key(self, name, args):
+        return json.dumps([self.release, name, list(args)], ensure_ascii=False, default=str)
+
+    def get(self, key):
+        """ Cached value for `key`, or MISS."""
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+            elif self._disk is not None:
+                row = self._disk.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    text = row[0]
+                    self.disk_hits += 1
+                    self._remember(key, text)
+            if text is None:
+                self.misses += 1
+                return MISS
+            self.hits += 1
+            if text == "null":
+                self.negative_hits += 1
+        return json.loads(text)
+
+    def put(self, key, value):
+        text = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, text)
+            if self._disk is not None:
+                self._disk.execute("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", (key, text))
+                self._disk.commit()
+
+    def put_many(self, items):
+        """ Store several (key, value) pairs with a single disk commit."""
+        items = [(key, json.dumps(value, ensure_ascii=False)) for key, value in items]
+        with self._lock:
+            for key, text in items:
+                self._remember(key, text)
+            if self._disk is not None and items:
+                self._disk.executemany("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", items)
+                self._disk.commit()
+
+    def _remember(self, key, text):
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "release": self.release,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM cache")
+                self._disk.commit()
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
@@ -0,0 +1,186 @@
+"""
+In-process exact/prefix index over English preferred terms (MRCONSO, TTY='PT',
+LAT='ENG'), used by kg.look_up_cui instead of the `STR = %s OR STR LIKE 'x%'`
+round trip.
+
+Keys are normalized (lower-cased, whitespace collapsed), UTF-8 encoded and
+packed into a single sorted bytes blob with an offsets array, and CUIs are
+stored as 32-bit integers, so a full English PT index takes a few tens of MB
+instead of one Python object per string. Lookups are a binary search.
+
+Build a snapshot once so workers start without touching the database:
+    python umls_index.py --out pt_index.bin
+"""
+import re
+import array
+import bisect
+import logging
+import argparse
+import threading
+
+MAGIC = b"UMLSPTIX1"
+CUI_PATTERN = re.compile(r"^C(\d{7})$")
+LIKE_WILDCARDS = ("%", "_")
+
+
+def normalize(term):
+    """ Case/whitespace normalization shared by index keys and queries."""
+    return " ".join(term.split()).lower()
+
+
+def _cui_to_int(cui):
+    match = CUI_PATTERN.match(cui)
+    if not match:
+        raise ValueError(f"Unexpected CUI format: {cui!r}")
+    return int(match.group(1))
+
+
+class _Keys:
+    """ Sequence view of the packed keys, so bisect can search the blob directly."""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return self._blob[self._offsets[i]:self._offsets[i + 1]]
+
+
+class TermIndex:
+    """
+    Sorted, packed (normalized term -> CUI) index.
+
+    Use TermIndex.build(rows) from (STR, CUI) pairs or TermIndex.load(path)
+    from a snapshot. lookup() mirrors look_up_cui: it returns
+    [{"CUI": ...}, ...] for every PT string equal to or starting with the term,
+    or None.
+    """
+
+    def __init__(self, blob, offsets, cuis):
+        self._blob = blob
+        self._offsets = offsets
+        self._cuis = cuis
+        self._keys = _Keys(blob, offsets)
+
+    def __len__(self):
+        return len(self._cuis)
+
+    @property
+    def nbytes(self):
+        return len(self._blob) + self._offsets.itemsize * len(self._offsets) + self._cuis.itemsize * len(self._cuis)
+
+    @classmethod
+    def build(cls, rows, max_entries=None):
+        """
+        Build from an iterable of (STR, CUI) pairs.
+
+        Raises MemoryError if there are more than `max_entries` distinct pairs,
+        so callers can fall back to SQL instead of growing without bound.
+        """
+        pairs = set()
+        for string, cui in rows:
+            pairs.add((normalize(string).encode("utf-8"), _cui_to_int(cui)))
+            if max_entries is not None and len(pairs) > max_entries:
+                raise MemoryError(f"Term index exceeds max_entries={max_entries}")
+        offsets = array.array("Q", [0])
+        cuis = array.array("I")
+        chunks = []
+        position = 0
+        for key, cui in sorted(pairs):
+            chunks.append(key)
+            position += len(key)
+            offsets.append(position)
+            cuis.append(cui)
+        return cls(b"".join(chunks), offsets, cuis)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a term index snapshot")
+            count = int.from_bytes(f.read(8), "little")
+            offsets = array.array("Q")
+            offsets.fromfile(f, count + 1)
+            cuis = array.array("I")
+            cuis.fromfile(f, count)
+            blob = f.read(offsets[-1])
+        return cls(blob, offsets, cuis)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(self._cuis).to_bytes(8, "little"))
+            self._offsets.tofile(f)
+            self._cuis.tofile(f)
+            f.write(self._blob)
+
+    @staticmethod
+    def supports(term):
+        """ Terms containing LIKE wildcards keep SQL semantics and are not served from the index."""
+        return not any(w in term for w in LIKE_WILDCARDS)
+
+    def lookup(self, term):
+        prefix = normalize(term).encode("utf-8")
+        start = bisect.bisect_left(self._keys, prefix)
+        seen = {}
+        for i in range(start, len(self._cuis)):
+            if not self._keys[i].startswith(prefix):
+                break
+            seen.setdefault(self._cuis[i], None)
+        if not seen:
+            return None
+        return [{"CUI": f"C{cui:07d}"} for cui in seen]
+
+
+class LazyTermIndex:
+    """
+    Loads a TermIndex on first use, from a snapshot file if given, otherwise
+    from `load_rows` (a callable yielding (STR, CUI) pairs). If loading fails
+    or exceeds `max_entries`, the index disables itself and callers fall back
+    to SQL.
+    """
+
+    def __init__(self, load_rows=None, snapshot=None, max_entries=None):
+        self._load_rows = load_rows
+        self._snapshot = snapshot
+        self._max_entries = max_entries
+        self._index = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._index is None and not self._failed:
+            with self._lock:
+                if self._index is None and not self._failed:
+                    try:
+                        if self._snapshot:
+                            self._index = TermIndex.load(self._snapshot)
+                        else:
+                            self._index = TermIndex.build(self._load_rows(), self._max_entries)
+                        logging.info(f"Loaded term index: {len(self._index)} entries, {self._index.nbytes / 1e6:.1f} MB")
+                    except Exception as e:
+                        logging.error(f"Term index unavailable, using SQL lookups: {e}")
+                        self._failed = True
+        return self._index
+
+    def lookup(self, term):
+        """ Index result for `term`, or NotImplemented when the SQL path has to answer."""
+        index = self.get() if TermIndex.supports(term) else None
+        if index is None:
+            return NotImplemented
+        return index.lookup(term)
+
+
+if __name__ == "__main__":
+    import kg
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Write an English PT term index snapshot from the configured UMLS backend.")
+    parser.add_argument("--out", default="pt_index.bin")
+    args = parser.parse_args()
+    index = TermIndex.build(kg.iter_preferred_terms())
+    index.save(args.out)
+    print(f"Wrote {len(index)} entries ({index.nbytes / 1e6:.1f} MB) to {args.out}")
@@ -0,0 +1,238 @@
+"""
+Offline UMLS backend: load MRCONSO / MRREL / MRSTY / MRDEF RRF subsets into an
+indexed SQLite file and serve it through the same connection interface that
+kg.py's getters use with MySQL (dict rows, `%s` placeholders, `with
+connection.cursor() as cursor`).
+
+Build a database once:
+    python umls_local.py --rrf-dir /data/umls/2024AA/META --db umls.sqlite --lang ENG
+
+Upgrade a database built before MRCONSO_ENG_PT existed:
+    python umls_local.py --db umls.sqlite --derived-only
+
+Then point the getters at it:
+    export UMLS_BACKEND=sqlite UMLS_SQLITE_PATH=umls.sqlite
+or, from Python, kg.configure_backend("sqlite", "umls.sqlite").
+"""
+import os
+import time
+import sqlite3
+import logging
+import argparse
+
+# Column layouts of the RRF files (UMLS Reference Manual, section 3.3).
+RRF_COLUMNS = {
+    "MRCONSO": ["CUI", "LAT", "TS", "LUI", "STT", "SUI", "ISPREF", "AUI", "SAUI", "SCUI",
+                "SDUI", "SAB", "TTY", "CODE", "STR", "SRL", "SUPPRESS", "CVF"],
+    "MRREL": ["CUI1", "AUI1", "STYPE1", "REL", "CUI2", "AUI2", "STYPE2", "RELA", "RUI",
+              "SRUI", "SAB", "SL", "RG", "DIR", "SUPPRESS", "CVF"],
+    "MRSTY": ["CUI", "TUI", "STN", "STY", "ATUI", "CVF"],
+    "MRDEF": ["CUI", "AUI", "ATUI", "SATUI", "SAB", "DEF", "SUPPRESS", "CVF"],
+}
+
+# Only the columns the getters read are stored. STR uses NOCASE so `=` and
+# `LIKE 'x%'` match case-insensitively like MySQL's default collation, and the
+# STR index still serves prefix lookups.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS MRCONSO (
+    CUI TEXT NOT NULL, LAT TEXT, TS TEXT, STT TEXT, TTY TEXT,
+    STR TEXT COLLATE NOCASE, SAB TEXT
+);
+CREATE TABLE IF NOT EXISTS MRREL (
+    CUI1 TEXT NOT NULL, REL TEXT, RELA TEXT, CUI2 TEXT NOT NULL, SAB TEXT
+);
+CREATE TABLE IF NOT EXISTS MRSTY (CUI TEXT NOT NULL, TUI TEXT, STY TEXT);
+CREATE TABLE IF NOT EXISTS MRDEF (CUI TEXT NOT NULL, DEF TEXT, SAB TEXT);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_mrconso_cui ON MRCONSO (CUI, LAT, TTY);
+CREATE INDEX IF NOT EXISTS idx_mrconso_str ON MRCONSO (STR);
+CREATE INDEX IF NOT EXISTS idx_mrrel_cui1 ON MRREL (CUI1, RELA, SAB, CUI2, REL);
+CREATE INDEX IF NOT EXISTS idx_mrrel_cui2 ON MRREL (CUI2, RELA, SAB, CUI1, REL);
+CREATE INDEX IF NOT EXISTS idx_mrsty_cui ON MRSTY (CUI);
+CREATE INDEX IF NOT EXISTS idx_mrdef_cui ON MRDEF (CUI);
+"""
+
+# Derived name table joined by kg.py's relation queries (the SQLite twin of
+# migrations/001_relation_query_indexes.sql). The index covers every column
+# the joins read, so names never touch the MRCONSO heap.
+DERIVED_TABLES = """
+DROP TABLE IF EXISTS MRCONSO_ENG_PT;
+CREATE TABLE MRCONSO_ENG_PT (CUI TEXT NOT NULL, STR TEXT COLLATE NOCASE, SAB TEXT, TS TEXT);
+INSERT INTO MRCONSO_ENG_PT (CUI, STR, SAB, TS)
+    SELECT CUI, STR, SAB, TS FROM MRCONSO WHERE LAT = 'ENG' AND TTY = 'PT';
+CREATE INDEX idx_mrconso_eng_pt ON MRCONSO_ENG_PT (CUI, TS, SAB, STR);
+"""
+
+STORED_COLUMNS = {
+    "MRCONSO": ["CUI", "LAT", "TS", "STT", "TTY", "STR", "SAB"],
+    "MRREL": ["CUI1", "REL", "RELA", "CUI2", "SAB"],
+    "MRSTY": ["CUI", "TUI", "STY"],
+    "MRDEF": ["CUI", "DEF", "SAB"],
+}
+
+
+def read_rrf(path, table, languages=None, sabs=None):
+    """ Yield the stored columns of each row in an RRF file, filtered by LAT/SAB where the table has them."""
+    columns = RRF_COLUMNS[table]
+    keep = [columns.index(c) for c in STORED_COLUMNS[table]]
+    lat = columns.index("LAT") if "LAT" in columns else None
+    sab = columns.index("SAB") if "SAB" in columns else None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("|")
+            if languages and lat is not None and fields[lat] not in languages:
+                continue
+            if sabs and sab is not None and fields[sab] not in sabs:
+                continue
+            yield tuple(fields[i] for i in keep)
+
+
+def build_database(rrf_dir, db_path, languages=None, sabs=None, tables=None, batch_size=50000):
+    """
+    Import RRF files from `rrf_dir` into the SQLite file `db_path`.
+
+    Args:
+        rrf_dir (str): Directory containing MRCONSO.RRF, MRREL.RRF, MRSTY.RRF, MRDEF.RRF.
+        db_path (str): Output database; existing tables are replaced.
+        languages (set[str] | None): Keep only these LAT values in MRCONSO (e.g. {"ENG"}).
+        sabs (set[str] | None): Keep only these source vocabularies in MRCONSO/MRREL/MRDEF.
+        tables (list[str] | None): Subset of tables to import; all four by default.
+    """
+    tables = tables or list(STORED_COLUMNS)
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        for table in tables:
+            connection.execute(f"DROP TABLE IF EXISTS {table}")
+        connection.executescript(SCHEMA)
+        for table in tables:
+            path = os.path.join(rrf_dir, f"{table}.RRF")
+            if not os.path.exists(path):
+                logging.warning(f"{path} not found, leaving {table} empty.")
+                continue
+            start = time.time()
+            placeholders = ", ".join("?" * len(STORED_COLUMNS[table]))
+            sql = f"INSERT INTO {table} VALUES ({placeholders})"
+            rows, count = [], 0
+            for row in read_rrf(path, table, languages, sabs):
+                rows.append(row)
+                if len(rows) >= batch_size:
+                    connection.executemany(sql, rows)
+                    count += len(rows)
+                    rows = []
+            connection.executemany(sql, rows)
+            count += len(rows)
+            connection.commit()
+            logging.info(f"Loaded {count} rows into {table} in {time.time() - start:.1f}s")
+        connection.executescript(INDEXES)
+        connection.commit()
+    finally:
+        connection.close()
+    build_derived_tables(db_path)
+
+
+def build_derived_tables(db_path):
+    """ (Re)create MRCONSO_ENG_PT and the covering MRREL indexes in an existing database, then ANALYZE."""
+    start = time.time()
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executescript(INDEXES)
+        connection.executescript(DERIVED_TABLES)
+        connection.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+    logging.info(f"Built derived tables in {time.time() - start:.1f}s")
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """ DB-API cursor wrapper that accepts pymysql-style `%s` SQL and returns dict rows."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        if params:
+            sql = sql.replace("%s", "?").replace("%%", "%")
+        self._cursor.execute(sql, tuple(params))
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteConnection:
+    """ Read-only SQLite connection exposing the subset of the pymysql API the getters use."""
+
+    def __init__(self, db_path):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"UMLS SQLite database not found: {db_path}")
+        # Pool connections are handed between threads (one at a time), hence check_same_thread=False.
+        self._connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._connection.row_factory = _dict_row
+        self.open = True
+
+    def cursor(self, cursorclass=None):
+        # cursorclass is accepted for pymysql compatibility; SQLite cursors already stream.
+        return SQLiteCursor(self._connection.cursor())
+
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise sqlite3.ProgrammingError("Connection already closed.")
+
+    def close(self):
+        if self.open:
+            self.open = False
+            self._connection.close()
+
+
+def connect(db_path=None):
+    """ Open the SQLite backend, defaulting to $UMLS_SQLITE_PATH."""
+    return SQLiteConnection(db_path or os.getenv("UMLS_SQLITE_PATH", "umls.sqlite"))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Build an offline SQLite UMLS backend from RRF files.")
+    parser.add_argument("--rrf-dir", help="UMLS META directory containing the .RRF files")
+    parser.add_argument("--db", default="umls.sqlite", help="output SQLite file")
+    parser.add_argument("--lang", nargs="*", help="keep only these MRCONSO languages, e.g. ENG")
+    parser.add_argument("--sab", nargs="*", help="keep only these source vocabularies")
+    parser.add_argument("--tables", nargs="*", choices=list(STORED_COLUMNS), help="tables to import")
+    parser.add_argument("--derived-only", action="store_true",
+                        help="only rebuild MRCONSO_ENG_PT and the MRREL indexes of an existing --db")
+    args = parser.parse_args()
+    if args.derived_only:
+        build_derived_tables(args.db)
+        raise SystemExit
+    if not args.rrf_dir:
+        parser.error("--rrf-dir is required unless --derived-only is given")
+    build_database(args.rrf_dir, args.db,
+                   languages=set(args.lang) if args.lang else None,
+                   sabs=set(args.sab) if args.sab else None,
+                   tables=args.tables)
@@ -0,0 +1,245 @@
+"""
+Offline clinical-trials engine over the shipped snapshot
+(source/clinical_trials_data_complete.csv).
+
+The CSV is parsed once into columnar arrays (one list per column, row id =
+position). Conditions and intervention names get word-level inverted indexes,
+countries (from "City - Country" locations) an exact inverted index, and
+start dates a sorted column for range filters. A filter_expr in the
+ctgov_search grammar is answered by intersecting posting sets, smallest first:
+
+    engine = TrialsEngine.load()
+    engine.search("conditions=Multiple Myeloma;interventions.name=CC-5013;"
+                  "startDateFrom=2003-01-01;locations.country=United States")
+    -> ["NCT00056160", ...]
+
+List-valued columns (Conditions, Interventions, Locations) are split on "|",
+the separator of the ClinicalTrials.gov CSV export, so an item that itself
+contains commas ("Lymphoma, Non-Hodgkin") stays one item. A snapshot whose
+list columns contain no "|" at all (the shipped CSV joins items with ", ")
+falls back to splitting that column on commas.
+
+Matching mirrors the API closely enough for benchmarking: conditions and
+interventions.name match when every word of the value occurs in one of the
+trial's conditions / interventions (case-insensitive); the other keys are
+exact. Results are deterministic (snapshot order).
+
+Set CTGOV_BACKEND=local to make demo_agent's ctgov_search use this engine.
+"""
+import os
+import re
+import csv
+import bisect
+from typing import Dict, List, Optional, Set
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "source", "clinical_trials_data_complete.csv")
+WORD = re.compile(r"[a-z0-9]+")
+NO_LOCATIONS = "No locations listed"
+
+
+def _words(text: str) -> List[str]:
+    return WORD.findall(text.lower())
+
+
+LIST_SEPARATOR = "|"
+
+
+def _split(value: str, separator: str = LIST_SEPARATOR) -> List[str]:
+    return [part.strip() for part in value.split(separator) if part.strip()]
+
+
+def _separator(values: List[str]) -> str:
+    """ "|" when the column uses the export's separator anywhere, else "," (older comma-joined snapshots)."""
+    return LIST_SEPARATOR if any(LIST_SEPARATOR in v for v in values) else ","
+
+
+def normalize_date(value: str) -> Optional[str]:
+    """ "2008" / "2008-01" / "2008-01-15" -> "2008-01-15"-style sortable string; None if missing."""
+    value = (value or "").strip()
+    if not re.match(r"^\d{4}(-\d{2}){0,2}$", value):
+        return None
+    parts = value.split("-") + ["01"] * (3 - len(value.split("-")))
+    return "-".join(parts)
+
+
+class TrialsEngine:
+    def __init__(self, columns: Dict[str, list]):
+        self.columns = columns
+        self.nct_ids: List[str] = columns["NCT ID"]
+        self.size = len(self.nct_ids)
+        self._row_of = {nct: i for i, nct in enumerate(self.nct_ids)}
+
+        self.status = [s.strip().upper() for s in columns["Overall Status"]]
+        self.study_type = [s.strip().upper() for s in columns["Study Type"]]
+        self.conditions = self._list_column(columns["Conditions"])
+        self.interventions = self._list_column(columns["Interventions"])
+        location_separator = _separator(columns["Locations"])
+        self.countries = [self._countries(v, location_separator) for v in columns["Locations"]]
+
+        self._condition_words = self._word_index(self.conditions)
+        self._intervention_words = self._word_index(self.interventions)
+        self._country_index: Dict[str, Set[int]] = {}
+        for row, countries in enumerate(self.countries):
+            for country in countries:
+                self._country_index.setdefault(country.lower(), set()).add(row)
+        self._status_index = self._exact_index(self.status)
+        self._type_index = self._exact_index(self.study_type)
+
+        # Sorted (date, row) pairs; trials without a start date never match startDateFrom.
+        dated = sorted((d, row) for row, d in enumerate(normalize_date(v) for v in columns["Start Date"]) if d)
+        self._start_dates = [d for d, _ in dated]
+        self._start_rows = [row for _, row in dated]
+
+    # -- construction --------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> "TrialsEngine":
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            columns = {name: [] for name in header}
+            for record in reader:
+                if not record:
+                    continue
+                for name, value in zip(header, record):
+                    columns[name].append(value)
+        return cls(columns)
+
+    @staticmethod
+    def _list_column(values: List[str]) -> List[List[str]]:
+        separator = _separator(values)
+        return [_split(v, separator) for v in values]
+
+    @staticmethod
+    def _countries(locations: str, separator: str = LIST_SEPARATOR) -> List[str]:
+        """ Countries of "City - Country" sites, or of export sites "Facility, City, State, Zip, Country"."""
+        if not locations or locations.strip() == NO_LOCATIONS:
+            return []
+        countries = []
+        for site in _split(locations, separator):
+            if " - " in site:
+                country = site.rsplit(" - ", 1)[1].strip()
+            elif separator == LIST_SEPARATOR and "," in site:
+                country = site.rsplit(",", 1)[1].strip()
+            else:
+                continue
+            if country and country not in countries:
+                countries.append(country)
+        return countries
+
+    @staticmethod
+    def _word_index(values: List[List[str]]) -> Dict[str, Set[int]]:
+        index: Dict[str, Set[int]] = {}
+        for row, items in enumerate(values):
+            for item in items:
+                for word in _words(item):
+                    index.setdefault(word, set()).add(row)
+        return index
+
+    @staticmethod
+    def _exact_index(values: List[str]) -> Dict[str, Set[int]]:
+        index: Dict[str, Set[int]] = {}
+        for row, value in enumerate(values):
+            index.setdefault(value, set()).add(row)
+        return index
+
+    # -- query evaluation ----------------------------------------------------
+
+    def _phrase(self, index, values, phrase: str) -> Set[int]:
+        """ Rows where one item (condition / intervention) contains every word of `phrase`."""
+        words = _words(phrase)
+        if not words:
+            return set(range(self.size))
+        postings = sorted((index.get(w, set()) for w in words), key=len)
+        candidates = set.intersection(*postings)
+        wanted = set(words)
+        return {row for row in candidates if any(wanted <= set(_words(item)) for item in values[row])}
+
+    def _started_from(self, date: str) -> Set[int]:
+        start = normalize_date(date)
+        if start is None:
+            raise ValueError(f"Bad startDateFrom: {date!r}")
+        return set(self._start_rows[bisect.bisect_left(self._start_dates, start):])
+
+    def _postings(self, expr: str) -> List[Set[int]]:
+        postings = []
+        for seg in filter(None, (s.strip() for s in expr.split(";"))):
+            k, v = map(str.strip, seg.split("=", 1))
+
+            if k == "conditions":
+                postings.append(self._phrase(self._condition_words, self.conditions, v))
+
+            elif k == "interventions.name":          # 可重复，多个之间为 AND
+                postings.append(self._phrase(self._intervention_words, self.interventions, v))
+
+            elif k == "locations.country":
+                postings.append(self._country_index.get(v.strip('"').lower(), set()))
+
+            elif k == "overallStatus":               # 允许 "COMPLETED|TERMINATED" 或逗号分隔
+                statuses = [s.strip().upper() for s in re.split(r"[|,]", v) if s.strip()]
+                postings.append(set().union(*(self._status_index.get(s, set()) for s in statuses)))
+
+            elif k == "studyType":
+                postings.append(self._type_index.get(v.upper(), set()))
+
+            elif k == "startDateFrom":
+                postings.append(self._started_from(v))
+
+            else:
+                raise ValueError(f"Unsupported key: {k}")
+        return postings
+
+    def search_rows(self, expr: str) -> List[int]:
+        postings = sorted(self._postings(expr), key=len)
+        if not postings:
+            return list(range(self.size))
+        rows = set(postings[0])
+        for posting in postings[1:]:
+            if not rows:
+                break
+            rows &= posting
+        return sorted(rows)
+
+    def search(self, expr: str, max_results: Optional[int] = None) -> List[str]:
+        """ NCT IDs matching `expr`, in snapshot order."""
+        rows = self.search_rows(expr)
+        if max_results is not None:
+            rows = rows[:max_results]
+        return [self.nct_ids[row] for row in rows]
+
+    def record(self, nct_id: str) -> Optional[Dict[str, str]]:
+        row = self._row_of.get(nct_id)
+        if row is None:
+            return None
+        return {name: values[row] for name, values in self.columns.items()}
+
+
+_engine: Optional[TrialsEngine] = None
+
+
+def engine() -> TrialsEngine:
+    """ Shared engine over $CTGOV_SNAPSHOT (default: the shipped CSV), loaded on first use."""
+    global _engine
+    if _engine is None:
+        _engine = TrialsEngine.load(os.getenv("CTGOV_SNAPSHOT", DEFAULT_PATH))
+    return _engine
+
+
+def ctgov_search(filter_expr: str, max_results: Optional[int] = None) -> List[str]:
+    """返回快照中符合条件的 NCT ID 列表（离线，与线上 ctgov_search 同一套 filter 语法；快照不分页，没有 page_size）"""
+    return engine().search(filter_expr, max_results)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    if len(sys.argv) != 2:
+        sys.exit('usage: python ctgov_local.py "conditions=...;overallStatus=COMPLETED"')
+    e = engine()
+    start = time.perf_counter()
+    ids = e.search(sys.argv[1])
+    print(f"{len(ids)} trials in {(time.perf_counter() - start) * 1e3:.3f} ms")
+    for nct in ids:
+        print(nct)
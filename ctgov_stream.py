@@ -0,0 +1,168 @@
+"""
+Streaming, prefetching ClinicalTrials.gov v2 search.
+
+iter_studies() yields studies as pages arrive and fetches page N+1 in the
+background while the caller consumes page N. `fields` projects the response
+server-side (e.g. "NCTId" instead of full protocol sections), and
+`max_results` stops paging as soon as enough studies were seen:
+
+    for study in iter_studies("conditions=Heart Failure;overallStatus=RECRUITING",
+                              fields=["NCTId", "BriefTitle"], max_results=250):
+        ...
+
+ctgov_search() keeps the tool's signature (filter_expr -> list of NCT IDs) and
+is what demo_agent registers as `ctgov_search`.
+
+filter_expr uses the same grammar as before: semicolon-separated key=value
+pairs with keys conditions, interventions.name (repeatable),
+locations.country, overallStatus, studyType, startDateFrom.
+"""
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+CTGOV = os.getenv("CTGOV_URL", "https://clinicaltrials.gov/api/v2/studies")
+MAX_PAGE_SIZE = 1000            # API limit
+
+_local = threading.local()
+_prefetcher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ctgov")
+
+
+def _session() -> requests.Session:
+    """ One keep-alive session per thread (requests.Session is not thread-safe)."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def _build_params(expr: str,
+                  page_size: int = 100,
+                  page_token: Optional[str] = None,
+                  fields: Optional[Union[str, Sequence[str]]] = None) -> Dict[str, str]:
+    """
+    将形如 'key=value;key=value' 的过滤串转为 v2 API 参数。
+    支持的 key:
+      overallStatus, studyType, conditions, interventions.name,
+      locations.country, startDateFrom
+    """
+    params: Dict[str, str] = {
+        "pageSize": str(page_size),
+        "countTotal": "false",
+        "markupFormat": "markdown",
+    }
+    interventions, advanced = [], []
+
+    for seg in filter(None, (s.strip() for s in expr.split(";"))):
+        k, v = map(str.strip, seg.split("=", 1))
+
+        if k == "conditions":
+            params["query.cond"] = v
+
+        elif k == "interventions.name":
+            interventions.append(v)
+
+        elif k == "locations.country":
+            params["query.locn"] = f'"{v}"'    # 用引号避免拆词
+
+        elif k == "overallStatus":
+            params["filter.overallStatus"] = v.upper()
+
+        elif k == "studyType":
+            advanced.append(f"AREA[StudyType]({v.upper()})")
+
+        elif k == "startDateFrom":
+            advanced.append(f"AREA[StartDate]RANGE[{v},MAX]")
+
+        else:
+            raise ValueError(f"Unsupported key: {k}")
+
+    if interventions:
+        params["query.intr"] = " AND ".join(interventions)
+    if advanced:
+        params["filter.advanced"] = " AND ".join(advanced)
+    if fields:
+        params["fields"] = fields if isinstance(fields, str) else ",".join(fields)
+    if page_token:
+        params["pageToken"] = page_token
+    return params
+
+
+def _fetch_page(params: Dict[str, str], timeout: float) -> Dict:
+    r = _session().get(CTGOV, params=params, timeout=timeout)
+    r.raise_for_status()
+    return r.json()
+
+
+def iter_pages(filter_expr: str,
+               page_size: int = 100,
+               fields: Optional[Union[str, Sequence[str]]] = None,
+               prefetch: bool = True,
+               timeout: float = 30) -> Iterator[List[Dict]]:
+    """ Yield each page's studies; the next page is requested before the current one is handed out."""
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    params = _build_params(filter_expr, page_size, None, fields)
+    pending = _prefetcher.submit(_fetch_page, params, timeout) if prefetch else None
+    data = None if prefetch else _fetch_page(params, timeout)
+    try:
+        while True:
+            if pending is not None:
+                data, pending = pending.result(), None
+            token = data.get("nextPageToken")
+            if token:
+                params = _build_params(filter_expr, page_size, token, fields)
+                if prefetch:
+                    pending = _prefetcher.submit(_fetch_page, params, timeout)
+            yield data.get("studies", [])
+            if not token:
+                return
+            if not prefetch:
+                data = _fetch_page(params, timeout)
+    finally:
+        if pending is not None:      # caller stopped early: drop the prefetched page
+            pending.cancel()
+
+
+def iter_studies(filter_expr: str,
+                 page_size: int = 100,
+                 fields: Optional[Union[str, Sequence[str]]] = None,
+                 max_results: Optional[int] = None,
+                 prefetch: bool = True,
+                 timeout: float = 30) -> Iterator[Dict]:
+    """
+    Stream studies matching `filter_expr`.
+
+    Args:
+        filter_expr: "key=value;..." filter (see module docstring).
+        page_size: Studies per request (capped at 1000, and at max_results).
+        fields: Server-side projection, e.g. "NCTId" or ["NCTId", "OverallStatus"].
+        max_results: Stop after this many studies; no further pages are requested.
+        prefetch: Fetch the next page while the current one is consumed.
+    """
+    if max_results is not None:
+        if max_results <= 0:
+            return
+        page_size = min(page_size, max_results)
+    seen = 0
+    pages = iter_pages(filter_expr, page_size, fields, prefetch, timeout)
+    try:
+        for studies in pages:
+            for study in studies:
+                yield study
+                seen += 1
+                if max_results is not None and seen >= max_results:
+                    return
+    finally:
+        pages.close()
+
+
+def nct_id(study: Dict) -> Optional[str]:
+    return study.get("protocolSection", {}).get("identificationModule", {}).get("nctId")
+
+
+def ctgov_search(filter_expr: str, page_size: int = 100, max_results: Optional[int] = None) -> List[str]:
+    """返回符合条件的 NCT ID 列表（只下载 NCTId 字段，翻页预取）"""
+    return [nct_id(s) for s in iter_studies(filter_expr, page_size, fields="NCTId", max_results=max_results)]
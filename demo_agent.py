@@ -8,7 +8,12 @@ import json, importlib
 from openai import AzureOpenAI
 from tools.schema import ALL_SCHEMAS
 from tools import impl      as T  # 引入实现
+from umls_traverse import umls_traverse, TRAVERSE_SCHEMA
+import ctgov_stream
+import opentargets_client
 from typing import Optional
+from types import SimpleNamespace
+from dataclasses import dataclass, field, asdict
 import re
 os.environ["AZURE_OPENAI_API_KEY"] = "5a1437f6ff2648b9b969507fb5a73276"
 os.environ["AZURE_OPENAI_ENDPOINT"] = "https://ai-mistraleastus2753718354821.openai.azure.com/"
@@ -20,19 +25,100 @@ client = AzureOpenAI(
 )
 
 # 映射工具名 → Python 函数
-TOOLS = {
+RAW_TOOLS = {
     "pubmed.search":        T.pubmed_search,
-    "ctgov_search":         T.ctgov_search,
-    "opentargets.search":   T.ot_associated_diseases,
-    "opentargets.tractability": T.ot_tractability,
-    "opentargets.safety":   T.ot_safety,
+    "ctgov_search":         ctgov_stream.ctgov_search,   # 预取翻页 + 只取 NCTId 字段
+                                                         # CTGOV_BACKEND=local 时换成离线快照，见下
+    "opentargets.search":   opentargets_client.ot_associated_diseases,   # 单会话 + 按分数分页 + 缓存
+    "opentargets.tractability": opentargets_client.ot_tractability,
+    "opentargets.safety":   opentargets_client.ot_safety,    # symbol→ID 解析有缓存
     "umls.concept_lookup":  T.umls_concept_lookup,
     "umls.get_related":     T.umls_get_related,
     "oncology.path_query":  T.oncology_path_query,
+    "umls.traverse":        umls_traverse,    # 多跳：lookup + 多次 get_related 一次完成
 }
 
+# 相同参数的工具调用走缓存（见 tool_cache.py），跨进程共享；TOOL_CACHE=0 关闭
+# None / {"error": ...} 结果不进缓存；UMLS getter 出错时也返回 None，错误记在 kg._pop_error()，一并检查
+import sys
+import tool_cache
+
+def _swallowed_error():
+    kg = sys.modules.get("kg")
+    return kg._pop_error() if kg is not None else None
+
+tool_results = None
+if os.getenv("TOOL_CACHE", "1") != "0":
+    tool_results = tool_cache.ToolCache(os.getenv("TOOL_CACHE_PATH", "tool_cache.sqlite"),
+                                        error_signal=_swallowed_error)
+    TOOLS = tool_results.wrap_all(RAW_TOOLS)
+else:
+    TOOLS = dict(RAW_TOOLS)
+
+# 超出 token 预算的工具结果先压缩再进 messages，完整结果可用 tool_result.page 翻页取回（见 tool_compaction.py）
+import tool_compaction
+import tracing                 # span 记录：工具 / LLM / DB，见 tracing.py
+TOOLS[tool_compaction.PAGE_TOOL] = tool_compaction.tool_result_page   # 翻页结果本身不再压缩
+
+# 离线、可复现的 ctgov_search：在 source/clinical_trials_data_complete.csv 上检索（见 ctgov_local.py）
+# 亚毫秒级，不走缓存，也避免和线上结果共用缓存键
+if os.getenv("CTGOV_BACKEND", "api") == "local":
+    import ctgov_local
+    # 离线结果不分页：模型按线上签名传来的 page_size 在这里丢掉
+    TOOLS["ctgov_search"] = lambda filter_expr, page_size=None, max_results=None: \
+        ctgov_local.ctgov_search(filter_expr, max_results)
+
+def tool_cache_stats():
+    """每个工具的缓存命中率；缓存关闭时返回 None"""
+    return tool_results.stats() if tool_results is not None else None
+
 # demo_agent.py  顶部 import 之后加
 from copy import deepcopy
+import time
+import uuid
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+# 同一轮里的多个 tool_call 并发执行：限流的工具各有一个按上限大小的线程池，其余工具共用一个池；
+# 排队中的调用不占线程，忙的工具不会挡住别的工具。超时（秒）从调用真正开始执行时计。
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))    # 共用池大小（未列在 TOOL_CONCURRENCY 的工具）
+TOOL_CONCURRENCY = {           # 未列出的工具不单独限流；这些上限针对外部 API，按进程计，不随服务 workers 变
+    "pubmed.search":        3,  # NCBI E-utilities 无 key 时约 3 req/s
+    "ctgov_search":         4,
+    "opentargets.search":   4,
+    "opentargets.tractability": 4,
+    "opentargets.safety":   4,
+    "umls.concept_lookup":  4,  # 与 kg.py 连接池大小一致
+    "umls.get_related":     4,
+    "umls.traverse":        2,
+}
+TOOL_TIMEOUTS = {
+    "pubmed.search":        30,
+    "ctgov_search":         30,
+}
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "60"))
+TOOL_QUEUE_TIMEOUT = float(os.getenv("TOOL_QUEUE_TIMEOUT", "120"))   # 等待空闲名额的上限
+
+_tool_executor = None
+_tool_executors = {}
+
+def configure_tool_pools(max_workers: Optional[int] = None, concurrency: Optional[dict] = None):
+    """重建工具线程池：共用池大小 max_workers，限流工具按 concurrency 各建一个池。旧池里已提交的调用照常跑完。"""
+    global _tool_executor, _tool_executors, TOOL_MAX_WORKERS
+    if max_workers is not None:
+        TOOL_MAX_WORKERS = max_workers
+    if concurrency is not None:
+        TOOL_CONCURRENCY.update(concurrency)
+    old = [_tool_executor, *_tool_executors.values()]
+    _tool_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="tool")
+    _tool_executors = {name: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"tool-{name}")
+                       for name, n in TOOL_CONCURRENCY.items()}
+    for pool in old:
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+configure_tool_pools()
 
 def ensure_function_wrapping(schemas: list[dict]):
     """确保每个 schema 都包含 {"type":"function", "function": ...} 结构"""
@@ -47,7 +133,7 @@ def ensure_function_wrapping(schemas: list[dict]):
             })
     return new_list
 
-ALL_SCHEMAS = ensure_function_wrapping(ALL_SCHEMAS)   # ← 覆盖原变量
+ALL_SCHEMAS = ensure_function_wrapping(ALL_SCHEMAS + [TRAVERSE_SCHEMA, tool_compaction.PAGE_SCHEMA])   # ← 覆盖原变量
 
 def sanitise_schemas(schemas):
     safe = []
@@ -59,44 +145,271 @@ def sanitise_schemas(schemas):
     return safe
 
 ALL_SCHEMAS_SAFE = sanitise_schemas(ALL_SCHEMAS)
+
+class _CallClock(threading.Event):
+    """一次工具调用的提交时刻和真正开始执行（排队结束）的时刻；开始时 set()"""
+    def __init__(self):
+        super().__init__()
+        self.submitted = time.monotonic()
+        self.started = None
+
+    def start(self):
+        self.started = time.monotonic()
+        self.set()
+
+class ToolQueueTimeout(FutureTimeout):
+    """工具调用排队超过 TOOL_QUEUE_TIMEOUT 仍未开始，已撤销"""
+
+def _call_tool(name: str, args: dict, clock: _CallClock):
+    clock.start()
+    with tracing.span("tool", name, payload_in=args, queued=clock.started - clock.submitted) as sp:
+        result = TOOLS[name](**args)
+        sp.set_result(result)
+        return result
+
+class ChatCancelled(Exception):
+    """请求被取消（例如服务端超时），尚未开始的工具调用已撤销"""
+
+def _check_cancel(cancel: Optional[threading.Event]):
+    if cancel is not None and cancel.is_set():
+        raise ChatCancelled("chat cancelled")
+
+def _wait(fut, timeout: float, cancel: Optional[threading.Event], clock: Optional[_CallClock] = None):
+    """
+    等待 fut，期间每 0.1s 检查一次 cancel。
+    给了 clock 时先等调用开始执行（最多排队 TOOL_QUEUE_TIMEOUT 秒），timeout 从开始执行时计。
+    """
+    start = time.monotonic()
+    if clock is not None:
+        while not clock.is_set() and not fut.done():
+            _check_cancel(cancel)
+            if time.monotonic() - clock.submitted > TOOL_QUEUE_TIMEOUT and fut.cancel():
+                raise ToolQueueTimeout()
+            clock.wait(0.1)
+        start = clock.started or time.monotonic()
+    deadline = start + timeout
+    if cancel is None:
+        return fut.result(timeout=max(0.0, deadline - time.monotonic()))
+    while True:
+        _check_cancel(cancel)
+        remaining = deadline - time.monotonic()
+        try:
+            return fut.result(timeout=max(0.0, min(0.1, remaining)))
+        except FutureTimeout:
+            if remaining <= 0.1:
+                raise
+
+def run_tool_calls(tool_calls, cancel: Optional[threading.Event] = None) -> list[dict]:
+    """
+    并发执行一条 assistant 消息里的全部 tool_call，按 tool_call 顺序返回 tool 消息。
+    超时或出错的调用返回 {"error": ...}，让模型自行处理，不中断整轮对话。
+    超时的线程无法强杀，会在后台跑完，但结果被丢弃。
+    cancel 被置位时撤销还在排队的调用并抛出 ChatCancelled。
+    """
+    futures, clocks = [], []
+    for tc in tool_calls:
+        clock = _CallClock()
+        clocks.append(clock)
+        try:
+            name = tc.function.name
+            args = json.loads(tc.function.arguments or "{}")
+            if name not in TOOLS:
+                raise KeyError(f"unknown tool {name}")
+            executor = _tool_executors.get(name, _tool_executor)
+            # copy_context：工具线程里的 span 也带上当前问题的 trace_id
+            futures.append(executor.submit(contextvars.copy_context().run, _call_tool, name, args, clock))
+        except Exception as e:
+            futures.append(e)
+
+    messages = []
+    for tc, fut, clock in zip(tool_calls, futures, clocks):
+        name = tc.function.name
+        if isinstance(fut, Exception):
+            result = {"error": f"{type(fut).__name__}: {fut}"}
+        else:
+            # 超时从该调用真正开始执行时计，排队时间不算在内（排队另有 TOOL_QUEUE_TIMEOUT 上限）
+            timeout = TOOL_TIMEOUTS.get(name, DEFAULT_TOOL_TIMEOUT)
+            try:
+                result = _wait(fut, timeout, cancel, clock)
+            except ChatCancelled:
+                for pending in futures:
+                    if not isinstance(pending, Exception):
+                        pending.cancel()
+                raise
+            except ToolQueueTimeout:
+                result = {"error": f"{name} waited over {TOOL_QUEUE_TIMEOUT}s for a free slot"}
+            except FutureTimeout:
+                fut.cancel()
+                result = {"error": f"{name} timed out after {timeout}s"}
+            except Exception as e:
+                result = {"error": f"{type(e).__name__}: {e}"}
+            else:
+                result = tool_compaction.compact(name, result)
+        messages.append({
+            "role": "tool",
+            "tool_call_id": tc.id,
+            "name": name,
+            "content": json.dumps(result, ensure_ascii=False)
+        })
+    return messages
+
+@dataclass
+class ChatTrace:
+    """一次提问的耗时记录（秒）：首 token 延迟、模型生成、工具执行和循环次数"""
+    question: str = ""
+    model: str = ""
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex)   # 对应 tracing.py 里 span 的 trace_id
+    iterations: int = 0
+    ttft: Optional[float] = None          # 提问到第一个内容/工具 token（仅流式模式）
+    generation_time: float = 0.0          # 所有模型调用的总耗时
+    tool_time: float = 0.0                # 所有工具批次的总耗时（批内并发，按墙钟计）
+    total_time: float = 0.0
+    steps: list = field(default_factory=list)  # 每轮 {"ttft", "generation", "tools", "tool_time"}
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+def _new_messages(user_text: str) -> list:
+    return [
+        {"role": "system", "content": "You are an assistant."},
+        {"role": "user",   "content": user_text}
+    ]
+
+def _run_tools(messages: list, tool_calls, trace: ChatTrace, step: dict, cancel=None):
+    t0 = time.perf_counter()
+    messages.extend(run_tool_calls(tool_calls, cancel))
+    step["tools"] = [tc.function.name for tc in tool_calls]
+    step["tool_time"] = time.perf_counter() - t0
+    trace.tool_time += step["tool_time"]
+
+def chat_stream(
+        user_text: str,
+        model_name: Optional[str] = None,
+        trace: Optional[ChatTrace] = None,
+        cancel: Optional[threading.Event] = None
+    ):
+    """
+    流式版 chat_once：边生成边 yield 文本增量，tool_call 分片按 index 拼接，
+    工具执行完后继续下一轮，直到模型给出最终回答。耗时写入 trace。
+    """
+    if model_name is None:
+        model_name = os.getenv("YOUR_DEPLOYMENT")
+    trace = trace if trace is not None else ChatTrace()
+    trace.question, trace.model = user_text, model_name
+    trace_token = tracing.current_trace.set(trace.trace_id)
+    messages = _new_messages(user_text)
+    start = time.perf_counter()
+
+    try:
+        while True:
+            _check_cancel(cancel)
+            trace.iterations += 1
+            step = {"ttft": None, "generation": 0.0, "tools": [], "tool_time": 0.0}
+            trace.steps.append(step)
+            t0 = time.perf_counter()
+            with tracing.span("llm", model_name, payload_in=messages, stream=True) as sp:
+                rsp = client.chat.completions.create(
+                    model=model_name,
+                    messages=messages,
+                    tools=ALL_SCHEMAS,
+                    tool_choice="auto",
+                    stream=True
+                )
+                content, calls = [], {}        # index -> {"id", "name", "arguments"}
+                for chunk in rsp:
+                    _check_cancel(cancel)
+                    if not chunk.choices:      # Azure 会先发一个只有 prompt_filter_results 的块
+                        continue
+                    delta = chunk.choices[0].delta
+                    if step["ttft"] is None and (delta.content or delta.tool_calls):
+                        step["ttft"] = time.perf_counter() - t0
+                        if trace.ttft is None:
+                            trace.ttft = time.perf_counter() - start
+                    if delta.content:
+                        content.append(delta.content)
+                        yield delta.content
+                    for frag in delta.tool_calls or []:
+                        call = calls.setdefault(frag.index, {"id": None, "name": "", "arguments": ""})
+                        if frag.id:
+                            call["id"] = frag.id
+                        if frag.function and frag.function.name:
+                            call["name"] += frag.function.name
+                        if frag.function and frag.function.arguments:
+                            call["arguments"] += frag.function.arguments
+                sp.set_result({"content": "".join(content), "tool_calls": list(calls.values())}, count=len(calls))
+            step["generation"] = time.perf_counter() - t0
+            trace.generation_time += step["generation"]
+
+            if not calls:
+                return
+            ordered = [calls[i] for i in sorted(calls)]
+            messages.append({
+                "role": "assistant",
+                "content": "".join(content) or None,
+                "tool_calls": [
+                    {"id": c["id"], "type": "function",
+                     "function": {"name": c["name"], "arguments": c["arguments"]}}
+                    for c in ordered
+                ]
+            })
+            tool_calls = [SimpleNamespace(id=c["id"], function=SimpleNamespace(name=c["name"], arguments=c["arguments"]))
+                          for c in ordered]
+            _run_tools(messages, tool_calls, trace, step, cancel)
+    finally:
+        trace.total_time = time.perf_counter() - start
+        tracing.current_trace.reset(trace_token)
+
 def chat_once(
         user_text: str,
-        model_name: Optional[str] = None      # ← 替换掉  str | None
+        model_name: Optional[str] = None,     # ← 替换掉  str | None
+        trace: Optional[ChatTrace] = None,
+        stream: bool = False,
+        cancel: Optional[threading.Event] = None   # 置位后在下一个检查点抛出 ChatCancelled
     ) -> str:
 
+    if stream:
+        return "".join(chat_stream(user_text, model_name, trace, cancel)).strip()
+
     if model_name is None:
         model_name = os.getenv("YOUR_DEPLOYMENT")
+    trace = trace if trace is not None else ChatTrace()
+    trace.question, trace.model = user_text, model_name
+    trace_token = tracing.current_trace.set(trace.trace_id)
 
-    messages = [
-        {"role": "system", "content": "You are an assistant."},
-        {"role": "user",   "content": user_text}
-    ]
-
-    while True:
-        rsp = client.chat.completions.create(
-            model=model_name,          # ← 动态部署名
-            messages=messages,
-            tools=ALL_SCHEMAS,
-            tool_choice="auto"
-        )
-        msg = rsp.choices[0].message
-        if msg.tool_calls:                 # 有工具调用：执行并回传
-            for tc in msg.tool_calls:
-                fn   = TOOLS[tc.function.name]
-                args = json.loads(tc.function.arguments)
-
-                result = fn(**args)
-                messages.append(msg)
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tc.id,
-                    "name": tc.function.name,
-                    "content": json.dumps(result, ensure_ascii=False)
-                })
-            continue                       # 再让模型整合结果
-        else:
-            return msg.content.strip()
+    messages = _new_messages(user_text)
+    start = time.perf_counter()
 
+    try:
+        while True:
+            _check_cancel(cancel)
+            trace.iterations += 1
+            step = {"ttft": None, "generation": 0.0, "tools": [], "tool_time": 0.0}
+            trace.steps.append(step)
+            t0 = time.perf_counter()
+            with tracing.span("llm", model_name, payload_in=messages) as sp:
+                rsp = client.chat.completions.create(
+                    model=model_name,          # ← 动态部署名
+                    messages=messages,
+                    tools=ALL_SCHEMAS,
+                    tool_choice="auto"
+                )
+                sp.set_result(rsp.model_dump(), count=len(rsp.choices[0].message.tool_calls or []))
+            step["generation"] = time.perf_counter() - t0
+            trace.generation_time += step["generation"]
+            msg = rsp.choices[0].message
+            if msg.tool_calls:                 # 有工具调用：并发执行并按顺序回传
+                messages.append(msg)           # 每轮只追加一次 assistant 消息
+                _run_tools(messages, msg.tool_calls, trace, step, cancel)
+                continue                       # 再让模型整合结果
+            else:
+                return msg.content.strip()
+    finally:
+        trace.total_time = time.perf_counter() - start
+        tracing.current_trace.reset(trace_token)
 
 if __name__ == "__main__":
-    print(chat_once("Which PMIDs match “A rare case of rectal malignant melanoma with long-term survival ...”?"))
+    trace = ChatTrace()
+    for delta in chat_stream("Which PMIDs match “A rare case of rectal malignant melanoma with long-term survival ...”?", trace=trace):
+        print(delta, end="", flush=True)
+    print()
+    print(json.dumps(trace.to_dict(), ensure_ascii=False, indent=2))
@@ -0,0 +1,328 @@
+"""
+Batched, cached client for the Open Targets Platform GraphQL API.
+
+ot_associated_diseases / ot_tractability / ot_safety send one request per
+target, ot_safety adds a search request per call to map symbol -> Ensembl ID,
+and ot_associated_diseases downloads every association row before filtering
+by min_score. This client instead:
+
+  * batches many targets (or symbols) into one query with GraphQL aliases,
+  * pages associations server-side (page index/size, rows come ordered by
+    score) and stops paging once a page drops below min_score,
+  * caches symbol -> Ensembl ID and per-target results in bounded LRU caches
+    (the platform data is release-versioned); an alias that came back null
+    (a per-target error) is not cached, so the next call asks again,
+  * reuses a keep-alive HTTP session (one per thread).
+
+    client = OpenTargetsClient()
+    client.associated_diseases_many(["ENSG00000157764", "ENSG00000146648"], min_score=0.5)
+    client.safety_many([("BRAF", "cardiac arrhythmia"), ("EGFR", "rash")])
+
+The module-level ot_associated_diseases / ot_tractability / ot_safety keep the
+tool signatures and go through a shared client.
+"""
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import requests
+
+OT_URL = os.getenv("OT_URL", "https://api.platform.opentargets.org/api/v4/graphql")
+
+ASSOCIATION_FIELDS = "count rows { disease { id name } score }"
+TRACTABILITY_FIELDS = "modality label value"
+SAFETY_FIELDS = "event biosamples { tissueLabel tissueId } effects { dosing direction }"
+
+
+def _literal(value: str) -> str:
+    """ GraphQL string literal (JSON escaping is valid GraphQL)."""
+    return json.dumps(value)
+
+
+def _chunks(items: Sequence, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class OpenTargetsError(RuntimeError):
+    pass
+
+
+_MISSING = object()
+
+
+class _LRU:
+    """ Thread-safe mapping that keeps the `max_entries` most recently used keys."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def __setitem__(self, key, value) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def setdefault(self, key, default):
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = default
+                while len(self._items) > self.max_entries:
+                    self._items.popitem(last=False)
+            self._items.move_to_end(key)
+            return self._items[key]
+
+
+class OpenTargetsClient:
+    def __init__(self, url: str = OT_URL, batch_size: int = 25, page_size: int = 200,
+                 timeout: float = 30, session: Optional[requests.Session] = None, cache_size: int = 20_000):
+        self.url = url
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.timeout = timeout
+        self.session = session
+        self._local = threading.local()
+        self.requests_sent = 0
+        # Each cache keeps the `cache_size` most recently used entries.
+        self._symbols = _LRU(cache_size)            # symbol -> Ensembl ID or None
+        self._tractability = _LRU(cache_size)       # target -> tractability rows
+        self._safety = _LRU(cache_size)             # target -> safety liabilities
+        # target -> (rows fetched so far, score of the last row; -inf once all rows are in)
+        self._associations = _LRU(cache_size)
+        self._lock = threading.Lock()
+        self._associations_lock = threading.Lock()
+
+    # -- transport -----------------------------------------------------------
+
+    def _session(self) -> requests.Session:
+        """ The session passed in, else one keep-alive session per thread (requests.Session is not thread-safe)."""
+        if self.session is not None:
+            return self.session
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def query(self, query: str) -> Dict:
+        """ POST one GraphQL document; errors for individual aliases come back as null fields."""
+        r = self._session().post(self.url, json={"query": query}, timeout=self.timeout)
+        with self._lock:
+            self.requests_sent += 1
+        r.raise_for_status()
+        body = r.json()
+        if body.get("data") is None:
+            raise OpenTargetsError(body.get("errors"))
+        return body["data"]
+
+    def _aliased(self, parts: Dict[str, str]) -> Dict:
+        """ Run {alias: selection} as a single query."""
+        return self.query("{ " + " ".join(f"{alias}: {selection}" for alias, selection in parts.items()) + " }")
+
+    # -- symbol -> Ensembl ID ------------------------------------------------
+
+    def resolve_symbols(self, symbols: Iterable[str]) -> Dict[str, Optional[str]]:
+        """ {symbol: Ensembl gene ID or None}; unresolved symbols are cached too, failed searches are not."""
+        symbols = list(dict.fromkeys(symbols))
+        resolved = {s: self._symbols.get(s, _MISSING) for s in symbols}
+        resolved = {s: v for s, v in resolved.items() if v is not _MISSING}
+        missing = [s for s in symbols if s not in resolved]
+        for chunk in _chunks(missing, self.batch_size):
+            data = self._aliased({
+                f"s{i}": f"search(queryString: {_literal(symbol)}, entityNames: [\"target\"], "
+                         f"page: {{index: 0, size: 5}}) {{ hits {{ id entity name }} }}"
+                for i, symbol in enumerate(chunk)
+            })
+            for i, symbol in enumerate(chunk):
+                node = data.get(f"s{i}")
+                if node is None:
+                    resolved[symbol] = None
+                    continue
+                hits = node.get("hits") or []
+                targets = [h for h in hits if h.get("entity") == "target"]
+                # Prefer an exact approved-symbol match over the top-ranked hit.
+                exact = [h for h in targets if (h.get("name") or "").upper() == symbol.upper()]
+                chosen = (exact or targets or [None])[0]
+                resolved[symbol] = self._symbols[symbol] = chosen["id"] if chosen else None
+        return {s: resolved[s] for s in symbols}
+
+    # -- associated diseases --------------------------------------------------
+
+    def associated_diseases_many(self, target_ids: Iterable[str], min_score: float = 0.5) -> Dict[str, List[Dict]]:
+        """
+        {target_id: [{"disease": {"id", "name"}, "score"}, ...]} with score >= min_score.
+
+        Rows come from the server ordered by score, so pages are requested
+        only while the last row seen is still >= min_score. Each round sends
+        one aliased query for all targets that still need a page; rows already
+        fetched are reused by later calls (also with a lower min_score).
+        A target whose page comes back null keeps the rows fetched before the
+        error and is retried on the next call.
+        """
+        target_ids = list(dict.fromkeys(target_ids))
+        self._fetch_associations(target_ids, min_score)
+        with self._associations_lock:
+            return {
+                target: [row for row in self._associations.get(target, ([], 0))[0] if row["score"] >= min_score]
+                for target in target_ids
+            }
+
+    def _next_pages(self, target_ids: Iterable[str], min_score: float, failed=()) -> Dict[str, int]:
+        """ {target: next page index} for targets whose cached rows may not reach min_score yet."""
+        pending = {}
+        with self._associations_lock:
+            for target in target_ids:
+                if target in failed:
+                    continue
+                rows, last = self._associations.setdefault(target, ([], float("inf")))
+                if last >= min_score:          # ties with min_score may continue on the next page
+                    pending[target] = len(rows) // self.page_size
+        return pending
+
+    def _fetch_associations(self, target_ids: List[str], min_score: float) -> None:
+        """
+        Page associations into the cache. The lock is held only to read and
+        update the cache, not across requests; a page that another thread
+        added in the meantime is not added twice.
+        """
+        pending = self._next_pages(target_ids, min_score)
+        failed = set()
+        while pending:
+            round_ = {}
+            for chunk in _chunks(list(pending), self.batch_size):
+                data = self._aliased({
+                    f"t{i}": f"target(ensemblId: {_literal(target)}) {{ associatedDiseases("
+                             f"page: {{index: {pending[target]}, size: {self.page_size}}}) {{ {ASSOCIATION_FIELDS} }} }}"
+                    for i, target in enumerate(chunk)
+                })
+                for i, target in enumerate(chunk):
+                    node = data.get(f"t{i}")
+                    if node is None:            # errored alias: leave the cache as it is
+                        failed.add(target)
+                    else:
+                        round_[target] = node.get("associatedDiseases") or {"count": 0, "rows": []}
+            with self._associations_lock:
+                for target, page in round_.items():
+                    rows, _ = self._associations.get(target, ([], float("inf")))
+                    if len(rows) == pending[target] * self.page_size:
+                        rows = rows + page["rows"]
+                        exhausted = not page["rows"] or len(rows) >= (page.get("count") or 0)
+                        last = float("-inf") if exhausted else page["rows"][-1]["score"]
+                        self._associations[target] = (rows, last)
+            pending = self._next_pages(pending, min_score, failed)
+
+    # -- tractability / safety --------------------------------------------------
+
+    def _target_field_many(self, cache: _LRU, field: str, selection: str, target_ids: Iterable[str]) -> Dict:
+        """ {target: field rows, or None when the target's alias came back null}; only non-null results are cached."""
+        target_ids = list(dict.fromkeys(target_ids))
+        found = {t: cache.get(t, _MISSING) for t in target_ids}
+        found = {t: v for t, v in found.items() if v is not _MISSING}
+        missing = [t for t in target_ids if t not in found]
+        for chunk in _chunks(missing, self.batch_size):
+            data = self._aliased({
+                f"t{i}": f"target(ensemblId: {_literal(target)}) {{ {field} {{ {selection} }} }}"
+                for i, target in enumerate(chunk)
+            })
+            for i, target in enumerate(chunk):
+                node = data.get(f"t{i}")
+                if node is None:
+                    found[target] = None
+                else:
+                    found[target] = cache[target] = node.get(field) or []
+        return {t: found[t] for t in target_ids}
+
+    def tractability_many(self, target_ids: Iterable[str], value: bool = True) -> Dict[str, List[Dict]]:
+        """ {target_id: tractability rows whose value is `value`}."""
+        rows = self._target_field_many(self._tractability, "tractability", TRACTABILITY_FIELDS, target_ids)
+        return {t: [r for r in (v or []) if r["value"] is value] for t, v in rows.items()}
+
+    def safety_liabilities_many(self, target_ids: Iterable[str]) -> Dict[str, Optional[List[Dict]]]:
+        return self._target_field_many(self._safety, "safetyLiabilities", SAFETY_FIELDS, target_ids)
+
+    def safety_many(self, pairs: Iterable[Tuple[str, str]]) -> List[Dict]:
+        """ ot_safety for many (symbol, event) pairs: one search round plus one target round in total."""
+        pairs = list(pairs)
+        ids = self.resolve_symbols(symbol for symbol, _ in pairs)
+        liabilities = self.safety_liabilities_many(t for t in ids.values() if t)
+        results = []
+        for symbol, event in pairs:
+            target = ids.get(symbol)
+            match = {}
+            for row in liabilities.get(target) or [] if target else []:
+                if (row.get("event") or "").lower() == event.lower():
+                    match = {"biosamples": row["biosamples"], "effects": row["effects"]}
+                    break
+            results.append(match)
+        return results
+
+
+_client: Optional[OpenTargetsClient] = None
+_client_lock = threading.Lock()
+
+
+def client() -> OpenTargetsClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenTargetsClient()
+        return _client
+
+
+# Drop-in replacements for the single-target tool functions.
+
+def ot_associated_diseases(target_id: str, min_score: float = 0.5) -> List[Dict]:
+    return client().associated_diseases_many([target_id], min_score)[target_id]
+
+
+def ot_tractability(target_id: str, value: bool = True) -> List[Dict]:
+    return client().tractability_many([target_id], value)[target_id]
+
+
+def ot_safety(symbol: str, event: str) -> Dict:
+    return client().safety_many([(symbol, event)])[0]
+
+
+if __name__ == "__main__":
+    # Sweep a dataset/target_*.json benchmark: resolve every symbol, then fetch
+    # all associations / tractability / safety liabilities in batched rounds.
+    import re
+    import sys
+    import time
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python opentargets_client.py dataset/target_*.json")
+    symbol_re = re.compile(r"(?:approved symbol|approvedSymbol as|(?:for|with) the target|for the)\s+`?([A-Z0-9][A-Z0-9-]*)\b")
+    c = OpenTargetsClient()
+    start = time.perf_counter()
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)
+        symbols = [m.group(1) for m in (symbol_re.search(item["question"]) for item in items) if m]
+        ids = [t for t in c.resolve_symbols(symbols).values() if t]
+        if "associated_disease" in path:
+            c.associated_diseases_many(ids, min_score=0.5)
+        elif "tractability" in path:
+            c.tractability_many(ids)
+        elif "safety" in path:
+            c.safety_liabilities_many(ids)
+        print(f"{path}: {len(items)} questions, {len(symbols)} symbols, {len(ids)} resolved")
+    print(f"{c.requests_sent} requests in {time.perf_counter() - start:.1f}s")
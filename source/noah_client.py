@@ -0,0 +1,278 @@
+"""
+Client for the Noah tool_test API with keep-alive sessions, per-call
+deadlines and a bounded-concurrency, resumable batch runner.
+
+The endpoint is synchronous (one POST per question, up to ~2 min for a tool
+report and 10-12 min for the agent), so concurrency comes from running many
+calls at once on a bounded worker pool instead of one after another:
+
+    client = NoahClient(max_concurrency=8)
+    future = client.submit("tool", "减肥药的最新竞争格局", tool="Drug-Analysis", deadline=300)
+    future.result()
+
+    # prompts.jsonl: {"id"?, "prompt", "tool"?, "language"?, "mode"?} per line
+    client.run_batch(load_jobs("prompts.jsonl", mode="tool", tool="Drug-Analysis"),
+                     "results.jsonl")
+
+run_batch appends one JSON line per finished job to the results file and
+flushes it, so after a crash the same command picks up where it stopped:
+jobs whose id already has a successful record are skipped (failed ones are
+retried). Only {"result": "success"} responses count as successful; HTTP
+errors and other bodies raise NoahError and are recorded as errors.
+
+    python noah_client.py prompts.jsonl results.jsonl --mode tool --tool Drug-Analysis --concurrency 8
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Iterable, Iterator, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+import requests
+import urllib3
+
+NOAH_URL = os.getenv("NOAH_URL", "https://staging.noahai.co/api/tool_test/")
+NOAH_TOKEN = os.getenv("NOAH_TOKEN", "ab2af44c17490f0c3c3b221b0f6fc2c20d62590a")
+
+# Default deadlines (seconds) per call type, matching the old request timeouts.
+DEADLINES = {
+    "slot_fill": 30,
+    "tool": 240,
+    "agent": 1200,
+}
+CONNECT_TIMEOUT = 10
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)   # verify=False, as before
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class NoahError(RuntimeError):
+    """ An HTTP error status, or a body whose "result" is not "success"; `response` keeps the body."""
+
+    def __init__(self, message: str, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+def job_id(mode: str, prompt: str, tool: Optional[str] = None, language: str = "en") -> str:
+    """ Stable id for a job, so results can be matched back after a restart."""
+    key = json.dumps([mode, tool, language, prompt], ensure_ascii=False)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class NoahClient:
+    def __init__(self, url: str = NOAH_URL, token: str = NOAH_TOKEN, max_concurrency: int = 4,
+                 retries: int = 2, verify: bool = False):
+        self.url = url
+        self.headers = {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "authorization": f"Token {token}"}
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.verify = verify
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="noah")
+
+    def _session(self) -> requests.Session:
+        """ One keep-alive session per thread (requests.Session is not thread-safe)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update(self.headers)
+        return session
+
+    # -- single calls ------------------------------------------------------------
+
+    def _post(self, body: Dict, deadline: float):
+        """
+        POST `body`, retrying connection errors and 5xx responses until
+        `deadline` seconds have passed. The read timeout of every attempt is
+        the time left, so no call outlives its deadline by more than the
+        connect timeout.
+
+        Returns the parsed body of a {"result": "success", ...} response;
+        raises NoahError for any status >= 400 or any other body.
+        """
+        end = time.monotonic() + deadline
+        attempt = 0
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"no response within {deadline}s")
+            try:
+                response = self._session().post(self.url, data=json.dumps(body), allow_redirects=True,
+                                                 timeout=(min(CONNECT_TIMEOUT, remaining), remaining),
+                                                 verify=self.verify)
+                if response.status_code < 500 or attempt >= self.retries:
+                    break
+            except requests.Timeout:
+                raise DeadlineExceeded(f"no response within {deadline}s")
+            except requests.ConnectionError:
+                if attempt >= self.retries:
+                    raise
+            attempt += 1
+            time.sleep(min(2 ** attempt, max(0.0, end - time.monotonic())))
+        try: ret = response.json()
+        except ValueError: ret = response.text
+        if response.status_code >= 400:
+            raise NoahError(f"HTTP {response.status_code}: {str(ret)[:200]}", ret)
+        if not (isinstance(ret, dict) and ret.get("result") == "success"):
+            raise NoahError(f"unsuccessful response: {str(ret)[:200]}", ret)
+        return ret
+
+    def slot_fill(self, prompt: str, tool: str, language: str = "en", deadline: Optional[float] = None):
+        """ Question -> query parameters; {'result': 'success', 'data': <dict>}."""
+        body = {"language": language, "user_prompt": prompt, "tool": tool, "slot_fill": True}
+        return self._post(body, deadline or DEADLINES["slot_fill"])
+
+    def tool(self, prompt: str, tool: str, language: str = "en", deadline: Optional[float] = None):
+        """ Question -> report; {'result': 'success', 'data': <txt>}."""
+        body = {"language": language, "user_prompt": prompt, "tool": tool, "slot_fill": False}
+        return self._post(body, deadline or DEADLINES["tool"])
+
+    def agent(self, prompt: str, language: str = "en", deadline: Optional[float] = None):
+        """ Question -> agent report; {'result': 'success', 'data': <txt>}."""
+        body = {"language": language, "user_prompt": prompt, "tool": "agent"}
+        return self._post(body, deadline or DEADLINES["agent"])
+
+    def call(self, mode: str, prompt: str, tool: Optional[str] = None, language: str = "en",
+             deadline: Optional[float] = None):
+        if mode == "agent":
+            return self.agent(prompt, language, deadline)
+        if mode not in ("slot_fill", "tool"):
+            raise ValueError(f"Unknown mode: {mode}")
+        return getattr(self, mode)(prompt, tool, language, deadline)
+
+    def submit(self, mode: str, prompt: str, tool: Optional[str] = None, language: str = "en",
+               deadline: Optional[float] = None) -> Future:
+        """ Run call() on the worker pool; at most max_concurrency calls are in flight."""
+        return self._executor.submit(self.call, mode, prompt, tool, language, deadline)
+
+    # -- batches -----------------------------------------------------------------
+
+    def run_batch(self, jobs: Iterable[Dict], out_path: str, deadline: Optional[float] = None,
+                  progress: bool = True) -> Dict[str, Dict]:
+        """
+        Run every job not yet completed in `out_path` and append its record there.
+
+        Args:
+            jobs: dicts with "prompt" and optional "id", "mode" (default "tool"),
+                "tool", "language".
+            out_path: results JSONL; one {"id", "mode", "tool", "language",
+                "prompt", "elapsed", "response" | "error"} record per finished job.
+            deadline: seconds per call (default: DEADLINES[mode]).
+
+        Returns:
+            {id: latest record} for all jobs, including the ones done in earlier runs.
+        """
+        done = {rid: rec for rid, rec in load_results(out_path).items() if "error" not in rec}
+        todo, queued = [], set()
+        for job in jobs:
+            job = dict(job)
+            job.setdefault("mode", "tool")
+            job.setdefault("language", "en")
+            job.setdefault("tool", None)
+            job.setdefault("id", job_id(job["mode"], job["prompt"], job["tool"], job["language"]))
+            if job["id"] not in done and job["id"] not in queued:
+                queued.add(job["id"])
+                todo.append(job)
+        if progress:
+            print(f"{len(done)} done, {len(todo)} to run ({self.max_concurrency} concurrent)")
+
+        def run(job):
+            start = time.monotonic()
+            record = {k: job[k] for k in ("id", "mode", "tool", "language", "prompt")}
+            try:
+                record["response"] = self.call(job["mode"], job["prompt"], job["tool"], job["language"],
+                                               deadline or job.get("deadline"))
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+            record["elapsed"] = round(time.monotonic() - start, 3)
+            return record
+
+        results = dict(done)
+        _close_torn_line(out_path)
+        with open(out_path, "a", encoding="utf-8") as out:
+            futures = [self._executor.submit(run, job) for job in todo]
+            try:
+                for i, future in enumerate(as_completed(futures), 1):
+                    record = future.result()
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    results[record["id"]] = record
+                    if progress:
+                        status = "error: " + record["error"] if "error" in record else "ok"
+                        print(f"[{i}/{len(todo)}] {record['id']} {record['elapsed']:.1f}s {status}")
+            except KeyboardInterrupt:
+                for future in futures:
+                    future.cancel()
+                raise
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _close_torn_line(path: str) -> None:
+    """ Terminate a last line cut off by a crash so the next record starts on its own line."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def load_results(path: str) -> Dict[str, Dict]:
+    """ {id: last record} from a results JSONL; a torn last line (crash mid-write) is ignored."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            results[record["id"]] = record
+    return results
+
+
+def load_jobs(path: str, **defaults) -> Iterator[Dict]:
+    """ Jobs from a JSONL file (one object with at least "prompt" per line) or a plain text file (one prompt per line)."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            job = json.loads(line) if path.endswith(".jsonl") else {"prompt": line}
+            yield {**defaults, **job}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run prompts through the Noah tool_test API concurrently.")
+    parser.add_argument("prompts", help="prompts file (.jsonl objects or .txt, one prompt per line)")
+    parser.add_argument("out", help="results JSONL (appended to; rerun to resume)")
+    parser.add_argument("--mode", choices=sorted(DEADLINES), default="tool")
+    parser.add_argument("--tool", help="Noah tool for slot_fill / tool mode, e.g. Drug-Analysis")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--deadline", type=float, help="seconds per call (default depends on --mode)")
+    args = parser.parse_args()
+
+    defaults = {"mode": args.mode, "language": args.language}
+    if args.tool:
+        defaults["tool"] = args.tool
+    client = NoahClient(max_concurrency=args.concurrency)
+    results = client.run_batch(load_jobs(args.prompts, **defaults), args.out, args.deadline)
+    failed = sum(1 for r in results.values() if "error" in r)
+    print(f"{len(results) - failed} succeeded, {failed} failed -> {args.out}")
+    client.close()
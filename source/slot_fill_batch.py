@@ -0,0 +1,192 @@
+"""
+Batch slot-filling over whole datasets, deduplicated and cached.
+
+Every (prompt, tool, language) is normalized first: Unicode NFKC, case-folded,
+whitespace collapsed, trailing punctuation dropped. Near-identical prompts
+then share one slot-fill call. Successful results are kept in a SQLite file
+keyed by the normalized triple, so a rerun (or another dataset with
+overlapping questions) only calls the API for prompts it has never seen.
+Cache misses run concurrently on a NoahClient pool. Results stream out as
+JSONL, one line per input row: cache hits first, then misses as they finish.
+
+    python slot_fill_batch.py ../dataset/medical_qa.json slots.jsonl \
+        --tool General-Inference --tool Drug-Analysis --concurrency 8
+
+Input is a .json list (bare or as {"dataset": [...]}) or .jsonl file of objects with a "question" / "prompt"
+field (optionally "tool" and "language"), or a .txt file with one prompt per line.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from concurrent.futures import as_completed
+
+from noah_client import NoahClient
+
+TRAILING_PUNCT = re.compile(r"[\s?？!！.。,，;；:：]+$")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """ Key under which near-identical prompts collapse ("What is X ?" == "what is  x")."""
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    text = WHITESPACE.sub(" ", text).strip()
+    return TRAILING_PUNCT.sub("", text)
+
+
+def cache_key(prompt: str, tool: str, language: str = "en") -> str:
+    return json.dumps([tool, language, normalize_prompt(prompt)], ensure_ascii=False)
+
+
+class SlotCache:
+    """ (prompt, tool, language) -> slot-fill response, in a SQLite file shared across runs."""
+
+    def __init__(self, path: str = "slot_fill_cache.sqlite"):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS slot_fill_cache "
+            "(key TEXT PRIMARY KEY, tool TEXT NOT NULL, prompt TEXT NOT NULL, stored_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, value FROM slot_fill_cache WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def put(self, key: str, tool: str, prompt: str, value) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO slot_fill_cache (key, tool, prompt, stored_at, value) VALUES (?, ?, ?, ?, ?)",
+                (key, tool, prompt, time.time(), json.dumps(value, ensure_ascii=False)),
+            )
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def _succeeded(response) -> bool:
+    return isinstance(response, dict) and response.get("result") == "success"
+
+
+def slot_fill_batch(rows: Iterable[Tuple[str, str, str]],
+                    client: NoahClient,
+                    cache: SlotCache,
+                    deadline: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Slot-fill (prompt, tool, language) rows, yielding one record per row.
+
+    Records are {"index", "prompt", "tool", "language", "cached", "response" | "error"}.
+    Rows served from the cache are yielded first, the rest as their call
+    completes; each distinct normalized prompt is sent once, and only
+    successful responses are cached.
+    """
+    rows = list(rows)
+    groups: Dict[str, List[int]] = {}
+    for index, (prompt, tool, language) in enumerate(rows):
+        groups.setdefault(cache_key(prompt, tool, language), []).append(index)
+    hits = cache.get_many(groups)
+
+    def record(index, cached, response=None, error=None):
+        prompt, tool, language = rows[index]
+        out = {"index": index, "prompt": prompt, "tool": tool, "language": language, "cached": cached}
+        if error is None:
+            out["response"] = response
+        else:
+            out["error"] = error
+        return out
+
+    for key, response in hits.items():
+        for index in groups[key]:
+            yield record(index, True, response)
+
+    # One call per distinct miss, sent with the first occurrence's wording.
+    futures = {}
+    for key, indexes in groups.items():
+        if key not in hits:
+            prompt, tool, language = rows[indexes[0]]
+            futures[client.submit("slot_fill", prompt, tool, language, deadline)] = key
+    try:
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                response, error = future.result(), None
+            except Exception as e:
+                response, error = None, f"{type(e).__name__}: {e}"
+            if error is None and _succeeded(response):
+                prompt, tool, _ = rows[groups[key][0]]
+                cache.put(key, tool, prompt, response)
+            elif error is None:
+                error = f"unsuccessful response: {str(response)[:200]}"
+            for index in groups[key]:
+                yield record(index, False, response, error)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def load_rows(path: str, tools: List[str], language: str = "en") -> List[Tuple[str, str, str]]:
+    """ (prompt, tool, language) rows: every prompt in `path` against every tool in `tools` (or the row's own "tool")."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            items = json.load(f)
+            if isinstance(items, dict):          # {"dataset": [...]}, as in dataset/MAIA.json
+                items = items.get("dataset", items)
+        elif path.endswith(".jsonl"):
+            items = [json.loads(line) for line in f if line.strip()]
+        else:
+            items = [{"prompt": line.strip()} for line in f if line.strip()]
+    rows = []
+    for item in items:
+        prompt = item.get("prompt") or item.get("question")
+        if not prompt:
+            continue
+        for tool in ([item["tool"]] if item.get("tool") else tools):
+            rows.append((prompt, tool, item.get("language", language)))
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Deduplicated, cached slot-filling through the Noah API.")
+    parser.add_argument("input", help=".json / .jsonl dataset (question or prompt field) or .txt prompts")
+    parser.add_argument("out", help="output JSONL, one record per input row")
+    parser.add_argument("--tool", action="append", default=[], help="Noah tool; repeat for several")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--cache", default=os.getenv("SLOT_FILL_CACHE", "slot_fill_cache.sqlite"))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--deadline", type=float, help="seconds per call (default 30)")
+    args = parser.parse_args()
+
+    rows = load_rows(args.input, args.tool, args.language)
+    if not rows:
+        parser.error("no rows: give --tool or a dataset whose rows carry a tool")
+    distinct = len({cache_key(*row) for row in rows})
+    client = NoahClient(max_concurrency=args.concurrency)
+    cache = SlotCache(args.cache)
+    counts = {"cached": 0, "called": 0, "errors": 0}
+    start = time.perf_counter()
+    with open(args.out, "w", encoding="utf-8") as out:
+        for rec in slot_fill_batch(rows, client, cache, args.deadline):
+            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            out.flush()
+            counts["errors" if "error" in rec else "cached" if rec["cached"] else "called"] += 1
+    print(f"{len(rows)} rows, {distinct} distinct: {counts['cached']} from cache, "
+          f"{counts['called']} via API, {counts['errors']} failed in {time.perf_counter() - start:.1f}s")
+    cache.close()
+    client.close()
@@ -0,0 +1,108 @@
+import os
+import sys
+import sqlite3
+
+# The scripts under code/ and source/ import their siblings by name (they are
+# run from their own directory), so the tests put those directories on the path.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in (ROOT, os.path.join(ROOT, "code"), os.path.join(ROOT, "source")):
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+
+
+import pytest
+
+# A small UMLS subset: C0000001 is a hub with more relations than one test
+# page, so pagination and batching both have something to split.
+CONCEPTS = {f"C{i:07d}": f"Concept {i:02d}" for i in range(1, 41)}
+RELATIONS = (
+    [("C0000001", "RO", "associated_with", f"C{i:07d}", "MSH") for i in range(2, 26)]
+    + [(f"C{i:07d}", "RO", "associated_with", "C0000001", "MSH") for i in range(26, 31)]
+    + [("C0000001", "RO", "may_treat", "C0000031", "MED-RT"), ("C0000001", "RO", "may_treat", "C0000032", "MED-RT"),
+       ("C0000001", "RO", None, "C0000033", "NCI"),
+       ("C0000001", "RO", "associated_with", "C0000099", "MSH"),          # no name: dropped by the joins
+       ("C0000034", "PAR", "inverse_isa", "C0000001", "SNOMEDCT_US"),
+       ("C0000001", "PAR", "inverse_isa", "C0000035", "SNOMEDCT_US"),
+       ("C0000001", "RO", "has_manifestation", "C0000036", "SNOMEDCT_US"),
+       ("C0000001", "RO", "has_associated_finding", "C0000037", "SNOMEDCT_US"),
+       ("C0000038", "RO", "tradename_of", "C0000039", "RXNORM"),
+       ("C0000002", "RO", "may_treat", "C0000031", "MED-RT"),
+       ("C0000002", "RO", "associated_with", "C0000003", "MSH")]
+)
+
+
+def _write_rrf(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write("|".join("" if value is None else value for value in row) + "|\n")
+
+
+@pytest.fixture(scope="session")
+def umls_db_path(tmp_path_factory):
+    """ An offline SQLite UMLS database built from RRF files of the subset above."""
+    import umls_local
+
+    rrf = tmp_path_factory.mktemp("rrf")
+    _write_rrf(rrf / "MRCONSO.RRF", [
+        (cui, "ENG", "P", "L", "PF", "S", "Y", "A", "", "", "", "SNOMEDCT_US", "PT", "1", name, "0", "N", "")
+        for cui, name in CONCEPTS.items()
+    ] + [("C0000001", "ENG", "S", "L", "VO", "S", "N", "A", "", "", "", "MSH", "SY", "2", "Hub synonym", "0", "N", "")])
+    _write_rrf(rrf / "MRREL.RRF", [
+        (cui1, "A", "CUI", rel, cui2, "A", "CUI", rela, "R", "", sab, sab, "", "Y", "N", "")
+        for cui1, rel, rela, cui2, sab in RELATIONS
+    ])
+    _write_rrf(rrf / "MRSTY.RRF", [(cui, "T047", "B2.2.1.2.1", "Disease or Syndrome", "AT", "")
+                                   for cui in CONCEPTS])
+    _write_rrf(rrf / "MRDEF.RRF", [("C0000001", "A", "AT", "", "MSH", "The hub concept.", "N", "")])
+    db = tmp_path_factory.mktemp("db") / "umls.sqlite"
+    umls_local.build_database(str(rrf), str(db))
+    with sqlite3.connect(db) as connection:      # as the UMLS MySQL load scripts do (NULLIF)
+        connection.execute("UPDATE MRREL SET RELA = NULL WHERE RELA = ''")
+    connection.close()
+    return str(db)
+
+
+@pytest.fixture(scope="session")
+def umls_db(umls_db_path):
+    """ kg.py pointed at umls_db_path, with result caching off."""
+    import kg
+
+    kg.configure_backend("sqlite", umls_db_path)
+    kg.disable_cache()
+    kg.disable_term_index()
+    yield kg
+    kg.pool.close()
+
+
+def _install_fake_tools():
+    """ tools.schema / tools.impl are not part of this repository; demo_agent only needs their names."""
+    import types
+
+    def unavailable(**kwargs):
+        raise RuntimeError("tools.impl is not available in the tests")
+
+    impl = types.ModuleType("tools.impl")
+    for name in ("pubmed_search", "umls_concept_lookup", "umls_get_related", "oncology_path_query", "umls_cui_to_name"):
+        setattr(impl, name, unavailable)
+    schema = types.ModuleType("tools.schema")
+    schema.ALL_SCHEMAS = []
+    package = types.ModuleType("tools")
+    package.impl, package.schema = impl, schema
+    sys.modules.setdefault("tools", package)
+    sys.modules.setdefault("tools.impl", impl)
+    sys.modules.setdefault("tools.schema", schema)
+
+
+@pytest.fixture(scope="session")
+def demo_agent():
+    """ demo_agent with stand-in tools and the tool result cache off; tests replace TOOLS entries."""
+    os.environ["TOOL_CACHE"] = "0"
+    _install_fake_tools()
+    import demo_agent
+    return demo_agent
+
+
+def tool_call(name, arguments="{}", call_id=None):
+    """ An assistant tool_call as the OpenAI SDK returns it."""
+    import types
+    return types.SimpleNamespace(id=call_id or name, function=types.SimpleNamespace(name=name, arguments=arguments))
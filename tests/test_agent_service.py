@@ -0,0 +1,83 @@
+import time
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def service(demo_agent, monkeypatch):
+    """ AgentService (1 worker, queue 1) around a stub chat_once that runs until released or cancelled."""
+    import agent_service
+
+    release = threading.Event()
+    seen = {"cancelled": []}
+
+    def chat_once(question, model=None, trace=None, stream=False, cancel=None):
+        while not release.is_set():
+            if cancel.wait(0.01):
+                seen["cancelled"].append(question)
+                raise demo_agent.ChatCancelled("chat cancelled")
+        return f"answer to {question}"
+
+    monkeypatch.setattr(demo_agent, "chat_once", chat_once)
+    svc = agent_service.AgentService(workers=1, queue=1, timeout=5, tool_workers=demo_agent.TOOL_MAX_WORKERS)
+    svc.release, svc.seen = release, seen
+    yield svc
+    release.set()
+    svc.shutdown()
+
+
+def submit(service, question, results, **kwargs):
+    thread = threading.Thread(target=lambda: results.__setitem__(question, service.chat(question, **kwargs)))
+    thread.start()
+    return thread
+
+
+def wait_inflight(service, n):
+    deadline = time.monotonic() + 2
+    while service.health()["inflight"] < n and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_full_queue_is_rejected_immediately(service):
+    results = {}
+    threads = [submit(service, "q1", results)]
+    wait_inflight(service, 1)
+    threads.append(submit(service, "q2", results))
+    wait_inflight(service, 2)
+    start = time.monotonic()
+    status, body = service.chat("q3")
+    assert status == 503 and time.monotonic() - start < 0.5
+    service.release.set()
+    for thread in threads:
+        thread.join()
+    assert [results[q][0] for q in ("q1", "q2")] == [200, 200]
+    assert results["q2"][1]["answer"] == "answer to q2"
+    assert service.chat("q4")[0] == 200          # admission slots were given back
+
+
+def test_timeout_cancels_the_chat(service):
+    status, body = service.chat("slow", timeout=0.2)
+    assert status == 504 and body["error"] == "timed out after 0.2s"
+    deadline = time.monotonic() + 2
+    while not service.seen["cancelled"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert service.seen["cancelled"] == ["slow"]
+    service.release.set()
+    assert service.chat("next")[0] == 200
+
+
+def test_cancel_by_id(service):
+    results = {}
+    thread = submit(service, "q", results)
+    wait_inflight(service, 1)
+    request_id, = service._inflight
+    assert service.cancel(request_id)
+    thread.join()
+    assert results["q"][0] == 499
+    assert not service.cancel(request_id)
+
+
+@pytest.mark.parametrize("timeout", [0, -1, "10", True, float("nan")])
+def test_invalid_timeout(service, timeout):
+    assert service.chat("q", timeout=timeout)[0] == 400
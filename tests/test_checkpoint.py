@@ -0,0 +1,57 @@
+import json
+
+from checkpoint import Checkpoint, occurrence_ids
+
+
+def test_records_survive_reopen(tmp_path):
+    path = tmp_path / "run.jsonl"
+    ckpt = Checkpoint(path, fsync="never")
+    ckpt.append("a", {"q": 1})
+    ckpt.append("b", [1, 2])
+    ckpt.close()
+
+    reopened = Checkpoint(path, fsync="never")
+    assert reopened.completed() == {"a", "b"}
+    assert reopened.records() == {"a": {"q": 1}, "b": [1, 2]}
+    reopened.close()
+
+
+def test_torn_last_line_is_truncated(tmp_path):
+    path = tmp_path / "run.jsonl"
+    good = json.dumps({"id": "a", "result": 1}) + "\n"
+    path.write_text(good + '{"id": "b", "res', encoding="utf-8")
+
+    ckpt = Checkpoint(path, fsync="never")
+    assert ckpt.completed() == {"a"}
+    assert path.read_text(encoding="utf-8") == good
+
+    ckpt.append("b", 2)
+    ckpt.close()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["a", "b"]
+
+
+def test_undecodable_line_drops_the_rest(tmp_path):
+    path = tmp_path / "run.jsonl"
+    path.write_text('{"id": "a", "result": 1}\nnot json\n{"id": "c", "result": 3}\n', encoding="utf-8")
+
+    ckpt = Checkpoint(path, fsync="never")
+    assert ckpt.completed() == {"a"}
+    ckpt.close()
+    assert path.read_text(encoding="utf-8") == '{"id": "a", "result": 1}\n'
+
+
+def test_compact_follows_order_and_fallback(tmp_path):
+    ckpt = Checkpoint(tmp_path / "run.jsonl", fsync="never")
+    ckpt.append("b", "B")
+    ckpt.append("a", "A")
+    out = tmp_path / "out.json"
+
+    written = ckpt.compact(out, order=["a", "x", "b", "c"], fallback={"c": "C"},
+                           wrap=lambda items: {"dataset": items})
+    assert written == 3
+    assert json.loads(out.read_text(encoding="utf-8")) == {"dataset": ["A", "B", "C"]}
+
+
+def test_occurrence_ids():
+    assert list(occurrence_ids(["x", "y", "x", "x"])) == ["x", "y", "x#2", "x#3"]
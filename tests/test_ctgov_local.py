@@ -0,0 +1,46 @@
+import csv
+
+import ctgov_local
+from ctgov_local import TrialsEngine
+
+HEADER = ["NCT ID", "Acronym", "Overall Status", "Start Date", "Conditions", "Interventions", "Locations",
+          "Primary Completion Date", "Study First Post Date", "Last Update Post Date", "Study Type", "Phases"]
+
+
+def engine(tmp_path, rows):
+    path = tmp_path / "trials.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for nct, conditions, interventions, locations in rows:
+            writer.writerow([nct, "", "COMPLETED", "2010-05", conditions, interventions, locations,
+                             "", "", "", "INTERVENTIONAL", "PHASE3"])
+    return TrialsEngine.load(str(path))
+
+
+def test_export_items_split_on_pipe(tmp_path):
+    e = engine(tmp_path, [
+        ("NCT1", "Lymphoma, Non-Hodgkin|Leukemia", "FOLFIRI (5-Fluorouracil, Folinic acid, Irinotecan)|Placebo",
+         "Mayo Clinic, Rochester, Minnesota, 55905, United States|Charite, Berlin, 10117, Germany"),
+        ("NCT2", "Lymphoma|Hodgkin Disease", "Irinotecan", "No locations listed"),
+    ])
+    assert e.conditions[0] == ["Lymphoma, Non-Hodgkin", "Leukemia"]
+    assert e.search("conditions=Non-Hodgkin Lymphoma") == ["NCT1"]
+    assert e.search("interventions.name=folinic irinotecan") == ["NCT1"]
+    assert e.countries[0] == ["United States", "Germany"]
+    assert e.search("locations.country=Germany") == ["NCT1"]
+
+
+def test_comma_joined_snapshot(tmp_path):
+    e = engine(tmp_path, [
+        ("NCT1", "Multiple Myeloma", "CC-5013, Dexamethasone", "Hoover - United States, Sydney - Australia"),
+    ])
+    assert e.interventions[0] == ["CC-5013", "Dexamethasone"]
+    assert e.search("interventions.name=Dexamethasone;locations.country=Australia") == ["NCT1"]
+
+
+def test_ctgov_search_max_results(tmp_path, monkeypatch):
+    e = engine(tmp_path, [(f"NCT{i}", "Asthma", "Placebo", "No locations listed") for i in range(5)])
+    monkeypatch.setattr(ctgov_local, "_engine", e)
+    assert ctgov_local.ctgov_search("conditions=Asthma", max_results=2) == ["NCT0", "NCT1"]
+    assert len(ctgov_local.ctgov_search("conditions=Asthma")) == 5
@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+import ctgov_stream
+
+
+class FakeApi:
+    """ Serves `total` studies in pages of pageSize, projected to the requested fields."""
+
+    def __init__(self, total):
+        self.total = total
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, params, timeout):
+        with self._lock:
+            self.requests.append(dict(params))
+        start = int(params.get("pageToken", 0))
+        end = min(start + int(params["pageSize"]), self.total)
+        studies = []
+        for i in range(start, end):
+            study = {"protocolSection": {"identificationModule": {"nctId": f"NCT{i:08d}", "briefTitle": f"Trial {i}"},
+                                         "statusModule": {"overallStatus": "COMPLETED"}}}
+            if params.get("fields") == "NCTId":
+                study = {"protocolSection": {"identificationModule": {"nctId": f"NCT{i:08d}"}}}
+            studies.append(study)
+        data = {"studies": studies}
+        if end < self.total:
+            data["nextPageToken"] = str(end)
+        return data
+
+
+@pytest.fixture
+def api(monkeypatch):
+    fake = FakeApi(1000)
+    monkeypatch.setattr(ctgov_stream, "_fetch_page", fake)
+    return fake
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_max_results_stops_paging(api, prefetch):
+    studies = list(ctgov_stream.iter_studies("conditions=Asthma", page_size=100, max_results=250, prefetch=prefetch))
+    assert [ctgov_stream.nct_id(s) for s in studies] == [f"NCT{i:08d}" for i in range(250)]
+    # three pages are needed; with prefetch the fourth may already have been requested
+    assert 3 <= len(api.requests) <= (4 if prefetch else 3)
+
+
+def test_small_max_results_shrinks_the_page(api):
+    assert len(list(ctgov_stream.iter_studies("conditions=Asthma", max_results=7))) == 7
+    assert {r["pageSize"] for r in api.requests} == {"7"} and len(api.requests) <= 2
+    api.requests.clear()
+    assert list(ctgov_stream.iter_studies("conditions=Asthma", max_results=0)) == []
+    assert api.requests == []
+
+
+def test_fields_projection_is_sent_on_every_page(api):
+    studies = list(ctgov_stream.iter_studies("conditions=Asthma", page_size=400,
+                                             fields=["NCTId", "OverallStatus"], prefetch=False))
+    assert len(studies) == 1000
+    assert [r["fields"] for r in api.requests] == ["NCTId,OverallStatus"] * 3
+    assert [r.get("pageToken") for r in api.requests] == [None, "400", "800"]
+
+
+def test_ctgov_search_downloads_ids_only(api):
+    ids = ctgov_stream.ctgov_search("conditions=Asthma;overallStatus=completed", max_results=120)
+    assert ids == [f"NCT{i:08d}" for i in range(120)]
+    first = api.requests[0]
+    assert first["fields"] == "NCTId"
+    assert first["filter.overallStatus"] == "COMPLETED" and first["query.cond"] == "Asthma"
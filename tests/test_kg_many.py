@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import CONCEPTS
+
+CUIS = ["C0000001", "C0000002", "C0000003", "C0000031", "C0000034", "C0000038", "C9999999"]
+
+GETTERS = [
+    "get_term", "get_synonyms", "get_definition", "get_semantic_type", "get_relations",
+    "get_ro_relations", "get_parent_from_snomedct", "get_children_from_snomedct", "get_treatments",
+    "has_manifestation", "has_associated_finding", "get_tradename", "get_concept_card",
+]
+
+
+def _sorted(rows):
+    return sorted(rows, key=repr) if isinstance(rows, list) else rows
+
+
+@pytest.mark.parametrize("name", GETTERS)
+@pytest.mark.parametrize("chunk_size", [2, 500])
+def test_many_matches_single_getter(umls_db, name, chunk_size):
+    single = getattr(umls_db, name)
+    many = getattr(umls_db, f"{name}_many")(CUIS + CUIS[:2], chunk_size=chunk_size)
+
+    assert list(many) == CUIS
+    for cui in CUIS:
+        expected = single(cui)
+        if isinstance(expected, dict):
+            assert {k: _sorted(v) for k, v in many[cui].items()} == {k: _sorted(v) for k, v in expected.items()}
+        else:
+            assert _sorted(many[cui]) == _sorted(expected)
+
+
+@pytest.mark.parametrize("relationship_type", ["associated_with", "may_treat", "no_such_rela"])
+def test_specific_relation_many_matches_single(umls_db, relationship_type):
+    many = umls_db.get_specific_relation_many(CUIS, relationship_type, chunk_size=3)
+
+    for cui in CUIS:
+        assert _sorted(many[cui]) == _sorted(umls_db.get_specific_relation(cui, relationship_type))
+
+
+def test_look_up_cui_many_matches_single(umls_db):
+    terms = ["Concept 01", "concept 0", "Concept 3", "Hub synonym", "Nothing like it"]
+    many = umls_db.look_up_cui_many(terms, chunk_size=2)
+
+    for term in terms:
+        assert _sorted(many[term]) == _sorted(umls_db.look_up_cui(term))
+    assert many["Concept 01"] == [{"CUI": "C0000001"}]
+    assert many["Nothing like it"] is None
+
+
+def test_relation_between_requested_cuis_is_listed_under_both(umls_db):
+    many = umls_db.get_relations_many(["C0000002", "C0000003"], chunk_size=1)
+    link = {"SourceCUI": "C0000002", "SourceTerm": CONCEPTS["C0000002"], "Relationship": "RO",
+            "RelationshipType": "associated_with", "TargetCUI": "C0000003",
+            "TargetTerm": CONCEPTS["C0000003"], "Source": "MSH"}
+
+    assert link in many["C0000002"]
+    assert many["C0000003"].count(link) == 1
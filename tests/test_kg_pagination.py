@@ -0,0 +1,78 @@
+import pytest
+
+
+def _pages(kg, cui, relationship_type=None, page_size=5):
+    pages, after = [], None
+    while True:
+        rows, after = kg.get_relations_page(cui, relationship_type, after=after, page_size=page_size)
+        pages.append(rows)
+        if after is None:
+            return pages
+
+
+def _key_set(rows):
+    return sorted(map(repr, rows))
+
+
+@pytest.mark.parametrize("page_size", [1, 5, 7, 36, 100])
+def test_pages_cover_get_relations_once(umls_db, page_size):
+    pages = _pages(umls_db, "C0000001", page_size=page_size)
+    rows = [row for page in pages for row in page]
+
+    assert all(len(page) <= page_size for page in pages)        # one preferred name per concept here
+    assert len(rows) == len(umls_db.get_relations("C0000001"))
+    assert _key_set(rows) == _key_set(umls_db.get_relations("C0000001"))
+    keys = [umls_db.relation_key(row, "C0000001") for row in rows]
+    null_first = [(direction, rela is not None, rela or "", *rest) for direction, rela, *rest in keys]
+    assert null_first == sorted(null_first) and len(set(keys)) == len(keys)
+    assert any(key[1] is None for key in keys)
+
+
+def test_exact_multiple_of_page_size_ends_without_empty_page(umls_db):
+    assert len(umls_db.get_relations("C0000002")) == 3
+
+    assert [len(page) for page in _pages(umls_db, "C0000002", page_size=3)] == [3]
+    assert [len(page) for page in _pages(umls_db, "C0000002", page_size=1)] == [1, 1, 1]
+
+
+def test_pages_with_relationship_type(umls_db):
+    rows = [row for page in _pages(umls_db, "C0000001", "may_treat", page_size=1) for row in page]
+
+    assert _key_set(rows) == _key_set(umls_db.get_specific_relation("C0000001", "may_treat"))
+
+
+def test_unknown_cui_has_one_empty_page(umls_db):
+    assert umls_db.get_relations_page("C9999999") == ([], None)
+
+
+def test_iter_relations_limit_offset_follow_the_page_order(umls_db):
+    ordered = [row for page in _pages(umls_db, "C0000001", page_size=100) for row in page]
+
+    assert _key_set(umls_db.iter_relations("C0000001")) == _key_set(ordered)
+    assert list(umls_db.iter_relations("C0000001", limit=4, offset=3, batch_size=2)) == ordered[3:7]
+
+
+def test_pages_read_only_what_they_return(umls_db, monkeypatch):
+    limits = []
+    original = umls_db._relation_page_rows
+
+    def spy(cursor, cui, relationship_type, direction, after, limit):
+        rows = original(cursor, cui, relationship_type, direction, after, limit)
+        limits.append(limit)
+        assert len(rows) <= limit
+        return rows
+
+    monkeypatch.setattr(umls_db, "_relation_page_rows", spy)
+    rows, after = umls_db.get_relations_page("C0000001", page_size=5)
+    assert len(rows) == 5 and after is not None
+    assert limits == [6]
+
+    assert list(umls_db.iter_relations("C0000001", limit=2, batch_size=2))
+    assert max(limits[1:]) <= 3
+
+
+def test_relations_without_names_are_skipped_like_get_relations(umls_db):
+    rows = [row for page in _pages(umls_db, "C0000001", page_size=3) for row in page]
+
+    assert all(row["TargetCUI"] != "C0000099" for row in rows)
+    assert _key_set(rows) == _key_set(umls_db.get_relations("C0000001"))
@@ -0,0 +1,77 @@
+import re
+
+import opentargets_client
+from opentargets_client import OpenTargetsClient
+
+ALIAS = re.compile(r'(\w+): (?:target\(ensemblId|search\(queryString): "([^"]+)"')
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """ Answers each alias with answer(key, query); None plays an errored alias."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.keys = []
+
+    def post(self, url, json, timeout):
+        data = {}
+        for alias, key in ALIAS.findall(json["query"]):
+            self.keys.append(key)
+            data[alias] = self.answer(key, json["query"])
+        return FakeResponse({"data": data})
+
+
+def test_errored_alias_is_not_cached():
+    failing = {"ENSG2"}
+    session = FakeSession(lambda key, q: None if key in failing else {"tractability": [{"modality": "SM", "label": "x", "value": True}]})
+    client = OpenTargetsClient(session=session)
+    rows = client.tractability_many(["ENSG1", "ENSG2"])
+    assert len(rows["ENSG1"]) == 1 and rows["ENSG2"] == []
+    assert client.safety_liabilities_many(["ENSG2"]) == {"ENSG2": None}
+    failing.clear()
+    assert len(client.tractability_many(["ENSG1", "ENSG2"])["ENSG2"]) == 1
+    assert session.keys.count("ENSG1") == 1 and session.keys.count("ENSG2") == 3
+
+
+def test_errored_association_page_is_retried():
+    failing = {"ENSG1"}
+
+    def answer(key, query):
+        if key in failing:
+            return None
+        index = int(re.search(r"index: (\d+)", query).group(1))
+        rows = [{"disease": {"id": f"D{index}{i}", "name": "d"}, "score": 0.9 - 0.5 * index - 0.01 * i} for i in range(2)]
+        return {"associatedDiseases": {"count": 4, "rows": rows}}
+
+    client = OpenTargetsClient(session=FakeSession(answer), page_size=2)
+    assert client.associated_diseases_many(["ENSG1"], min_score=0.0) == {"ENSG1": []}
+    failing.clear()
+    assert len(client.associated_diseases_many(["ENSG1"], min_score=0.0)["ENSG1"]) == 4
+
+
+def test_caches_are_bounded():
+    session = FakeSession(lambda key, q: {"hits": [{"id": "ENSG" + key, "entity": "target", "name": key}]})
+    client = OpenTargetsClient(session=session, cache_size=2)
+    assert client.resolve_symbols(["A", "B", "C"]) == {"A": "ENSGA", "B": "ENSGB", "C": "ENSGC"}
+    assert len(client._symbols) == 2
+    client.resolve_symbols(["C", "A"])
+    assert session.keys == ["A", "B", "C", "A"]
+
+
+def test_lru_keeps_recently_used():
+    cache = opentargets_client._LRU(2)
+    cache["a"], cache["b"] = 1, 2
+    cache.get("a")
+    cache["c"] = 3
+    assert "a" in cache and "b" not in cache and "c" in cache
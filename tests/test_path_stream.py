@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from path_stream import iter_paths
+
+PATHS = {
+    "T1": [
+        {"cuis": ["C0000001", "C0000002", "C0000003"], "relas": ["isa", "may_treat"],
+         "path_strs": ["a \"quoted\" name", "naïve – ünïcode", "x\\y"]},
+        {"cuis": [], "relas": [], "path_strs": [], "score": -1.5e-3},
+    ],
+    "T2": [],
+    "T3": [{"cuis": ["C1234567"], "nested": {"list": [1, 2.5, None, True, False]}, "n": 1234567890}],
+}
+
+
+def _flatten(document):
+    return [(template_id, path) for template_id, paths in document.items() for path in paths]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 1 << 16])
+def test_matches_json_load(tmp_path, chunk_size):
+    path = tmp_path / "merged_paths.json"
+    path.write_text(json.dumps(PATHS, ensure_ascii=False, indent=2), encoding="utf-8")
+    with open(path, encoding="utf-8") as f:
+        expected = _flatten(json.load(f))
+
+    assert list(iter_paths(path, chunk_size=chunk_size)) == expected
+
+
+def test_compact_layout_and_number_at_chunk_boundary(tmp_path):
+    path = tmp_path / "merged_paths.json"
+    path.write_text(json.dumps({"T": [12345, {"a": 1}], "U": [6789]}, separators=(",", ":")), encoding="utf-8")
+
+    assert list(iter_paths(path, chunk_size=3)) == [("T", 12345), ("T", {"a": 1}), ("U", 6789)]
+
+
+def test_empty_object(tmp_path):
+    path = tmp_path / "merged_paths.json"
+    path.write_text("{ }", encoding="utf-8")
+
+    assert list(iter_paths(path)) == []
+
+
+@pytest.mark.parametrize("text", ['{"T": [{"a": 1}', '[{"a": 1}]', '{"T": [{"a": 1}] "U": []}'])
+def test_malformed_input_raises(tmp_path, text):
+    path = tmp_path / "merged_paths.json"
+    path.write_text(text, encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(iter_paths(path, chunk_size=4))
@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+
+import pytest
+
+import rate_limit
+from rate_limit import RateLimiter, TokenBucket, map_ordered
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(status_code)
+        self.status_code = status_code
+        self.response = type("Response", (), {"status_code": status_code, "headers": headers or {}})()
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    slept = []
+    monkeypatch.setattr(rate_limit.time, "sleep", slept.append)
+    return slept
+
+
+def test_map_ordered_keeps_input_order():
+    def work(i):
+        time.sleep(random.uniform(0, 0.005))
+        return i * i
+
+    assert list(map_ordered(work, range(200), workers=8, window=5)) == [i * i for i in range(200)]
+
+
+def test_map_ordered_bounds_work_in_flight():
+    started = []
+    lock = threading.Lock()
+
+    def work(i):
+        with lock:
+            started.append(i)
+        return i
+
+    results = map_ordered(work, range(100), workers=2, window=4)
+    assert next(results) == 0
+    time.sleep(0.05)
+    assert len(started) <= 4
+    assert list(results) == list(range(1, 100))
+
+
+def test_map_ordered_propagates_errors():
+    def work(i):
+        if i == 3:
+            raise ValueError(i)
+        return i
+
+    with pytest.raises(ValueError):
+        list(map_ordered(work, range(10), workers=4))
+
+
+def test_token_bucket_wait_covers_the_debt():
+    bucket = TokenBucket(rate_per_min=60, burst_seconds=1)       # 1 per second, capacity 1
+    assert bucket.reserve(1, now=bucket.updated) == 0.0
+    assert bucket.reserve(2, now=bucket.updated) == pytest.approx(2.0)
+
+
+def test_429s_during_a_pause_back_off_once():
+    limiter = RateLimiter(rpm=600, tpm=100_000)
+    for _ in range(5):
+        limiter.on_rate_limited(10)
+    assert limiter.scale == pytest.approx(0.7)
+    assert limiter.stats["rate_limited"] == 5
+
+    limiter.paused_until = 0.0
+    limiter.on_rate_limited(10)
+    assert limiter.scale == pytest.approx(0.49)
+
+
+def test_call_retries_429_with_retry_after(no_sleep):
+    limiter = RateLimiter(rpm=600, tpm=100_000)
+    responses = [HTTPError(429, {"retry-after-ms": "250"}), "ok"]
+
+    def fn():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert limiter.call(fn, tokens=10) == "ok"
+    assert limiter.stats["rate_limited"] == 1
+    assert limiter.paused_until > time.monotonic()
+
+
+@pytest.mark.parametrize("error", [HTTPError(503), ConnectionError("reset"), TimeoutError()])
+def test_call_retries_transient_errors(no_sleep, error):
+    limiter = RateLimiter(rpm=600, tpm=100_000)
+    errors = [error]
+
+    def fn():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert limiter.call(fn, tokens=10) == "ok"
+    assert limiter.stats["retried"] == 1
+    assert limiter.scale == 1.0
+
+
+def test_call_raises_other_errors_and_gives_up(no_sleep):
+    limiter = RateLimiter(rpm=600, tpm=100_000)
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise HTTPError(400)
+
+    with pytest.raises(HTTPError):
+        limiter.call(bad_request, tokens=10)
+    assert len(calls) == 1
+
+    def always_503():
+        calls.append(1)
+        raise HTTPError(503)
+
+    with pytest.raises(HTTPError):
+        limiter.call(always_503, tokens=10, max_attempts=3)
+    assert len(calls) == 1 + 3
@@ -0,0 +1,62 @@
+import pytest
+
+from snomed_hierarchy import SnomedHierarchy
+
+# A small DAG: 5 has two parents (3, 4), 3 and 4 share the root 1, 2 is a second root.
+NAMES = {f"C000000{i}": f"Concept {i}" for i in range(1, 7)}
+NAMES["C0000006"] = "Névralgie – ünïcode"
+EDGES = [("C0000003", "C0000001"), ("C0000004", "C0000001"), ("C0000005", "C0000003"),
+         ("C0000005", "C0000004"), ("C0000006", "C0000005"), ("C0000004", "C0000002"),
+         ("C0000007", "C0000001")]                                     # C0000007 has no name: dropped
+
+
+def queries(h):
+    cuis = sorted(NAMES) + ["C0000007", "C9999999"]
+    return {
+        "len": len(h),
+        "names": [h.name(c) for c in cuis],
+        "parents": [sorted(h.parents(c)) for c in cuis],
+        "children": [sorted(h.children(c)) for c in cuis],
+        "ancestors": [h.ancestors(c) for c in cuis],
+        "descendants": [h.descendants(c) for c in cuis],
+        "depths": [h.depth(c) for c in cuis],
+        "is_a": [(a, b) for a in cuis for b in cuis if h.is_a(a, b)],
+        "lca": [h.lowest_common_ancestors(a, b) for a in cuis for b in cuis],
+    }
+
+
+def test_snapshot_round_trip(tmp_path):
+    built = SnomedHierarchy.from_edges(EDGES, NAMES)
+    path = tmp_path / "snomed_isa.bin"
+    built.save(str(path))
+    loaded = SnomedHierarchy.load(str(path))
+    assert queries(loaded) == queries(built)
+    assert loaded.name("C0000006") == "Névralgie – ünïcode"
+    assert loaded.ancestors("C0000006") == {"C0000005", "C0000003", "C0000004", "C0000001", "C0000002"}
+    assert loaded.depth("C0000006") == 3
+    assert loaded.lowest_common_ancestors("C0000003", "C0000004") == ["C0000001"]
+    assert "C0000007" not in loaded
+
+
+def test_empty_hierarchy_round_trip(tmp_path):
+    path = tmp_path / "empty.bin"
+    SnomedHierarchy.from_edges([], {}).save(str(path))
+    loaded = SnomedHierarchy.load(str(path))
+    assert len(loaded) == 0 and loaded.parents("C0000001") == []
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a snapshot" * 4)
+    with pytest.raises(ValueError):
+        SnomedHierarchy.load(str(path))
+
+
+def test_from_database_matches_the_getters(umls_db, tmp_path):
+    kg = umls_db
+    path = tmp_path / "db.bin"
+    SnomedHierarchy.from_database().save(str(path))
+    h = SnomedHierarchy.load(str(path))
+    assert h.parents("C0000034") == ["C0000001"] and h.parents("C0000001") == ["C0000035"]
+    for cui in ("C0000034", "C0000001"):
+        assert sorted(h.parents(cui)) == sorted(row["ParentID"] for row in kg.get_parent_from_snomedct(cui))
@@ -0,0 +1,175 @@
+import threading
+import time
+
+import pytest
+
+import tool_cache
+from tool_cache import ToolCache, canonical_args
+
+
+class Counting:
+    def __init__(self, result=None, fn=None):
+        self.calls = 0
+        self.result = result
+        self.fn = fn
+
+    def __call__(self, term, limit=10):
+        self.calls += 1
+        if self.fn is not None:
+            return self.fn(term, limit)
+        return self.result if self.result is not None else {"term": term, "limit": limit}
+
+
+def test_canonical_args_fills_defaults_and_strips():
+    def tool(term, limit=10):
+        pass
+
+    assert canonical_args(tool, {"term": " x "}) == canonical_args(tool, {"limit": 10, "term": "x"})
+
+
+def test_hits_are_served_from_memory_and_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    tool = Counting()
+    cache = ToolCache(path)
+    assert cache.call("umls.lookup", tool, {"term": "aspirin"}) == {"term": "aspirin", "limit": 10}
+    assert cache.call("umls.lookup", tool, {"term": " aspirin ", "limit": 10}) == {"term": "aspirin", "limit": 10}
+    cache.close()
+
+    reopened = ToolCache(path)
+    assert reopened.call("umls.lookup", tool, {"term": "aspirin"}) == {"term": "aspirin", "limit": 10}
+    assert tool.calls == 1
+    assert reopened.stats()["umls.lookup"]["hits"] == 1
+    reopened.close()
+
+
+@pytest.mark.parametrize("result", [None, {"error": "HTTP 503"}])
+def test_failed_results_are_not_cached(result):
+    tool = Counting(fn=lambda term, limit: result)
+    cache = ToolCache()
+
+    assert cache.call("umls.lookup", tool, {"term": "x"}) == result
+    assert cache.call("umls.lookup", tool, {"term": "x"}) == result
+    assert tool.calls == 2
+
+
+def test_swallowed_errors_are_not_cached():
+    errors = threading.local()
+
+    def pop_error():
+        error = getattr(errors, "last", None)
+        errors.last = None
+        return error
+
+    def flaky(term, limit):
+        if tool.calls == 1:
+            errors.last = RuntimeError("connection lost")
+            return []
+        return [term]
+
+    tool = Counting(fn=flaky)
+    cache = ToolCache(error_signal=pop_error)
+    assert cache.call("umls.lookup", tool, {"term": "x"}) == []
+    assert cache.call("umls.lookup", tool, {"term": "x"}) == ["x"]
+    assert cache.call("umls.lookup", tool, {"term": "x"}) == ["x"]
+    assert tool.calls == 2
+
+
+def test_exceptions_are_not_cached():
+    def broken(term, limit):
+        raise ConnectionError("down")
+
+    tool = Counting(fn=broken)
+    cache = ToolCache()
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            cache.call("pubmed.search", tool, {"term": "x"})
+    assert tool.calls == 2
+
+
+def test_entries_expire_per_tool(monkeypatch):
+    tool = Counting()
+    cache = ToolCache(policy={"pubmed.": 60, "umls.": None})
+    now = [1000.0]
+    monkeypatch.setattr(tool_cache.time, "time", lambda: now[0])
+    cache.call("pubmed.search", tool, {"term": "x"})
+    cache.call("umls.lookup", tool, {"term": "x"})
+
+    now[0] += 3600
+    cache.call("pubmed.search", tool, {"term": "x"})
+    cache.call("umls.lookup", tool, {"term": "x"})
+    assert tool.calls == 3
+    assert cache.stats()["pubmed.search"]["expired"] == 1
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    def slow(term, limit):
+        time.sleep(0.1)
+        return [term]
+
+    tool = Counting(fn=slow)
+    cache = ToolCache()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.call("umls.lookup", tool, {"term": "x"})))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [["x"]] * 5
+    assert tool.calls == 1
+    assert cache.stats()["umls.lookup"]["shared"] == 4
+
+
+def test_umls_outage_is_not_cached_with_the_kg_cache_on(demo_agent, umls_db, umls_db_path, tmp_path):
+    """ The real wiring: kg's own result cache is on and the tool turns None into []."""
+    import sqlite3
+
+    kg = umls_db
+    empty = str(tmp_path / "empty.sqlite")
+    sqlite3.connect(empty).close()
+    related = Counting(fn=lambda cui, limit: kg.get_relations(cui) or [])
+    cache = ToolCache(error_signal=demo_agent._swallowed_error)
+
+    kg.enable_cache()
+    try:
+        kg.configure_backend("sqlite", empty)           # every query fails: no tables
+        assert cache.call("umls.get_related", related, {"term": "C0000002"}) == []
+
+        kg.configure_backend("sqlite", umls_db_path)
+        rows = cache.call("umls.get_related", related, {"term": "C0000002"})
+        assert len(rows) == 3
+        assert cache.call("umls.get_related", related, {"term": "C0000002"}) == rows
+    finally:
+        kg.disable_cache()
+        kg.configure_backend("sqlite", umls_db_path)
+    assert related.calls == 2
+    assert kg._pop_error() is None
+
+
+def test_kg_cache_keeps_inner_errors_visible(umls_db, umls_db_path, tmp_path):
+    import sqlite3
+
+    kg = umls_db
+    empty = str(tmp_path / "empty.sqlite")
+    sqlite3.connect(empty).close()
+    kg.enable_cache()
+    try:
+        kg._pop_error()
+        kg.configure_backend("sqlite", empty)
+        assert kg.get_treatments("C0000001") is None
+        kg.configure_backend("sqlite", umls_db_path)
+        assert kg.get_treatments("C0000002")           # a later getter in the same tool call succeeds
+        assert kg._pop_error() is not None
+
+        kg.configure_backend("sqlite", empty)
+        assert kg.get_treatments_many(["C0000003"]) == {"C0000003": None}
+        kg.configure_backend("sqlite", umls_db_path)
+        assert kg.get_treatments_many(["C0000002"])["C0000002"]
+        assert kg._pop_error() is not None
+        assert kg.get_treatments("C0000001")           # the failed results were not cached
+        assert kg.get_treatments_many(["C0000003"]) == {"C0000003": None}
+        assert kg._pop_error() is None
+    finally:
+        kg.disable_cache()
+        kg.configure_backend("sqlite", umls_db_path)
@@ -0,0 +1,63 @@
+import json
+
+import tool_compaction
+from tool_compaction import compact, count_tokens, tool_result_page
+
+from conftest import tool_call
+
+BUDGET = 300
+
+
+def _long_text_result():
+    # Quotes, backslashes and newlines grow when the page text is JSON-escaped again.
+    line = 'Finding "{i}": C:\\path\\to\\file\nnaïve – {i}\t'
+    return {"summary": "".join(line.format(i=i) for i in range(400)), "source": "test"}
+
+
+def test_full_text_pages_fit_the_budget_and_rebuild_the_result():
+    result = _long_text_result()
+    envelope = compact("some.tool", result, budget=BUDGET)
+    assert envelope["truncated"] is True
+
+    parts, offset = [], 0
+    while offset is not None:
+        page = tool_result_page(envelope["result_id"], offset=offset, full=True, budget=BUDGET)
+        assert count_tokens(json.dumps(page, ensure_ascii=False)) <= BUDGET
+        assert page["text"]
+        parts.append(page["text"])
+        offset = page["next_offset"]
+    assert json.loads("".join(parts)) == result
+
+
+def test_page_results_are_not_compacted_again():
+    page = {"result_id": "x", "text": "y" * 50_000, "next_offset": 50_000}
+    assert compact(tool_compaction.PAGE_TOOL, page, budget=BUDGET) is page
+
+
+def test_long_text_pages_end_to_end_through_run_tool_calls(demo_agent, monkeypatch):
+    result = _long_text_result()
+    monkeypatch.setitem(demo_agent.TOOLS, "pubmed.search", lambda **kwargs: result)
+    monkeypatch.setattr(tool_compaction, "DEFAULT_BUDGET", BUDGET)
+
+    first = json.loads(demo_agent.run_tool_calls([tool_call("pubmed.search")])[0]["content"])
+    parts, offset = [], 0
+    while offset is not None:
+        args = json.dumps({"result_id": first["result_id"], "offset": offset, "full": True})
+        message = demo_agent.run_tool_calls([tool_call(tool_compaction.PAGE_TOOL, args)])[0]
+        page = json.loads(message["content"])
+        assert page["result_id"] == first["result_id"]
+        parts.append(page["text"])
+        offset = page["next_offset"]
+    assert json.loads("".join(parts)) == result
+
+
+def test_record_pages_cover_every_record():
+    rows = [{"id": i, "name": f"disease {i}", "score": 1 - i / 1000} for i in range(300)]
+    envelope = compact("some.tool", rows, budget=BUDGET)
+    seen = list(envelope["items"])
+    offset = envelope["next_offset"]
+    while offset is not None:
+        page = tool_result_page(envelope["result_id"], offset=offset, budget=BUDGET)
+        seen += page["items"]
+        offset = page["next_offset"]
+    assert seen == rows
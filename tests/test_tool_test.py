@@ -0,0 +1,32 @@
+import pytest
+
+import tool_test
+from noah_client import DeadlineExceeded, NoahError
+
+
+class FakeClient:
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+    def _call(self, *args):
+        if isinstance(self.outcome, BaseException):
+            raise self.outcome
+        return self.outcome
+
+    slot_fill = tool = agent = _call
+
+
+def test_error_body_is_returned(monkeypatch):
+    body = {"result": "error", "message": "unknown tool"}
+    monkeypatch.setattr(tool_test, "_client", FakeClient(NoahError("unsuccessful response", body)))
+    assert tool_test.call_slot_fill_tool("q", "Drug-Analysis") == body
+    assert tool_test.call_tool("q", "Drug-Analysis") == body
+    assert tool_test.call_agent("q") == body
+
+
+def test_success_and_deadline(monkeypatch):
+    monkeypatch.setattr(tool_test, "_client", FakeClient({"result": "success", "data": "report"}))
+    assert tool_test.call_tool("q", "Web-Search")["data"] == "report"
+    monkeypatch.setattr(tool_test, "_client", FakeClient(DeadlineExceeded("no response within 240s")))
+    with pytest.raises(TimeoutError):
+        tool_test.call_tool("q", "Web-Search")
@@ -0,0 +1,71 @@
+import json
+import time
+import threading
+
+import pytest
+
+from conftest import tool_call
+
+
+@pytest.fixture
+def agent(demo_agent, monkeypatch):
+    """ demo_agent with a one-slot pool for "slow"; the default pools are rebuilt afterwards."""
+    monkeypatch.setitem(demo_agent.TOOL_CONCURRENCY, "slow", 1)
+    demo_agent.configure_tool_pools()
+    yield demo_agent
+    monkeypatch.undo()
+    demo_agent.configure_tool_pools()
+
+
+def sleeper(seconds, ran):
+    def tool(tag):
+        ran.append(tag)
+        time.sleep(seconds)
+        return {"tag": tag}
+    return tool
+
+
+def contents(messages):
+    return [json.loads(m["content"]) for m in messages]
+
+
+def test_per_tool_timeout(agent, monkeypatch):
+    monkeypatch.setitem(agent.TOOLS, "slow", sleeper(0.5, []))
+    monkeypatch.setitem(agent.TOOL_TIMEOUTS, "slow", 0.2)
+    start = time.monotonic()
+    result, = contents(agent.run_tool_calls([tool_call("slow", '{"tag": 1}')]))
+    assert result == {"error": "slow timed out after 0.2s"}
+    assert time.monotonic() - start < 0.45
+
+
+def test_timeout_starts_when_the_call_leaves_the_queue(agent, monkeypatch):
+    monkeypatch.setitem(agent.TOOLS, "slow", sleeper(0.3, []))
+    monkeypatch.setitem(agent.TOOL_TIMEOUTS, "slow", 0.5)
+    calls = [tool_call("slow", f'{{"tag": {i}}}', f"c{i}") for i in range(2)]
+    assert contents(agent.run_tool_calls(calls)) == [{"tag": 0}, {"tag": 1}]
+
+
+def test_queue_timeout_revokes_the_waiting_call(agent, monkeypatch):
+    ran = []
+    monkeypatch.setitem(agent.TOOLS, "slow", sleeper(0.1, ran))
+    monkeypatch.setattr(agent, "TOOL_QUEUE_TIMEOUT", 0.2)
+    busy = agent._tool_executors["slow"].submit(time.sleep, 0.5)     # holds the only slot
+    result, = contents(agent.run_tool_calls([tool_call("slow", '{"tag": 1}')]))
+    assert result == {"error": "slow waited over 0.2s for a free slot"}
+    busy.result()
+    time.sleep(0.1)
+    assert ran == []
+
+
+def test_cancel_raises_and_revokes_queued_calls(agent, monkeypatch):
+    ran = []
+    monkeypatch.setitem(agent.TOOLS, "slow", sleeper(0.5, ran))
+    cancel = threading.Event()
+    threading.Timer(0.15, cancel.set).start()
+    calls = [tool_call("slow", f'{{"tag": {i}}}', f"c{i}") for i in range(3)]
+    start = time.monotonic()
+    with pytest.raises(agent.ChatCancelled):
+        agent.run_tool_calls(calls, cancel)
+    assert time.monotonic() - start < 0.4
+    time.sleep(0.5)
+    assert ran == [0]
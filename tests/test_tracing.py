@@ -0,0 +1,28 @@
+import json
+
+import tracing
+
+
+def test_size_skips_serializing_structured_payloads(monkeypatch):
+    monkeypatch.setattr(tracing, "measure_sizes", False)
+    monkeypatch.setattr(tracing.json, "dumps", lambda *a, **k: (_ for _ in ()).throw(AssertionError("serialized")))
+    assert tracing._size("abcd") == 4
+    assert tracing._size(b"ab") == 2
+    assert tracing._size(None) == 0
+    assert tracing._size({"rows": list(range(1000))}) is None
+
+
+def test_size_measures_json_when_enabled(monkeypatch):
+    monkeypatch.setattr(tracing, "measure_sizes", True)
+    value = {"name": "é"}
+    assert tracing._size(value) == len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+def test_summary_with_unsized_spans(monkeypatch):
+    monkeypatch.setattr(tracing, "measure_sizes", False)
+    s = tracing.Span("tool", "umls.search")
+    s.set_result([1, 2, 3])
+    s.duration = 0.01
+    row, = tracing.summarize([s])
+    assert row["count"] == 3 and row["bytes_out"] == 0
+    assert "umls.search" in tracing.format_summary([s])
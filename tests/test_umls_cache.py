@@ -0,0 +1,52 @@
+import sqlite3
+
+import umls_cache
+from umls_cache import MISS, ResultCache
+
+
+def test_memory_lru_falls_back_to_disk(tmp_path):
+    cache = ResultCache("2024AA", max_entries=2, disk_path=str(tmp_path / "cache.sqlite"))
+    cache.put_many([(cache.key("get_term", [c]), {"cui": c}) for c in ("C1", "C2", "C3")])
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get(cache.key("get_term", ["C1"])) == {"cui": "C1"}      # evicted from memory
+    assert cache.disk_hits == 1
+    assert cache.get(cache.key("get_term", ["C4"])) is MISS
+
+
+def test_hits_are_fresh_copies():
+    cache = ResultCache("2024AA")
+    key = cache.key("get_synonyms", ["C1"])
+    cache.put(key, [{"STR": "a"}])
+    cache.get(key).append({"STR": "b"})
+    assert cache.get(key) == [{"STR": "a"}]
+
+
+def test_not_found_is_cached_and_survives_a_restart(umls_db, umls_db_path, tmp_path):
+    kg = umls_db
+    disk = str(tmp_path / "cache.sqlite")
+    empty = str(tmp_path / "empty.sqlite")
+    sqlite3.connect(empty).close()
+    try:
+        cache = kg.enable_cache(release="2024AA", disk_path=disk)
+        assert kg.get_treatments("C0000020") is None                      # no may_treat relations
+        kg.configure_backend("sqlite", empty)                             # a query now would fail
+        assert kg.get_treatments("C0000020") is None
+        assert kg._pop_error() is None
+        assert cache.stats()["negative_hits"] == 1
+        cache.close()
+
+        cache = kg.enable_cache(release="2024AA", disk_path=disk)         # restart: memory is empty
+        assert kg.get_treatments("C0000020") is None
+        assert kg._pop_error() is None
+        assert cache.stats()["disk_hits"] == 1 and cache.stats()["negative_hits"] == 1
+        cache.close()
+
+        cache = kg.enable_cache(release="2025AA", disk_path=disk)         # another release misses
+        assert kg.get_treatments("C0000020") is None
+        assert kg._pop_error() is not None
+        assert cache.stats()["misses"] == 1
+        assert cache.get(cache.key("get_treatments", ["C0000020"])) is umls_cache.MISS   # the error was not cached
+        cache.close()
+    finally:
+        kg.disable_cache()
+        kg.configure_backend("sqlite", umls_db_path)
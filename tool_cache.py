@@ -0,0 +1,234 @@
+"""
+Memoizing dispatch layer for demo_agent.TOOLS.
+
+Every tool call is keyed by tool name plus its canonicalized arguments: bound
+against the function signature with defaults applied, strings stripped, keys
+sorted. Results are kept in memory and in a SQLite file shared by every run,
+so benchmark sweeps over several models pay for each distinct tool call once.
+
+Entries expire per tool (TTL_POLICY): UMLS and the local path index are
+release-versioned and never expire; literature and trial registries change
+daily. Failures are never cached: exceptions, None and {"error": ...} results,
+and calls for which `error_signal` reports a swallowed error (tools that log
+and return an empty result, like the UMLS getters). Concurrent identical
+calls (e.g. the same concept_lookup fanned out twice in one turn) share a
+single execution.
+
+    tools = ToolCache("tool_cache.sqlite").wrap_all(RAW_TOOLS)
+    ...
+    print(cache.stats())   # per-tool hits / misses / hit_rate
+"""
+import json
+import time
+import inspect
+import sqlite3
+import threading
+import functools
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DAY = 24 * 3600
+
+# Seconds an entry stays valid; None = never expires. Prefix match on the tool name.
+TTL_POLICY = {
+    "umls.":            None,
+    "oncology.":        None,
+    "opentargets.":     7 * DAY,
+    "pubmed.":          1 * DAY,
+    "ctgov_search":     6 * 3600,
+}
+DEFAULT_TTL = 1 * DAY
+
+
+def ttl_for(name, policy=TTL_POLICY, default=DEFAULT_TTL):
+    for prefix, ttl in policy.items():
+        if name.startswith(prefix):
+            return ttl
+    return default
+
+
+def _canonical(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def canonical_args(fn, kwargs):
+    """ JSON text identifying a call: defaults filled in, strings stripped, keys sorted."""
+    try:
+        bound = inspect.signature(fn).bind(**kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+    except (TypeError, ValueError):
+        arguments = dict(kwargs)  # let the call itself raise the TypeError
+    return json.dumps(_canonical(arguments), sort_keys=True, ensure_ascii=False, default=str)
+
+
+def cacheable(result):
+    """ False for results that stand for a failure: None and {"error": ...}."""
+    return result is not None and not (isinstance(result, dict) and "error" in result)
+
+
+class ToolCache:
+    def __init__(self, path=None, max_entries=50_000, policy=None, error_signal=None):
+        """
+        Args:
+            error_signal: Optional zero-arg callable returning (and clearing) the
+                last error a tool swallowed in the calling thread, e.g. kg._pop_error.
+        """
+        self.policy = TTL_POLICY if policy is None else policy
+        self.max_entries = max_entries
+        self.error_signal = error_signal
+        self._memory = OrderedDict()       # key -> (stored_at, json text)
+        self._inflight = {}                # key -> Future of the running call
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._disk = None
+        if path:
+            self._disk = sqlite3.connect(path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode = WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache "
+                "(key TEXT PRIMARY KEY, tool TEXT NOT NULL, stored_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._disk.commit()
+
+    # -- storage -----------------------------------------------------------
+
+    def _count(self, name, field):
+        counters = self._stats.setdefault(name, {"hits": 0, "misses": 0, "shared": 0, "expired": 0})
+        counters[field] += 1
+
+    def _lookup(self, name, key, ttl):
+        """ Cached JSON text for `key`, or None. Caller holds the lock."""
+        entry = self._memory.get(key)
+        if entry is None and self._disk is not None:
+            row = self._disk.execute("SELECT stored_at, value FROM tool_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                entry = (row[0], row[1])
+        if entry is None:
+            return None
+        if ttl is not None and time.time() - entry[0] > ttl:
+            self._count(name, "expired")
+            self._memory.pop(key, None)
+            return None
+        self._remember(key, entry)
+        return entry[1]
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _store(self, name, key, text):
+        entry = (time.time(), text)
+        with self._lock:
+            self._remember(key, entry)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO tool_cache (key, tool, stored_at, value) VALUES (?, ?, ?, ?)",
+                    (key, name, entry[0], text),
+                )
+                self._disk.commit()
+
+    # -- dispatch ----------------------------------------------------------
+
+    def call(self, name, fn, kwargs):
+        """ Result of fn(**kwargs), served from the cache when a fresh entry exists."""
+        key = f"{name}\x1f{canonical_args(fn, kwargs)}"
+        ttl = ttl_for(name, self.policy)
+        with self._lock:
+            text = self._lookup(name, key, ttl)
+            if text is not None:
+                self._count(name, "hits")
+                return json.loads(text)
+            running = self._inflight.get(key)
+            if running is None:
+                running = self._inflight[key] = Future()
+                owner = True
+                self._count(name, "misses")
+            else:
+                owner = False
+                self._count(name, "shared")
+        if not owner:
+            return json.loads(running.result())
+
+        try:
+            if self.error_signal is not None:
+                self.error_signal()
+            result = fn(**kwargs)
+            failed = not cacheable(result) or (self.error_signal is not None and self.error_signal() is not None)
+            # Round-trip through JSON so hits and misses return identical structures.
+            text = json.dumps(result, ensure_ascii=False, default=str)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            running.set_exception(e)
+            raise
+        if not failed:
+            self._store(name, key, text)
+        with self._lock:
+            self._inflight.pop(key, None)
+        running.set_result(text)
+        return json.loads(text)
+
+    def wrap(self, name, fn):
+        @functools.wraps(fn)
+        def wrapper(**kwargs):
+            return self.call(name, fn, kwargs)
+        return wrapper
+
+    def wrap_all(self, tools):
+        """ {name: fn} -> {name: memoized fn}."""
+        return {name: self.wrap(name, fn) for name, fn in tools.items()}
+
+    # -- bookkeeping -------------------------------------------------------
+
+    def stats(self):
+        """ Per-tool counters plus hit_rate; "shared" counts calls that waited on an identical in-flight call."""
+        with self._lock:
+            report = {}
+            for name, counters in self._stats.items():
+                lookups = counters["hits"] + counters["misses"] + counters["shared"]
+                reused = counters["hits"] + counters["shared"]
+                report[name] = dict(counters, hit_rate=reused / lookups if lookups else 0.0)
+            return report
+
+    def purge_expired(self):
+        """ Delete expired rows from the persistent store."""
+        if self._disk is None:
+            return 0
+        now = time.time()
+        with self._lock:
+            rows = self._disk.execute("SELECT key, tool, stored_at FROM tool_cache").fetchall()
+            stale = [(key,) for key, tool, stored_at in rows
+                     if (ttl := ttl_for(tool, self.policy)) is not None and now - stored_at > ttl]
+            self._disk.executemany("DELETE FROM tool_cache WHERE key = ?", stale)
+            self._disk.commit()
+            for (key,) in stale:
+                self._memory.pop(key, None)
+        return len(stale)
+
+    def clear(self, tool=None):
+        with self._lock:
+            if tool is None:
+                self._memory.clear()
+            else:
+                for key in [k for k in self._memory if k.startswith(f"{tool}\x1f")]:
+                    del self._memory[key]
+            if self._disk is not None:
+                if tool is None:
+                    self._disk.execute("DELETE FROM tool_cache")
+                else:
+                    self._disk.execute("DELETE FROM tool_cache WHERE tool = ?", (tool,))
+                self._disk.commit()
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
@@ -0,0 +1,261 @@
+"""
+Token-budgeted compaction of tool results before they enter the message history.
+
+Each tool message is re-sent on every later model call, so a pubmed.search
+returning 100 abstracts or a few hundred UMLS relations costs latency
+and tokens on every iteration. compact() shrinks a result in three steps:
+
+    1. project records to the fields the agent actually reasons over (PROJECTIONS),
+    2. drop duplicate records,
+    3. keep as many leading records as fit in the token budget (tiktoken).
+
+When anything was dropped, the full payload stays in a ResultStore and the tool
+message carries a `result_id`; the model can page through the rest (or fetch
+unprojected records) with the `tool_result.page` tool:
+
+    content = json.dumps(compact("opentargets.search", rows), ensure_ascii=False)
+"""
+import os
+import json
+import threading
+import itertools
+from collections import OrderedDict
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken missing or no encoding files offline: estimate instead
+    _encoding = None
+
+PAGE_TOOL = "tool_result.page"
+DEFAULT_BUDGET = int(os.getenv("TOOL_RESULT_TOKENS", "1500"))
+ENVELOPE_TOKENS = 80        # room for result_id / total / next_offset / note
+MAX_STRING_CHARS = 300      # long free-text fields inside one record
+
+
+def count_tokens(text):
+    if _encoding is None:
+        return len(text) // 4 + 1
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+# -- per-tool projections -----------------------------------------------------
+
+def _ot_association(row):
+    if isinstance(row, dict) and isinstance(row.get("disease"), dict):
+        return {"id": row["disease"].get("id"), "name": row["disease"].get("name"), "score": row.get("score")}
+    return row
+
+
+PROJECTIONS = {
+    "opentargets.search": _ot_association,
+}
+
+
+def _truncate_strings(value, limit=MAX_STRING_CHARS):
+    if isinstance(value, str) and len(value) > limit:
+        return value[:limit] + "…"
+    if isinstance(value, dict):
+        return {k: _truncate_strings(v, limit) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_truncate_strings(v, limit) for v in value]
+    return value
+
+
+def _dedup(items):
+    seen, unique = set(), []
+    for item in items:
+        key = _dumps(item)
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def _fit(items, budget):
+    """ Longest prefix of `items` whose JSON fits in `budget` tokens."""
+    kept, used = [], 2
+    for item in items:
+        cost = count_tokens(_dumps(item)) + 1
+        if used + cost > budget:
+            break
+        kept.append(item)
+        used += cost
+    return kept
+
+
+# -- full-payload store ---------------------------------------------------------
+
+class ResultStore:
+    """ Bounded in-process store of full tool payloads, addressed by result_id."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def put(self, name, result):
+        with self._lock:
+            result_id = f"r{next(self._ids)}"
+            self._items[result_id] = (name, result)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return result_id
+
+    def get(self, result_id):
+        with self._lock:
+            return self._items.get(result_id)
+
+
+store = ResultStore()
+
+
+def _page(items, offset, budget):
+    """ Records from `offset` that fit in `budget`; always at least one (shortened if needed)."""
+    shown = items[offset:]
+    kept = _fit(shown, budget - ENVELOPE_TOKENS)
+    if not kept and shown:
+        kept = _fit([_truncate_strings(shown[0])], budget - ENVELOPE_TOKENS) or [_truncate_strings(shown[0], 40)]
+    return kept
+
+
+def _pageable(result):
+    """ (records, other fields, records field) of a list result or of the largest list in a dict; None otherwise."""
+    if isinstance(result, list):
+        return result, {}, None
+    if isinstance(result, dict) and any(isinstance(v, list) for v in result.values()):
+        field = max((k for k, v in result.items() if isinstance(v, list)), key=lambda k: len(result[k]))
+        return result[field], {k: v for k, v in result.items() if k != field}, field
+    return None
+
+
+def compact(name, result, budget=None, store=store):
+    """
+    Compacted form of a tool result that fits in `budget` tokens.
+
+    Small results and tool_result.page results come back unchanged. Otherwise the return value is an
+    envelope {"result_id", "total", "returned", "next_offset", "items", "note"}
+    (plus the non-list fields of a dict result), and the full result is kept
+    in `store` for tool_result.page.
+    """
+    budget = budget or DEFAULT_BUDGET
+    # Pages are already sized to the budget; compacting one again would hide it behind a new result_id.
+    if name == PAGE_TOOL or count_tokens(_dumps(result)) <= budget:
+        return result
+
+    pageable = _pageable(result)
+    if pageable is None:
+        result_id = store.put(name, result)
+        return {"result_id": result_id, "truncated": True, "value": _truncate_strings(result),
+                "note": "Long text fields were shortened; call tool_result.page with full=true for the original."}
+
+    items, rest, field = pageable
+    project = PROJECTIONS.get(name)
+    shaped = _dedup([project(item) for item in items] if project else items)
+    rest = _truncate_strings(rest)
+    kept = _page(shaped, 0, budget - count_tokens(_dumps(rest)))
+    result_id = store.put(name, result)
+    envelope = dict(rest)
+    envelope.update({
+        "result_id": result_id,
+        "total": len(shaped),
+        "returned": len(kept),
+        "next_offset": len(kept) if len(kept) < len(shaped) else None,
+        "items": kept,
+    })
+    if field is not None:
+        envelope["items_field"] = field
+    notes = []
+    if len(shaped) < len(items):
+        notes.append(f"{len(items) - len(shaped)} duplicate records removed")
+    if project is not None:
+        notes.append("records projected to key fields")
+    if envelope["next_offset"] is not None:
+        notes.append("call tool_result.page with result_id and offset=next_offset for more")
+    envelope["note"] = "; ".join(notes)
+    return envelope
+
+
+def tool_result_page(result_id: str, offset: int = 0, full: bool = False, budget=None) -> dict:
+    """
+    Next page of a compacted result (the `tool_result.page` tool).
+
+    Args:
+        result_id: The id from a compacted tool message.
+        offset: Index of the first record to return.
+        full: Return unprojected records instead of the key-field projection.
+            A result without records comes back unmodified, split into
+            `text` pages by character offset when it exceeds the budget.
+    """
+    budget = budget or DEFAULT_BUDGET
+    entry = store.get(result_id)
+    if entry is None:
+        return {"error": f"unknown or expired result_id {result_id}"}
+    name, result = entry
+    pageable = _pageable(result)
+    if pageable is None:
+        text = _dumps(result)
+        if count_tokens(text) <= budget and offset == 0:
+            return {"result_id": result_id, "value": result}
+        if not full:
+            return {"result_id": result_id, "truncated": True, "value": _truncate_strings(result)}
+        return _text_page(result_id, text, offset, budget)
+    project = None if full else PROJECTIONS.get(name)
+    shaped = _dedup([project(item) for item in pageable[0]] if project else pageable[0])
+    kept = _page(shaped, offset, budget)
+    end = offset + len(kept)
+    return {
+        "result_id": result_id,
+        "total": len(shaped),
+        "offset": offset,
+        "returned": len(kept),
+        "next_offset": end if end < len(shaped) else None,
+        "items": kept,
+    }
+
+
+def _text_page(result_id, text, offset, budget):
+    """
+    The serialized result from character `offset`, as much as fits in `budget`.
+
+    The page is measured as it will be sent (envelope included, `text` JSON-escaped
+    again), and the end is found by bisection; a page always carries at least one character.
+    """
+    def page(end):
+        return {
+            "result_id": result_id,
+            "total_chars": len(text),
+            "offset": offset,
+            "next_offset": end if end < len(text) else None,
+            "text": text[offset:end],
+        }
+
+    low, high = min(len(text), offset + 1), len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(_dumps(page(mid))) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return page(low)
+
+
+PAGE_SCHEMA = {
+    "name": PAGE_TOOL,
+    "description": "Fetch more records of an earlier tool result that was truncated to fit the context. "
+                   "Use the result_id and next_offset from that tool message.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "result_id": {"type": "string", "description": "result_id of the truncated tool result"},
+            "offset": {"type": "integer", "description": "index of the first record (or character, for a `text` page) to return", "default": 0},
+            "full": {"type": "boolean", "description": "return complete records instead of key fields", "default": False},
+        },
+        "required": ["result_id"],
+    },
+}
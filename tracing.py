@@ -0,0 +1,249 @@
+"""
+Lightweight span tracing for agent runs: tool dispatches, LLM calls and UMLS
+DB queries.
+
+A span records kind ("tool" / "llm" / "db"), name, duration, bytes in/out,
+result count and error class, plus the id of the question being answered.
+Sizes are cheap by default: strings and bytes are measured by len() and other
+payloads (dicts, lists, LLM responses) are left unsized, so tracing never
+serializes a result just to measure it. Set AGENT_TRACE_SIZES=1 to size every
+payload as its UTF-8 JSON encoding instead.
+Finished spans are kept in a bounded in-memory buffer and, when
+$AGENT_TRACE_PATH is set, appended to that JSONL file as they finish:
+
+    with tracing.span("tool", "umls.get_related", payload_in=args) as s:
+        result = fn(**args)
+        s.set_result(result)
+
+    print(tracing.format_summary())      # p50 / p95 / p99 per (kind, name)
+
+Summarize a JSONL file from an earlier run:
+    python tracing.py spans.jsonl
+"""
+import os
+import sys
+import json
+import time
+import threading
+import functools
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+def _size(value):
+    """ Byte size of a payload; None for a non-text payload unless measure_sizes is set."""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    if not measure_sizes:
+        return None
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _count(value):
+    if value is None:
+        return 0
+    if isinstance(value, (list, tuple, set, dict)):
+        return len(value)
+    return 1
+
+
+class Span:
+    __slots__ = ("kind", "name", "trace_id", "start", "duration", "bytes_in", "bytes_out",
+                 "count", "error", "attrs")
+
+    def __init__(self, kind, name, trace_id=None, attrs=None):
+        self.kind = kind
+        self.name = name
+        self.trace_id = trace_id
+        self.start = time.time()
+        self.duration = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.count = None
+        self.error = None
+        self.attrs = attrs or {}
+
+    def set_input(self, payload):
+        self.bytes_in = _size(payload)
+
+    def set_result(self, result, count=None):
+        """ Record output size and result count (len() of collections, 0 for None)."""
+        self.bytes_out = _size(result)
+        self.count = _count(result) if count is None else count
+
+    def set_error(self, error):
+        self.error = error if isinstance(error, str) else type(error).__name__
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class Recorder:
+    """ Keeps the last `max_spans` finished spans and optionally streams them to a JSONL file."""
+
+    def __init__(self, max_spans=100_000, path=None):
+        self.spans = deque(maxlen=max_spans)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+            if self.path:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+                self._file.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+    def export_jsonl(self, path):
+        with self._lock:
+            spans = list(self.spans)
+        with open(path, "w", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+        return len(spans)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+recorder = Recorder(path=os.getenv("AGENT_TRACE_PATH"))
+enabled = os.getenv("AGENT_TRACE", "1") != "0"
+measure_sizes = os.getenv("AGENT_TRACE_SIZES", "0") == "1"
+
+
+@contextmanager
+def trace(trace_id):
+    """ Tag every span opened inside (including tool threads started with copy_context) with `trace_id`."""
+    token = current_trace.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        current_trace.reset(token)
+
+
+class _NoopSpan:
+    def set_input(self, payload):
+        pass
+
+    def set_result(self, result, count=None):
+        pass
+
+    def set_error(self, error):
+        pass
+
+
+NOOP = _NoopSpan()
+
+
+@contextmanager
+def span(kind, name, payload_in=None, **attrs):
+    """ Time the block; an exception escaping it is recorded by class name and re-raised."""
+    if not enabled:
+        yield NOOP
+        return
+    s = Span(kind, name, current_trace.get(), attrs)
+    if payload_in is not None:
+        s.set_input(payload_in)
+    t0 = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.set_error(e)
+        raise
+    finally:
+        s.duration = time.perf_counter() - t0
+        recorder.record(s)
+
+
+def traced(kind, name=None):
+    """ Decorator form of span(); records the return value as the result."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind, label) as s:
+                result = fn(*args, **kwargs)
+                s.set_result(result)
+                return result
+        return wrapper
+    return decorate
+
+
+# -- summaries ---------------------------------------------------------------
+
+def _percentile(ordered, q):
+    """ Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(spans=None):
+    """
+    Per-(kind, name) statistics.
+
+    Returns:
+        list[dict]: {"kind", "name", "calls", "errors", "p50", "p95", "p99", "total", "bytes_out", "count"},
+                    sorted by total time, slowest first. Times are in seconds.
+    """
+    spans = recorder.spans if spans is None else spans
+    groups = {}
+    for s in spans:
+        s = s.to_dict() if isinstance(s, Span) else s
+        groups.setdefault((s["kind"], s["name"]), []).append(s)
+    rows = []
+    for (kind, name), items in groups.items():
+        durations = sorted(s["duration"] or 0.0 for s in items)
+        rows.append({
+            "kind": kind,
+            "name": name,
+            "calls": len(items),
+            "errors": sum(1 for s in items if s["error"]),
+            "p50": _percentile(durations, 50),
+            "p95": _percentile(durations, 95),
+            "p99": _percentile(durations, 99),
+            "total": sum(durations),
+            "bytes_out": sum(s["bytes_out"] or 0 for s in items),
+            "count": sum(s["count"] or 0 for s in items),
+        })
+    rows.sort(key=lambda r: r["total"], reverse=True)
+    return rows
+
+
+def format_summary(spans=None):
+    rows = summarize(spans)
+    lines = [f"{'kind':<6}{'name':<32}{'calls':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+             f"{'total s':>10}{'KB out':>10}"]
+    for r in rows:
+        lines.append(f"{r['kind']:<6}{r['name'][:31]:<32}{r['calls']:>7}{r['errors']:>8}"
+                     f"{r['p50'] * 1e3:>10.1f}{r['p95'] * 1e3:>10.1f}{r['p99'] * 1e3:>10.1f}"
+                     f"{r['total']:>10.2f}{r['bytes_out'] / 1024:>10.1f}")
+    return "\n".join(lines)
+
+
+def load_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python tracing.py spans.jsonl")
+    print(format_summary(load_jsonl(sys.argv[1])))
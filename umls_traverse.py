@@ -0,0 +1,119 @@
+"""
+Server-side multi-hop UMLS traversal (the `umls.traverse` tool).
+
+Gold tool_calls in dataset/umls_qa.json chain umls.concept_lookup ->
+umls.get_related -> umls.get_related -> umls.cui_to_name, one LLM round trip
+per hop. umls_traverse runs the whole chain in one call: resolve the start
+term, follow a RELA path hop by hop with a fan-out cap per node, and return
+every path with names:
+
+    umls_traverse("Gynecomastia", ["may_be_treated_by", "has_target"])
+    -> {"paths": [{"cuis": ["C0018418", "C0039286", "C1521863"],
+                   "names": ["Gynecomastia", "Tamoxifen-containing product", "Estrogen Receptor"]}, ...]}
+
+Each hop has the semantics of umls.get_related (MRREL rows with CUI2 = node
+and the given RELA), so a traversal returns what the chained calls would.
+"""
+import re
+from typing import Dict, List, Union
+
+from tools import impl as T
+
+CUI_PATTERN = re.compile(r"^C\d{7}$")
+MAX_HOPS = 4
+
+
+def _parse_path(rela_path: Union[str, List[str]]) -> List[str]:
+    if isinstance(rela_path, str):
+        rela_path = re.split(r"\s*(?:->|→|,|/)\s*", rela_path.strip())
+    return [r.strip() for r in rela_path if r and r.strip()]
+
+
+def umls_traverse(start: str,
+                  rela_path: Union[str, List[str]],
+                  max_fanout: int = 10,
+                  max_paths: int = 50) -> Dict:
+    """
+    Follow `rela_path` from `start` in one call.
+
+    Args:
+        start: A CUI ("C0018418") or a term to resolve with umls.concept_lookup.
+        rela_path: RELA names per hop, as a list or "may_be_treated_by -> has_target".
+        max_fanout: Keep at most this many related concepts per node and hop.
+        max_paths: Stop once this many complete paths were found.
+
+    Returns:
+        dict: {"start", "rela_path", "paths": [{"cuis", "names"}], "hop_sizes", "truncated"}
+              or {"error": ...} when the start term or path is unusable.
+    """
+    hops = _parse_path(rela_path)
+    if not hops:
+        return {"error": "rela_path is empty"}
+    if len(hops) > MAX_HOPS:
+        return {"error": f"rela_path has {len(hops)} hops; at most {MAX_HOPS} are supported"}
+
+    start_cui = start.strip() if CUI_PATTERN.match(start.strip()) else T.umls_concept_lookup(name=start.strip())
+    if not start_cui:
+        return {"error": f"no UMLS concept found for {start!r}"}
+
+    related = {}      # (cui, rela) -> related CUIs, so shared intermediate nodes are queried once
+    truncated = False
+    paths = [[start_cui]]
+    hop_sizes = []
+    for rela in hops:
+        extended = []
+        for path in paths:
+            key = (path[-1], rela)
+            if key not in related:
+                neighbours = list(dict.fromkeys(T.umls_get_related(from_cui=path[-1], rela=rela) or []))
+                truncated |= len(neighbours) > max_fanout
+                related[key] = neighbours[:max_fanout]
+            for cui in related[key]:
+                if cui in path:          # no cycles
+                    continue
+                extended.append(path + [cui])
+                if len(extended) >= max_paths:
+                    truncated = True
+                    break
+            if len(extended) >= max_paths:
+                break
+        paths = extended
+        hop_sizes.append(len({path[-1] for path in paths}))
+        if not paths:
+            break
+
+    names = {}
+
+    def name(cui):
+        if cui not in names:
+            names[cui] = T.umls_cui_to_name(cui=cui) or cui
+        return names[cui]
+
+    return {
+        "start": {"cui": start_cui, "name": name(start_cui)},
+        "rela_path": hops,
+        "paths": [{"cuis": path, "names": [name(cui) for cui in path]} for path in paths],
+        "hop_sizes": hop_sizes,
+        "truncated": truncated,
+    }
+
+
+TRAVERSE_SCHEMA = {
+    "name": "umls.traverse",
+    "description": "Multi-hop UMLS traversal in one call: resolve a start term (or CUI) and follow a path of "
+                   "relationship types, e.g. may_be_treated_by -> has_target. Returns every path with concept "
+                   "names. Use instead of chaining umls.concept_lookup and umls.get_related.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "start": {"type": "string", "description": "Start concept name or CUI"},
+            "rela_path": {
+                "type": "array", "items": {"type": "string"},
+                "description": "RELA per hop, e.g. [\"may_be_treated_by\", \"has_target\"]",
+            },
+            "max_fanout": {"type": "integer", "description": "Max related concepts kept per node and hop", "default": 10},
+            "max_paths": {"type": "integer", "description": "Max complete paths returned", "default": 50},
+        },
+        "required": ["start", "rela_path"],
+    },
+}